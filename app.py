@@ -11,6 +11,8 @@ import streamlit.components.v1 as components
 from epm.user_db.user_db import create_usertable, add_userdata, get_userdata, \
                                 view_all_users, delete_usertable
 from epm.graph import *
+from epm.graph.cube import load_cube
+from epm.graph.specs import log_spec, mid_hist_spec, mid_spec
 from epm.modeling import review_alert, ml_modeling as mlm
 
 
@@ -203,9 +205,8 @@ def page_student(username):
         |**`TextEditor`**|Using the text editor but not doing exercise
         |**`Other`**|When the student is not viewing any pages above|""")
 
-        # read in dataframe
-        df = session_agg()
-        df_avg = session_avg(df)
+        # the activities of the precomputed cube
+        cube = load_cube()
 
         # Selectbox - log activity selection
         log_activity = ['mouse_click_left', 'mouse_wheel', 'idle_time',
@@ -214,47 +215,28 @@ def page_student(username):
         option = st.selectbox('1. Which log activity you like to focus on?', log_activity)
 
         # Multiselect - Activity selection
-        sorted_activity_unique = sorted(df['activity'].unique())
+        sorted_activity_unique = sorted(cube['activities'])
         selected_activity = st.multiselect('2. Which activity do you want to include',
                                            sorted_activity_unique,
                                            sorted_activity_unique)
 
-        # --- Class Average Plot ---
-        p = plot_log(df_avg, student, selected_activity, option,
-                     type='average').properties(title='Class Average')
-
-        # --- Student Activity Distribution Plot ---
-        s = plot_log(df, student, selected_activity, option, type='student').properties(
-            title='Student' + ' ' + str(student) + ' ' + option)
-
-        # Present graphs side by side
-        x = alt.hconcat(
-            p, s
-        ).resolve_scale(y='shared')
+        # --- Class Average and Student Activity Distribution Plots, side by side ---
+        x = log_spec(student, selected_activity, option)
         st.write('**Plot Result**: You select ' + option)
-        st.write(x)
+        st.vega_lite_chart(x)
 
     elif option == 'Grades':
         st.header("Grades")
         # --- each session histogram plot ---
-        session = st.radio('Which session?', (2, 3, 4, 5, 6), 0)
-
-        # prepare datasets
-        data_for_hist = mid_hist(session)
-        data_summary = mid_summary(student, data_for_hist)
+        session = st.radio('Which session?', tuple(mid_sessions()), 0)
 
-        p = plot_mid_hist(session, student, data_for_hist, data_summary)
+        p = mid_hist_spec(session, student)
 
-        st.write(p)
+        st.vega_lite_chart(p)
         # --- session grades plot ---
-        # prepare datasets
-        all, area = mid_avg()
-
-        all = all[all['Student Id'].isin(['Average', str(student)])]
-
-        m = plot_mid(all, area)
+        m = mid_spec(['Average', str(student)])
 
-        st.write(m)
+        st.vega_lite_chart(m)
     else:
         page_review_alert(username)
 
@@ -288,12 +270,12 @@ def page_instructor():
         |**`TextEditor`**|Using the text editor but not doing exercise
         |**`Other`**|When the student is not viewing any pages above|""")
 
-        # read in dataframe
-        df = session_agg()
-        df_avg = session_avg(df)
+        # the students and activities of the precomputed cube
+        cube = load_cube()
 
         # Slider - Student Slider
-        student = st.slider('1. Which student?', 1, 115)
+        student = st.slider('1. Which student?', int(cube['students'][0]),
+                            int(cube['students'][-1]))
 
         # Selectbox - log activity selection
         log_activity = ['mouse_click_left', 'mouse_wheel', 'idle_time',
@@ -303,54 +285,40 @@ def page_instructor():
                               log_activity)
 
         # Multiselect - Activity selection
-        sorted_activity_unique = sorted(df['activity'].unique())
+        sorted_activity_unique = sorted(cube['activities'])
         selected_activity = st.multiselect('3. Which activity do you want to include',
                                            sorted_activity_unique,
                                            sorted_activity_unique)
 
-        # --- Class Average Plot ---
-        p = plot_log(df_avg, student, selected_activity, option,
-                     type='average').properties(title='Class Average')
-
-        # --- Student Activity Distribution Plot ---
-        s = plot_log(df, student, selected_activity, option, type='student').properties(
-            title='Student' + ' ' + str(student) + ' ' + option)
-
-        # Present graphs side by side
-        x = alt.hconcat(
-            p, s
-        ).resolve_scale(y='shared')
+        # --- Class Average and Student Activity Distribution Plots, side by side ---
+        x = log_spec(student, selected_activity, option)
 
         st.write('**Plot Result**: You select ' + 'student ' + str(student) + ' and ' + option)
-        st.write(x)
+        st.vega_lite_chart(x)
 
     elif option == 'Class Grades':
         st.header("Class Grades")
         # --- each session histogram plot ---
         col1, col2 = st.columns(2)
         with col1:
-            session = st.radio('Which session?', (2, 3, 4, 5, 6), 0)
+            session = st.radio('Which session?', tuple(mid_sessions()), 0)
         with col2:
+            student_ids = mid_hist(session)['Student_Id']
             student = st.number_input('Which student you want to focus on \
-                                      (input student ID from 1 to 115)', 1, 115, 1)
+                                      (input student ID from ' + str(student_ids.min()) +
+                                      ' to ' + str(student_ids.max()) + ')',
+                                      int(student_ids.min()), int(student_ids.max()),
+                                      int(student_ids.min()))
 
-        # prepare datasets
-        data_for_hist = mid_hist(session)
-        data_summary = mid_summary(student, data_for_hist)
+        p = mid_hist_spec(session, student)
 
-        p = plot_mid_hist(session, student, data_for_hist, data_summary)
-
-        st.write(p)
+        st.vega_lite_chart(p)
         # --- session grades plot ---
-        # prepare datasets
-        all, area = mid_avg()
-
-        students = all['Student Id'].unique()
+        students = mid_avg()[0]['Student Id'].unique()
         selected_students = st.multiselect('Students you selected', students, ['Average', '1'])
-        all = all[all['Student Id'].isin(selected_students)]
-        m = plot_mid(all, area)
+        m = mid_spec(selected_students)
 
-        st.write(m)
+        st.vega_lite_chart(m)
 
     elif option == 'Grouping Assistant':
         page_grouping_assistant()
@@ -502,7 +470,8 @@ def page_grouping_assistant():
         features_include = st.selectbox("How many siginificant learning features to be included?",
                                         range(2, 5))
     with col2:
-        cluster_timing = st.selectbox("Which session is the class at?", range(2, 7))
+        cluster_timing = st.selectbox("Which session is the class at?",
+                                      range(2, len(whole_data) + 1))
     with col3:
         number_of_cluster = int(st.text_input("How many clusters to make?", 3))
 
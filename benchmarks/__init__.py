@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the epm pipeline.
+Run the scripts from the repository root, e.g.
+`python -m benchmarks.bench_read_file`.
+"""
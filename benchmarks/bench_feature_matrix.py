@@ -0,0 +1,78 @@
+"""
+This module compares the fused feature_manipulation with the former
+multi-loop pipeline (drop/rename, regex replace, groupby-sum,
+pivot_table and fillna over every session).
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import pandas as pd
+
+from epm.data_prep import log_prep as lp
+
+
+def multi_loop_features(data_list):
+    """
+    The feature_manipulation pipeline before the fused builder, kept as reference
+    """
+    data_list = list(data_list)
+    for i, session in enumerate(data_list):
+        if i == 0:
+            continue
+        data_list[i] = session.drop(columns=['session', 'exercise', 'start_time', 'end_time'])
+        data_list[i].columns = lp.FEATURE_COLUMNS
+    for i, session in enumerate(data_list):
+        if i == 0:
+            continue
+        session['ACT'] = session['ACT'].replace(regex=[r'TextEditor\w+', r'Deeds\w+',
+                                                       r'Study\w+', r'(?i)FSM_\w+'],
+                                                value=['TextEditor', 'Deeds', 'Study', 'FSM'])
+        session['ACT'] = session['ACT'].str.strip()
+    for i, session in enumerate(data_list):
+        if i == 0:
+            continue
+        data_list[i] = session.groupby(['ID', 'ACT']).sum()
+    for i, session in enumerate(data_list):
+        if i == 0:
+            continue
+        data_list[i] = session.pivot_table(index=['ID'], columns='ACT', values=lp.METRICS)
+        data_list[i].columns = ['_'.join(col) for col in data_list[i].columns.values]
+    for i, session in enumerate(data_list):
+        if i == 0:
+            continue
+        data_list[i] = session.fillna(0)
+    return data_list
+
+
+def best_time(function, raw, repeat):
+    """
+    Return the best wall time of function(raw) and its last result
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(list(raw))
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--file-dir', default='data/Processes')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = lp.read_file(args.file_dir)
+    before, expected = best_time(multi_loop_features, raw, args.repeat)
+    after, features = best_time(lp.feature_manipulation, raw, args.repeat)
+    for i in range(1, len(expected)):
+        pd.testing.assert_frame_equal(expected[i], features[i])
+    print(f"multi-loop pipeline {before:8.3f}s")
+    print(f"fused builder       {after:8.3f}s  speedup x{before / after:.1f}")
+
+
+if __name__ == '__main__':
+    main()
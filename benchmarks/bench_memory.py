@@ -0,0 +1,49 @@
+"""
+This module reports the memory footprint of every log_prep stage
+with the default and the compact (LOG_SCHEMA) dtypes.
+"""
+import argparse
+import contextlib
+import io
+
+import pandas as pd
+
+from epm.data_prep import log_prep as lp
+
+
+def footprint_by_stage(file_dir, compact):
+    """
+    Run read_file and feature_manipulation and measure each stage's output
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+    compact: Whether read_file applies the compact dtypes
+
+    Return
+    ----------
+    A dictionary of the total bytes held after each stage
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = lp.read_file(file_dir, compact=compact)
+    stages = {'read_file': lp.memory_footprint(raw)['total']}
+    features = lp.feature_manipulation(raw)
+    stages['feature_manipulation'] = lp.memory_footprint(features)['total']
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--file-dir', default='data/Processes')
+    args = parser.parse_args()
+
+    report = pd.DataFrame({'default': footprint_by_stage(args.file_dir, False),
+                           'compact': footprint_by_stage(args.file_dir, True)})
+    report = report / 1e6
+    report['saving'] = (1 - report['compact'] / report['default']).map('{:.0%}'.format)
+    print(report.round(2).rename(columns={'default': 'default (MB)',
+                                          'compact': 'compact (MB)'}).to_string())
+
+
+if __name__ == '__main__':
+    main()
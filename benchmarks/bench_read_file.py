@@ -0,0 +1,61 @@
+"""
+This module compares the serial and the parallel walk of
+log_prep.read_file over the Processes files.
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+import pandas as pd
+
+from epm.data_prep import log_prep as lp
+
+
+def time_read_file(file_dir, n_jobs, repeat):
+    """
+    Time read_file with the given number of workers
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+    n_jobs: Number of worker processes passed to read_file
+    repeat: How many times the read is repeated
+
+    Return
+    ----------
+    The best wall time in seconds and the data_list of the last run
+    """
+    best = float('inf')
+    data_list = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # read_file reports every session it reads; keep the output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            data_list = lp.read_file(file_dir, n_jobs=n_jobs)
+        best = min(best, time.perf_counter() - start)
+    return best, data_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--file-dir', default='data/Processes')
+    parser.add_argument('--jobs', type=int, nargs='+',
+                        default=sorted({2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    serial, expected = time_read_file(args.file_dir, 1, args.repeat)
+    print(f"n_jobs=1  {serial:8.3f}s  (serial walk)")
+    for n_jobs in args.jobs:
+        if n_jobs == 1:
+            continue
+        elapsed, data_list = time_read_file(args.file_dir, n_jobs, args.repeat)
+        for i in range(1, len(expected)):
+            pd.testing.assert_frame_equal(expected[i], data_list[i])
+        print(f"n_jobs={n_jobs:<2d} {elapsed:8.3f}s  speedup x{serial / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
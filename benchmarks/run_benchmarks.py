@@ -0,0 +1,296 @@
+"""
+This module benchmarks every epm pipeline stage (log_prep, grades_prep,
+ml_modeling, review_alert and graph_data) on synthetic datasets of several
+sizes, reports wall time and peak traced memory, and saves the results as
+JSON so that two runs can be compared for regressions.
+
+    python -m benchmarks.run_benchmarks --scales small medium --output run.json
+    python -m benchmarks.run_benchmarks --compare base.json run.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from epm.data_prep import grades_prep as gp
+from epm.data_prep import log_prep as lp
+from epm.data_prep import synthetic
+from epm.data_prep import workbook_cache
+from epm.graph import cache as graph_cache
+from epm.graph import graph_data as gd
+from epm.modeling import ml_modeling as mm
+# epm.modeling's star import shadows the module with the function of the same name
+from epm.modeling.review_alert import review_alert
+
+
+# Arguments of synthetic.generate_epm_data for every scale
+SCALES = {'small': {'n_students': 115, 'n_sessions': 6, 'events_per_file': 440},
+          'medium': {'n_students': 500, 'n_sessions': 6, 'events_per_file': 440},
+          'large': {'n_students': 2000, 'n_sessions': 6, 'events_per_file': 440}}
+
+
+def copy_list(data_list):
+    """
+    Copy the dataframes of a data_list, since several stages modify theirs in place
+    """
+    return [item.copy() if isinstance(item, pd.DataFrame) else item for item in data_list]
+
+
+def pipeline_stages(data_dir):
+    """
+    Describe the benchmarked stages over a dataset written by synthetic.py
+
+    Parameters
+    ----------
+    data_dir: Local path of the dataset ('data' folder layout)
+
+    Return
+    ----------
+    A list of (name, requirements, function) tuples in running order; every
+    function takes the dictionary of earlier results and returns its own result
+    """
+    processes = os.path.join(data_dir, 'Processes')
+    mid_path = os.path.join(data_dir, 'intermediate_grades.xlsx')
+    final_path = os.path.join(data_dir, 'final_grades.xlsx')
+
+    def grades(done):
+        mid, final_1st, final_2nd = done['grades_prep.read_grades']
+        final = gp.final_manipulation(final_1st, final_2nd)
+        merged = gp.merge_mid_final(gp.rebase_mid(mid.copy()), final)
+        return gp.get_result(gp.standardize_grades(merged))
+
+    return [
+        ('log_prep.read_file', [], lambda done: lp.read_file(processes)),
+        ('log_prep.feature_manipulation', ['log_prep.read_file'],
+         lambda done: lp.feature_manipulation(list(done['log_prep.read_file']))),
+        ('log_prep.feature_standardization', ['log_prep.feature_manipulation'],
+         lambda done: lp.feature_standardization(
+             copy_list(done['log_prep.feature_manipulation']))),
+        ('grades_prep.read_grades', [], lambda done: gp.read_grades(mid_path, final_path)),
+        ('grades_prep.pipeline', ['grades_prep.read_grades'], grades),
+        ('log_prep.merge_all_data', ['log_prep.feature_standardization', 'grades_prep.pipeline'],
+         lambda done: lp.merge_all_data(
+             [frame.reset_index() for frame in done['log_prep.feature_standardization']],
+             done['grades_prep.pipeline'])),
+        ('ml_modeling.subset_important_features[different]', ['log_prep.merge_all_data'],
+         lambda done: mm.subset_important_features(
+             copy_list(done['log_prep.merge_all_data']), 5, 'different')),
+        ('ml_modeling.machine_learning_model',
+         ['ml_modeling.subset_important_features[different]'],
+         lambda done: mm.machine_learning_model(
+             copy_list(done['ml_modeling.subset_important_features[different]']), 'RF')),
+        # The app clusters the 'common' subset
+        ('ml_modeling.subset_important_features[common]', ['log_prep.merge_all_data'],
+         lambda done: mm.subset_important_features(
+             copy_list(done['log_prep.merge_all_data']), 5, 'common')),
+        ('ml_modeling.kmean_clustering', ['ml_modeling.subset_important_features[common]'],
+         lambda done: mm.kmean_clustering(
+             copy_list(done['ml_modeling.subset_important_features[common]']), 6, 3)),
+        ('review_alert.review_alert', [], lambda done: review_alert(1, 3)),
+        # graph_data reads the 'data' folder relative to the working directory
+        ('graph_data.session_agg', [], lambda done: gd.session_agg()),
+        ('graph_data.session_avg', ['graph_data.session_agg'],
+         lambda done: gd.session_avg(done['graph_data.session_agg'])),
+        ('graph_data.mid_avg', [], lambda done: gd.mid_avg()),
+        ('graph_data.mid_hist', [], lambda done: gd.mid_hist(2)),
+        ('graph_data.mid_summary', ['graph_data.mid_hist'],
+         lambda done: gd.mid_summary(1, done['graph_data.mid_hist'])),
+    ]
+
+
+def reset_caches():
+    """
+    Forget what the stages cached in memory, so every run does the full work
+    """
+    workbook_cache.clear_cache()
+    # the graph_data stages are cached until the 'data' files change
+    graph_cache.clear_cache()
+
+
+def measure(function, done, repeat):
+    """
+    Time a stage and trace its peak memory
+
+    Parameters
+    ----------
+    function: The stage function
+    done: The dictionary of earlier results
+    repeat: How many untraced runs are timed (the best one is kept)
+
+    Return
+    ----------
+    The stage result and a dictionary with 'seconds' and 'peak_mb'
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        reset_caches()
+        start = time.perf_counter()
+        result = function(done)
+        best = min(best, time.perf_counter() - start)
+    # tracemalloc slows the stage down, so the traced run is not timed
+    reset_caches()
+    tracemalloc.start()
+    function(done)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'seconds': round(best, 6), 'peak_mb': round(peak / 1e6, 3)}
+
+
+def run_scale(data_dir, repeat, stages=None):
+    """
+    Run every stage over one dataset
+
+    Parameters
+    ----------
+    data_dir: Local path of the dataset ('data' folder layout)
+    repeat: How many timed runs per stage
+    stages: Names of the stages to run (with the ones they depend on), all by default
+
+    Return
+    ----------
+    A dictionary keyed by stage name; a failing stage records its 'error'
+    and the stages that need its result are skipped
+    """
+    pipeline = pipeline_stages(os.path.abspath(data_dir))
+    selected = {name for name, _, _ in pipeline
+                if not stages or any(name.startswith(stage) for stage in stages)}
+    # Run the stages the selected ones need, latest first
+    for name, requires, _ in reversed(pipeline):
+        if name in selected:
+            selected.update(requires)
+    results = {}
+    done = {}
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(data_dir)))
+    try:
+        for name, requires, function in pipeline:
+            if name not in selected:
+                continue
+            missing = [stage for stage in requires if stage not in done]
+            if missing:
+                results[name] = {'error': 'skipped, needs ' + ', '.join(missing)}
+                continue
+            try:
+                with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    done[name], results[name] = measure(function, done, repeat)
+            except Exception as error:
+                results[name] = {'error': '{}: {}'.format(type(error).__name__, error)}
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def environment():
+    """
+    Describe the machine and library versions of a run
+    """
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__}
+
+
+def compare(base, head, threshold=1.2, floor=0.05):
+    """
+    Compare two benchmark runs stage by stage
+
+    Parameters
+    ----------
+    base: The results dictionary of the reference run
+    head: The results dictionary of the new run
+    threshold: Time or memory ratio above which a stage counts as a regression
+    floor: Stages faster than this many seconds in both runs are not flagged
+
+    Return
+    ----------
+    A pandas dataframe with one row per (scale, stage) and a 'regression' column
+    """
+    rows = []
+    for scale, stages in head['results'].items():
+        for stage, new in stages.items():
+            old = base['results'].get(scale, {}).get(stage)
+            if old is None or 'error' in old or 'error' in new:
+                continue
+            time_ratio = new['seconds'] / max(old['seconds'], 1e-9)
+            memory_ratio = new['peak_mb'] / max(old['peak_mb'], 1e-9)
+            slow = time_ratio > threshold and max(old['seconds'], new['seconds']) > floor
+            rows.append({'scale': scale, 'stage': stage,
+                         'base_s': old['seconds'], 'head_s': new['seconds'],
+                         'time_ratio': round(time_ratio, 3),
+                         'base_mb': old['peak_mb'], 'head_mb': new['peak_mb'],
+                         'memory_ratio': round(memory_ratio, 3),
+                         'regression': slow or (memory_ratio > threshold and new['peak_mb'] > 1)})
+    return pd.DataFrame(rows, columns=['scale', 'stage', 'base_s', 'head_s', 'time_ratio',
+                                       'base_mb', 'head_mb', 'memory_ratio', 'regression'])
+
+
+def report(results):
+    """
+    Format the results of a run as a table
+    """
+    rows = [dict(scale=scale, stage=stage, **values)
+            for scale, stages in results.items() for stage, values in stages.items()]
+    return pd.DataFrame(rows).set_index(['scale', 'stage']).to_string()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium'],
+                        choices=sorted(SCALES))
+    parser.add_argument('--stages', nargs='+',
+                        help='stage name prefixes to run, e.g. log_prep graph_data')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help='keep the generated datasets in this folder')
+    parser.add_argument('--output', help='JSON file to save the results in')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'),
+                        help='compare two saved runs instead of running')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    parser.add_argument('--floor', type=float, default=0.05,
+                        help='seconds under which a stage is never flagged')
+    args = parser.parse_args()
+
+    if args.compare:
+        runs = []
+        for path in args.compare:
+            with open(path) as run:
+                runs.append(json.load(run))
+        table = compare(*runs, threshold=args.threshold, floor=args.floor)
+        print(table.to_string(index=False))
+        sys.exit(1 if table['regression'].any() else 0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.data_dir or tmp
+        results = {}
+        for scale in args.scales:
+            data_dir = os.path.join(root, scale, 'data')
+            if not os.path.exists(os.path.join(data_dir, 'final_grades.xlsx')):
+                synthetic.generate_epm_data(data_dir, seed=args.seed, **SCALES[scale])
+            results[scale] = run_scale(data_dir, args.repeat, args.stages)
+    run = {'environment': environment(), 'scales': {scale: SCALES[scale] for scale in results},
+           'seed': args.seed, 'results': results}
+    print(report(results))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(run, output, indent=1)
+
+
+if __name__ == '__main__':
+    main()
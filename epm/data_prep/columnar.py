@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module saves and loads processed dataframes as compressed Parquet or
+Feather files, keeping their dtypes, index and exact values, so that later
+steps do not re-parse csv files
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+from pyarrow import parquet as pq
+
+
+# File extension of every supported format
+FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+
+def file_format(path):
+    """
+    Infer the format of a file from its extension, csv by default
+    """
+    extension = os.path.splitext(path)[1].lower()
+    for name, suffix in FORMATS.items():
+        if extension == suffix:
+            return name
+    return 'csv'
+
+
+def check_format(name):
+    """
+    Raise a ValueError unless 'name' is a supported format
+    """
+    if name not in FORMATS:
+        raise ValueError("'file_format' should be one of " + ', '.join(FORMATS) + ".")
+
+
+def write_frame(frame, path, compression='zstd'):
+    """
+    Write a dataframe in the format given by the extension of 'path'
+
+    Parameters
+    ----------
+    frame: A pandas dataframe
+    path: Local path of the file ('.parquet', '.feather' or '.csv')
+    compression: Codec of the Parquet and Feather files
+    """
+    name = file_format(path)
+    if name == 'csv':
+        frame.to_csv(path)
+        return
+    # The pandas metadata stored with the table restores the index and dtypes
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    if name == 'parquet':
+        pq.write_table(table, path, compression=compression)
+    else:
+        feather.write_feather(table, path, compression=compression)
+
+
+def read_frame(path, columns=None):
+    """
+    Read a dataframe written by write_frame
+
+    Parameters
+    ----------
+    path: Local path of the file
+    columns: The columns to read (Parquet and Feather only), all by default
+
+    Return
+    ----------
+    A pandas dataframe with the index and dtypes it was written with; csv
+    files are read with their first column as the index
+    """
+    name = file_format(path)
+    if name == 'csv':
+        return pd.read_csv(path, index_col=0)
+    if name == 'parquet':
+        schema = pq.read_schema(path)
+    else:
+        with pa.memory_map(path) as source:
+            schema = pa.ipc.open_file(source).schema
+    if columns is not None:
+        # A stored index is read with any subset of the columns
+        index = (schema.pandas_metadata or {}).get('index_columns', [])
+        columns = [col for col in index if isinstance(col, str)] + list(columns)
+    if name == 'parquet':
+        table = pq.read_table(path, columns=columns, use_pandas_metadata=True)
+    else:
+        # Read into memory, so no memory map keeps the file open
+        table = feather.read_table(path, columns=columns, memory_map=False)
+    return table.to_pandas()
+
+
+def write_frames(frames, paths, n_jobs=1, compression='zstd'):
+    """
+    Write several dataframes, in a pool of threads when n_jobs is not 1
+    (pyarrow compresses and writes without holding the GIL)
+
+    Parameters
+    ----------
+    frames: A list of pandas dataframes
+    paths: The local path of every dataframe
+    n_jobs: Number of threads, -1 uses every available core
+    compression: Codec of the Parquet and Feather files
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs == 1 or len(frames) < 2:
+        for frame, path in zip(frames, paths):
+            write_frame(frame, path, compression)
+        return
+    with ThreadPoolExecutor(max_workers=min(n_jobs, len(frames))) as executor:
+        # list() re-raises the first error of a write
+        list(executor.map(lambda job: write_frame(job[0], job[1], compression),
+                          zip(frames, paths)))
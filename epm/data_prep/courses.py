@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module rebuilds the formatted log data and grades of several courses,
+each with any number of sessions, in a pool of worker processes
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from . import grades_prep as gp
+from .log_prep import read_file, feature_manipulation, save_data
+from .workbook_cache import read_workbook
+
+
+def build_course(data_dir, save_dir=None):
+    """
+    Rebuild one course from a folder laid out like 'data'
+    ('Processes', 'intermediate_grades.xlsx' and 'final_grades.xlsx')
+
+    Parameters
+    ----------
+    data_dir: Local path of the course data
+    save_dir: A path to save the features and grades in, nothing is saved by default
+
+    Return
+    ----------
+    A dictionary with the course's 'features' (a list whose i-th element holds
+    Session i) and its standardized 'grades' with the review outcomes
+    """
+    # Error meassage
+    if not isinstance(data_dir, str) is True:
+        raise ValueError("'data_dir' should be a string (directory).")
+    # read_file reports every session it reads, which interleaves across workers
+    with contextlib.redirect_stdout(io.StringIO()):
+        features = feature_manipulation(read_file(os.path.join(data_dir, 'Processes')))
+    mid = read_workbook(os.path.join(data_dir, 'intermediate_grades.xlsx'))
+    # Every sheet of the final grades is an exam sitting, in the order they were sat
+    sittings = list(read_workbook(os.path.join(data_dir, 'final_grades.xlsx'),
+                                  sheet_name=None).values())
+    grades = gp.merge_mid_final(gp.rebase_mid(mid), gp.final_manipulation(sittings))
+    grades = gp.get_result(gp.standardize_grades(grades))
+    if save_dir is not None:
+        os.makedirs(save_dir, exist_ok=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_data(features, save_dir=os.path.join(save_dir, ''))
+            gp.save_grades(grades, outdir=os.path.join(save_dir, 'complete_grades.csv'))
+    return {'features': features, 'grades': grades}
+
+
+def build_courses(courses, save_dir=None, n_jobs=1):
+    """
+    Rebuild several courses, one course per worker process
+
+    Parameters
+    ----------
+    courses: A dictionary of course data folders keyed by course name,
+             or a list of folders named after their course
+    save_dir: A path to save every course in, under a folder named after the course
+    n_jobs: Number of worker processes, -1 uses every available core
+
+    Return
+    ----------
+    A dictionary keyed by course name of build_course results
+    """
+    if isinstance(courses, list):
+        courses = {os.path.basename(os.path.normpath(path)): path for path in courses}
+    # Error meassages
+    if not isinstance(courses, dict) is True:
+        raise ValueError("'courses' should be a dictionary or a list of directories.")
+    if not isinstance(n_jobs, int) is True or n_jobs == 0 or n_jobs < -1:
+        raise ValueError("'n_jobs' should be a positive integer or -1.")
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    names = list(courses)
+    save_dirs = [None if save_dir is None else os.path.join(save_dir, name) for name in names]
+    if n_jobs == 1 or len(names) < 2:
+        results = [build_course(courses[name], path) for name, path in zip(names, save_dirs)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(names))) as executor:
+            results = list(executor.map(build_course, [courses[name] for name in names],
+                                        save_dirs))
+    return dict(zip(names, results))
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module converts the Processes log files once into a memory-mapped
+NumPy event store, so any student's events can be sliced without
+re-reading the text files
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from .log_prep import LOG_COLUMNS, read_file, order_sessions
+from .time_features import to_seconds
+
+
+EVENT_DTYPE = np.dtype([('session', 'u2'), ('student', 'u4'),
+                        ('activity', 'u4'), ('exercise', 'u4'),
+                        ('start', 'i8'), ('end', 'i8'),
+                        ('idle_time', 'f8'), ('mouse_wheel', 'u4'),
+                        ('mouse_wheel_click', 'u4'), ('mouse_click_left', 'u4'),
+                        ('mouse_click_right', 'u4'), ('mouse_movement', 'u4'),
+                        ('keystroke', 'u4')])
+INDEX_DTYPE = np.dtype([('session', 'u2'), ('student', 'u4'),
+                        ('begin', 'i8'), ('stop', 'i8')])
+COUNTERS = LOG_COLUMNS[7:]
+# Code of a missing activity or exercise label
+MISSING = np.iinfo('u4').max
+
+
+def encode_column(values, dtype, name):
+    """
+    Check that integer values fit in a store field before they are written
+    """
+    values = values.to_numpy()
+    limits = np.iinfo(dtype)
+    if len(values) and (values.min() < limits.min or values.max() > limits.max):
+        raise ValueError(f"'{name}' has values that do not fit in {dtype}.")
+    return values
+
+
+def build_event_store(file_dir='../../data/Processes', store_dir='../../data/.event_store',
+                      n_jobs=1):
+    """
+    Convert every log file into the event store
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+    store_dir: Local path of the store, created when it does not exist
+    n_jobs: Number of worker processes used to parse the files
+
+    Return
+    ----------
+    The number of events written; log_prep.read_file(store_dir=...) reads them back
+    """
+    # Error meassage
+    if not isinstance(store_dir, str) is True:
+        raise ValueError("'store_dir' should be should be a string (directory).")
+    sessions = [session for session in read_file(file_dir, n_jobs)
+                if isinstance(session, pd.DataFrame)]
+    if sessions:
+        logs = pd.concat(sessions, ignore_index=True)
+    else:
+        # no log file: the store is written empty
+        logs = pd.DataFrame(columns=LOG_COLUMNS)
+    # Keep every (session, student) contiguous, in file order within it
+    order = np.lexsort((logs['student_id'].to_numpy(), logs['session'].to_numpy()))
+    logs = logs.iloc[order].reset_index(drop=True)
+    os.makedirs(store_dir, exist_ok=True)
+    events_path = os.path.join(store_dir, 'events.npy')
+    events = np.lib.format.open_memmap(events_path + '.tmp', mode='w+',
+                                       dtype=EVENT_DTYPE, shape=(len(logs),))
+    events['session'] = encode_column(logs['session'], 'u2', 'session')
+    events['student'] = encode_column(logs['student_id'], 'u4', 'student_id')
+    vocab = {}
+    for field in ['activity', 'exercise']:
+        codes, labels = pd.factorize(logs[field])
+        events[field] = np.where(codes < 0, MISSING, codes)
+        vocab[field] = labels.tolist()
+    events['start'] = to_seconds(logs['start_time'])
+    events['end'] = to_seconds(logs['end_time'])
+    events['idle_time'] = logs['idle_time'].to_numpy(dtype='float64')
+    for col in COUNTERS:
+        events[col] = encode_column(logs[col], 'u4', col)
+    events.flush()
+    # Sidecar index of the row range of every (session, student)
+    keys = events[['session', 'student']]
+    begins = np.flatnonzero(np.append(True, keys[1:] != keys[:-1])) if len(keys) else []
+    index = np.empty(len(begins), dtype=INDEX_DTYPE)
+    index['session'] = events['session'][begins]
+    index['student'] = events['student'][begins]
+    index['begin'] = begins
+    index['stop'] = np.append(begins[1:], len(events))
+    del events
+    os.replace(events_path + '.tmp', events_path)
+    np.save(os.path.join(store_dir, 'index.npy'), index)
+    with open(os.path.join(store_dir, 'vocab.json'), 'w') as vocab_file:
+        json.dump(vocab, vocab_file)
+    return len(logs)
+
+
+def open_event_store(store_dir='../../data/.event_store'):
+    """
+    Open the event store without reading the events into memory
+
+    Parameters
+    ----------
+    store_dir: Local path of a store written by build_event_store
+
+    Return
+    ----------
+    A dictionary with the memory-mapped 'events', the 'index' mapping
+    (session, student) to a (begin, stop) row range, and the 'activity'
+    and 'exercise' label vocabularies
+    """
+    # Error meassage
+    if not os.path.exists(os.path.join(store_dir, 'events.npy')):
+        raise ValueError("'store_dir' does not contain an event store.")
+    events = np.load(os.path.join(store_dir, 'events.npy'), mmap_mode='r')
+    index = np.load(os.path.join(store_dir, 'index.npy'))
+    with open(os.path.join(store_dir, 'vocab.json')) as vocab_file:
+        vocab = json.load(vocab_file)
+    return {'events': events,
+            'index': {(int(row['session']), int(row['student'])): (int(row['begin']),
+                                                                   int(row['stop']))
+                      for row in index},
+            'activity': vocab['activity'],
+            'exercise': vocab['exercise']}
+
+
+def student_events(store, session, student):
+    """
+    Slice one student's events of one session, without copying them
+
+    Parameters
+    ----------
+    store: A dictionary returned by open_event_store
+    session: Session number
+    student: Student ID
+
+    Return
+    ----------
+    A read-only structured NumPy array view of the events (empty if none)
+    """
+    begin, stop = store['index'].get((session, student), (0, 0))
+    return store['events'][begin:stop]
+
+
+def events_to_frame(store, events):
+    """
+    Decode store events into a raw log dataframe
+
+    Parameters
+    ----------
+    store: A dictionary returned by open_event_store
+    events: A structured NumPy array of events, e.g. from student_events
+
+    Return
+    ----------
+    A pandas dataframe with LOG_COLUMNS, with start and end times as datetimes
+    """
+    frame = {'session': events['session'].astype('int64'),
+             'student_id': events['student'].astype('int64')}
+    for field in ['exercise', 'activity']:
+        labels = np.array(store[field] + [np.nan], dtype=object)
+        codes = np.where(events[field] == MISSING, len(store[field]), events[field])
+        frame[field] = labels[codes]
+    for field, col in [('start', 'start_time'), ('end', 'end_time')]:
+        frame[col] = events[field].astype('datetime64[s]').astype('datetime64[ns]')
+    frame['idle_time'] = events['idle_time']
+    for col in COUNTERS:
+        frame[col] = events[col].astype('int64')
+    return pd.DataFrame(frame, columns=LOG_COLUMNS)
+
+
+def store_to_data_list(store):
+    """
+    Rebuild the per-session raw data from the event store
+
+    Parameters
+    ----------
+    store: A dictionary returned by open_event_store
+
+    Return
+    ----------
+    A list containing pandas dataframes of all sessions' raw data, as read_file
+    returns it (students in ID order, times parsed to datetimes); empty for
+    an empty store
+    """
+    events = store['events']
+    if len(events) == 0:
+        return []
+    sessions = np.unique(events['session'])
+    bounds = np.searchsorted(events['session'], np.append(sessions, sessions[-1] + 1))
+    return order_sessions([events_to_frame(store, events[begin:stop])
+                           for begin, stop in zip(bounds[:-1], bounds[1:])])
@@ -4,9 +4,25 @@
 This module preprocess the grades files
 """
 
+import re
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
+try:
+    from .online_scaler import partial_standardize
+    from .columnar import read_frame, write_frame
+    from .workbook_cache import read_workbook
+except ImportError:
+    # imported as a top-level module, e.g. from the modeling notebook
+    from online_scaler import partial_standardize
+    from columnar import read_frame, write_frame
+    from workbook_cache import read_workbook
+
+
+# A final exam question column, e.g. 'ES 1.2 \n(3 points)'
+EXAM_QUESTION = re.compile(r'ES\s*(\d+)\.\d+\s*\((\d+) points\)')
+# Ratio of final to mid score under which a session is recommended for review
+REVIEW_THRESHOLDS = {2: 1.3, 3: 1.2, 4: 2, 5: 1.8, 6: 1.5}
 
 
 def read_grades(dir1='../../data/intermediate_grades.xlsx',
@@ -23,53 +39,111 @@ def read_grades(dir1='../../data/intermediate_grades.xlsx',
         raise ValueError("'grades' should be should be a string (directory).")
     if not isinstance(dir2, str) is True:
         raise ValueError("'grades' should be should be a string (directory).")
-    # Get intermediate grades
-    mid_grades = pd.read_excel(dir1)
+    # Get intermediate grades, each workbook is parsed once (workbook_cache.py)
+    mid_grades = read_workbook(dir1)
     # Get final grades
-    xl_file = pd.ExcelFile(dir2)
-    sheet_name = xl_file.sheet_names
-    final_1st = pd.read_excel(dir2, sheet_name=sheet_name[0])
-    final_2nd = pd.read_excel(dir2, sheet_name=sheet_name[1])
+    final_1st, final_2nd = list(read_workbook(dir2, sheet_name=None).values())[:2]
     return mid_grades, final_1st, final_2nd
 
 
-def final_manipulation(final_1st, final_2nd):
+def exam_questions(columns):
     """
-    This function merge two final grades into one single file
+    Group the final exam question columns, e.g. 'ES 3.2\n(2 points)', by session
+
     Parameters
     ----------
-    final_1st: first final grades dataframe
-    final_2nd: second final grades dataframe
+    columns: The column names of a final grades sheet
+
+    Return
+    ----------
+    A dictionary keyed by session number of (column, points) pairs in column order
+    """
+    questions = {}
+    for col in columns:
+        match = EXAM_QUESTION.match(str(col))
+        if match:
+            questions.setdefault(int(match.group(1)), []).append((col, int(match.group(2))))
+    return dict(sorted(questions.items()))
+
+
+def exam_weights(columns):
+    """
+    Build the weight table of the final exam: every question column counts
+    once towards the score of its session
+
+    Parameters
+    ----------
+    columns: The column names of a final grades sheet
+
+    Return
+    ----------
+    A dataframe indexed by question column with one 'FIN<n>' column per session,
+    holding the weight of the question in that session's score (0 elsewhere)
+    """
+    questions = exam_questions(columns)
+    weights = pd.DataFrame(0.0, index=[col for pairs in questions.values() for col, _ in pairs],
+                           columns=['FIN' + str(session) for session in questions])
+    for session, pairs in questions.items():
+        weights.loc[[col for col, _ in pairs], 'FIN' + str(session)] = 1.0
+    return weights
+
+
+def final_manipulation(*sittings, weights=None):
+    """
+    This function merge any number of final exam sittings into one single file,
+    keeping the first sitting each student took
+    Parameters
+    ----------
+    sittings: final grades dataframes in the order they were sat
+              (first, second, ...), or a single list of them
+    weights: a weight table like exam_weights returns, the question columns
+             by 'FIN<n>' columns; every question counts once by default
     Return
     ----------
     A dataframe of one final grades
     """
+    if len(sittings) == 1 and isinstance(sittings[0], list):
+        sittings = sittings[0]
     # Error meassages
-    if not isinstance(final_1st, pd.DataFrame) is True:
-        raise ValueError("'final_1st' should be should be a panda dataframe.")
-    if not isinstance(final_2nd, pd.DataFrame) is True:
-        raise ValueError("'final_2nd' should be should be a panda dataframe.")
-    # Students who took exams twice
-    twotimer = list(set(final_1st['Student ID']).intersection(set(final_2nd['Student ID'])))
-    # 1st test takers without taking the second exam
-    final_2nd_unique = final_2nd[-final_2nd['Student ID'].isin(twotimer)]
-    # Students who took final exams (selected twotimers' first exam score)
-    final = final_1st.append(final_2nd_unique).sort_values(by=['Student ID'])
-    final_data = {'ID': final['Student ID']}
-    # aggregate grades of each session
-    final_data['FIN1'] = (final['ES 1.1 \n(2 points)'] + final['ES 1.2 \n(3 points)']) / 5 * 100
-    final_data['FIN2'] = (final['ES 2.1\n(2 points)'] + final['ES 2.2\n(3 points)']) / 5 * 100
-    final_data['FIN3'] = (final['ES 3.1\n(1 points)'] + final['ES 3.2\n(2 points)'] +
-                          final['ES 3.3\n(2 points)'] + final['ES 3.4\n(2 points)'] +
-                          final['ES 3.5\n(3 points)']) / 10 * 100
-    final_data['FIN4'] = (final['ES 4.1\n(15 points)'] + final['ES 4.2\n(10 points)']) / 25 * 100
-    final_data['FIN5'] = (final['ES 5.1\n(2 points)'] + final['ES 5.2\n(10 points)'] +
-                          final['ES 5.3\n(3 points)']) / 15 * 100
-    final_data['FIN6'] = (final['ES 6.1\n(25 points)'] + final['ES 6.2\n(15 points)']) / 40 * 100
-    final_100 = pd.DataFrame(data=final_data)
-    final = ['FIN1', 'FIN2', 'FIN3', 'FIN4', 'FIN5', 'FIN6']
-    final_100['FIN1'] = final_100['FIN1'].fillna(0)
-    final_100["final_score"] = final_100[final].sum(axis=1)/6
+    if len(sittings) == 0:
+        raise ValueError("At least one final grades dataframe should be given.")
+    for sitting in sittings:
+        if not isinstance(sitting, pd.DataFrame) is True:
+            raise ValueError("Every final grades sitting should be a panda dataframe.")
+    if weights is None:
+        columns = sittings[0].columns.append([sitting.columns for sitting in sittings[1:]])
+        weights = exam_weights(columns.unique())
+    # Stack the IDs and question scores of all sittings once
+    ids = np.concatenate([sitting['Student ID'].to_numpy() for sitting in sittings])
+    index = sittings[0].index.append([sitting.index for sitting in sittings[1:]])
+    values = np.concatenate([sitting.reindex(columns=weights.index).to_numpy(dtype=float)
+                             for sitting in sittings])
+    taken = np.repeat(np.arange(len(sittings)), [len(sitting) for sitting in sittings])
+    # Score of each session as a percentage of its (weighted) points
+    points = {col: pts for pairs in exam_questions(weights.index).values() for col, pts in pairs}
+    matrix = weights.to_numpy(dtype=float)
+    missing = np.isnan(values)
+    scores = np.where(missing, 0, values) @ matrix
+    scores = scores / (np.array([points[col] for col in weights.index]) @ matrix) * 100
+    # A session with an unanswered question has no score, as with column sums
+    scores[(missing.astype(float) @ (matrix != 0)) > 0] = np.nan
+    # Group the rows by student: the earliest row of a student is in the
+    # earliest sitting they took, whose rows are all kept
+    codes = pd.factorize(ids)[0]
+    earliest = np.empty(codes.max() + 1 if len(codes) else 0, dtype=np.int64)
+    earliest[codes[::-1]] = np.arange(len(codes))[::-1]
+    rows = np.flatnonzero(taken == taken[earliest][codes])
+    rows = rows[np.argsort(ids[rows], kind='stable')]
+    scores = scores[rows]
+    # The first session has no intermediate grade: an unanswered question counts as 0
+    sessions = [int(col[3:]) for col in weights.columns
+                if col.startswith('FIN') and col[3:].isdigit()]
+    if sessions:
+        first = weights.columns.get_loc('FIN' + str(min(sessions)))
+        scores[:, first] = np.nan_to_num(scores[:, first], nan=0)
+    final_100 = pd.DataFrame(scores, index=index[rows], columns=weights.columns)
+    final_100.insert(0, 'ID', ids[rows])
+    final_100["final_score"] = np.where(np.isnan(scores), 0, scores).sum(axis=1)/scores.shape[1]
     return final_100
 
 
@@ -95,7 +169,8 @@ def rebase_mid(mid_grades):
             continue
         max_score = mid_grades[[col_name]].max()
         mid_100[[col_name]] = round(mid_grades[[col_name]] / max_score * 100, 2)
-    mid_100.columns = ['ID', 'MID2', 'MID3', 'MID4', 'MID5', 'MID6']
+    # 'Session <n>' becomes 'MID<n>', for any number of sessions
+    mid_100.columns = ['ID'] + ['MID' + col.split()[-1] for col in mid_grades.columns[1:]]
     return mid_100
 
 
@@ -123,13 +198,16 @@ def merge_mid_final(mid_100, final_100):
     return grades
 
 
-def standardize_grades(grades):
+def standardize_grades(grades, scaler_path=None):
     """
     Normalize grades
 
     Parameters
     ----------
     grades: A dataframe containning all grades
+    scaler_path: A path of a pickled scaler; when given, the rows update the
+                 running mean and variance of the earlier calls instead of
+                 fitting a new scaler, so only new students need to be passed
 
     Return
     ----------
@@ -139,11 +217,16 @@ def standardize_grades(grades):
     if not isinstance(grades, pd.DataFrame) is True:
         raise ValueError("'grades' should be should be a panda dataframe.")
     # Standzrdize all scores
-    cols = ['MID2', 'MID3', 'MID4', 'MID5', 'MID6', 'FIN2', 'FIN3', 'FIN4', 'FIN5', 'FIN6']
+    # Every session's scores but the first session's final grade
+    cols = [col for col in grades.columns
+            if col.startswith('MID') or (col.startswith('FIN') and col != 'FIN1')]
     id_var = grades['ID']
-    std = StandardScaler()
     features = grades[cols]
-    data_std = std.fit_transform(features)
+    if scaler_path is not None:
+        data_std = partial_standardize(features, cols, scaler_path, ids=id_var)[cols]
+    else:
+        std = StandardScaler()
+        data_std = std.fit_transform(features)
     data_std = pd.DataFrame(data_std,
                             index=features.index,
                             columns=features.columns)
@@ -151,13 +234,37 @@ def standardize_grades(grades):
     return data_std
 
 
-def get_result(grades):
+def review_scores(grades, sessions):
+    """
+    Select the mid and final scores of the sessions the grades have
+
+    Parameters
+    ----------
+    grades: A dataframe containning all standardized grades
+    sessions: Session numbers
+
+    Return
+    ----------
+    The sessions found, and their mid and final scores as two arrays of
+    shape (students, sessions)
+    """
+    found = [i for i in sessions
+             if 'MID' + str(i) in grades.columns and 'FIN' + str(i) in grades.columns]
+    mid = grades[['MID' + str(i) for i in found]].to_numpy(dtype=float)
+    fin = grades[['FIN' + str(i) for i in found]].to_numpy(dtype=float)
+    return found, mid, fin
+
+
+def get_result(grades, thresholds=None):
     """
     Measure the performance measure for each sesssion
 
     Parameters
     ----------
     grades: A dataframe containning all standardized grades
+    thresholds: A table of the ratio of final to mid score under which a
+                session is recommended for review, a dictionary or a pandas
+                series keyed by session number; REVIEW_THRESHOLDS by default
 
     Return
     ----------
@@ -166,25 +273,56 @@ def get_result(grades):
     # Error meassage
     if not isinstance(grades, pd.DataFrame) is True:
         raise ValueError("'grades' should be should be a panda dataframe.")
-    # Student behavior changes
-    for i in range(2, 7):
-        mid_col = 'MID' + str(i)
-        fin_col = 'FIN' + str(i)
-        col_name = 'RES' + str(i)
-        if i == 2:
-            behavior_filter = grades[fin_col] < (grades[mid_col]*1.3)
-        elif i == 3:
-            behavior_filter = grades[fin_col] < (grades[mid_col]*1.2)
-        elif i == 4:
-            behavior_filter = grades[fin_col] < (grades[mid_col]*2)
-        elif i == 5:
-            behavior_filter = grades[fin_col] < (grades[mid_col]*1.8)
-        elif i == 6:
-            behavior_filter = grades[fin_col] < (grades[mid_col]*1.5)
-        grades[col_name] = behavior_filter*1
+    thresholds = pd.Series(REVIEW_THRESHOLDS if thresholds is None else thresholds, dtype=float)
+    # Student behavior changes, for all sessions at once;
+    # sessions the course does not have are skipped
+    sessions, mid, fin = review_scores(grades, thresholds.index)
+    behavior = fin < mid * thresholds[sessions].to_numpy()
+    for j, i in enumerate(sessions):
+        grades['RES' + str(i)] = behavior[:, j]*1
     return grades
 
 
+def threshold_grid(grades, grid):
+    """
+    Label the students under every candidate set of review thresholds at once
+
+    Parameters
+    ----------
+    grades: A dataframe containning all standardized grades
+    grid: The candidate ratios, either a list applied to every session of
+          REVIEW_THRESHOLDS, a dictionary of candidate lists keyed by session
+          number (every combination is a grid point), or a dataframe with one
+          row per grid point and one column per session number
+
+    Return
+    ----------
+    A dictionary with the grid 'points' (a dataframe of ratios, one column per
+    session), the 'labels' as a boolean array of shape (points, students,
+    sessions) and the 'balance', a dataframe of the share of students labelled
+    1 in every 'RES<n>' column for every grid point
+    """
+    # Error meassage
+    if not isinstance(grades, pd.DataFrame) is True:
+        raise ValueError("'grades' should be should be a panda dataframe.")
+    if isinstance(grid, dict):
+        sessions = list(grid)
+        mesh = np.meshgrid(*[np.asarray(grid[i], dtype=float) for i in sessions], indexing='ij')
+        points = pd.DataFrame({i: axis.ravel() for i, axis in zip(sessions, mesh)})
+    elif isinstance(grid, pd.DataFrame):
+        points = grid.astype(float).reset_index(drop=True)
+    else:
+        candidates = np.asarray(grid, dtype=float)
+        points = pd.DataFrame(np.repeat(candidates[:, None], len(REVIEW_THRESHOLDS), axis=1),
+                              columns=list(REVIEW_THRESHOLDS))
+    sessions, mid, fin = review_scores(grades, points.columns)
+    points = points[sessions]
+    # (points, 1, sessions) ratios broadcast over the (students, sessions) scores
+    labels = fin[None, :, :] < mid[None, :, :] * points.to_numpy()[:, None, :]
+    balance = pd.DataFrame(labels.mean(axis=1), columns=['RES' + str(i) for i in sessions])
+    return {'points': points, 'labels': labels, 'balance': balance}
+
+
 def save_grades(grades, outdir='EPM_dataset/Data/complete_grades.csv'):
     """
     Save processed grades to the path
@@ -192,7 +330,8 @@ def save_grades(grades, outdir='EPM_dataset/Data/complete_grades.csv'):
     Parameters
     ----------
     grades: well-done grades dataframe to save
-    outdir: the path to save files in
+    outdir: the path to save files in; a '.parquet' or '.feather' extension saves
+            a compressed file that keeps the dtypes and exact float values
 
     return
     ----------
@@ -202,10 +341,28 @@ def save_grades(grades, outdir='EPM_dataset/Data/complete_grades.csv'):
     if not isinstance(grades, pd.DataFrame) is True:
         raise ValueError("'grades' should be should be a panda dataframe.")
     # Save
-    grades.to_csv(outdir)
+    write_frame(grades, outdir)
     return print("Saved")
 
 
+def load_grades(path='EPM_dataset/Data/complete_grades.parquet'):
+    """
+    Load grades saved by save_grades, in the format given by the extension
+
+    Parameters
+    ----------
+    path: the path the grades were saved to
+
+    return
+    ----------
+    The grades dataframe
+    """
+    # Error meassage
+    if not isinstance(path, str) is True:
+        raise ValueError("'path' should be a string (directory).")
+    return read_frame(path)
+
+
 def main():
     mid,fin1,fin2 = read_grades()
     fin = final_manipulation(fin1,fin2)
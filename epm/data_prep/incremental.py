@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module keeps the formatted log data up to date as new or modified
+Processes files arrive, recomputing only the affected students' rows
+"""
+
+import os
+import pandas as pd
+from .log_prep import (METRICS, list_log_files, read_log, sessions_to_list, sum_activities,
+                       widen_features)
+from .log_cache import file_signature, load_manifest, save_manifest
+
+
+AGGREGATES = 'aggregates.arrow'
+
+
+def order_columns(columns):
+    """
+    Order wide feature columns the way pivot_table does, by metric then activity
+
+    Parameters
+    ----------
+    columns: An iterable of column names such as 'DUR_Deeds'
+
+    Return
+    ----------
+    A list of the column names in pivot_table order
+    """
+    return sorted(columns, key=lambda col: tuple(col.split('_', 1)))
+
+
+def merge_rows(wide, rows, affected, activities):
+    """
+    Replace the rows of the affected students in a session's wide frame
+
+    Parameters
+    ----------
+    wide: The session's previous wide feature frame indexed by ID
+    rows: The recomputed wide feature rows of the affected students
+    affected: The IDs whose rows are replaced (or dropped when missing from rows)
+    activities: The activity groups present in the session after the update
+
+    Return
+    ----------
+    A pandas dataframe indexed by ID, equal to widening the whole session again
+    """
+    merged = pd.concat([wide.drop(index=affected, errors='ignore'), rows])
+    columns = order_columns(metric + '_' + act for metric in METRICS for act in activities)
+    merged = merged.reindex(columns=columns).fillna(0).sort_index()
+    merged.index.name = 'ID'
+    return merged
+
+
+def drop_session_frames(state_dir, sessions):
+    """
+    Delete the stored wide frames of the sessions left without aggregates,
+    so a session folder added back later is widened from scratch
+
+    Parameters
+    ----------
+    state_dir: Local path of the manifest and stored aggregates
+    sessions: The session numbers whose wide frames are kept
+    """
+    keep = {'session_' + str(session_num) + '.arrow' for session_num in sessions}
+    for name in os.listdir(state_dir):
+        if name.startswith('session_') and name.endswith('.arrow') and name not in keep:
+            os.remove(os.path.join(state_dir, name))
+
+
+def update_features(file_dir='../../data/Processes', state_dir='../../data/.incremental'):
+    """
+    Build the formatted log data incrementally. A manifest of processed files
+    and their per-student partial sums is kept in 'state_dir'; only new,
+    modified or removed files are read again and only the rows of the
+    affected (session, student) pairs are recomputed and merged back.
+    An unchanged file that holds rows of an affected pair is read again
+    as well, so a student's rows may be spread over several files.
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+    state_dir: Local path of the manifest and stored aggregates
+
+    Return
+    ----------
+    A list containing pandas dataframes of all sessions' cleaned and formatted data,
+    the same as feature_manipulation(read_file(file_dir)); empty when there
+    is no log file
+    """
+    # Error meassages
+    if not isinstance(file_dir, str) is True:
+        raise ValueError("'file_dir' should be should be a string (directory).")
+    if not isinstance(state_dir, str) is True:
+        raise ValueError("'state_dir' should be should be a string (directory).")
+    os.makedirs(state_dir, exist_ok=True)
+    manifest = load_manifest(state_dir)
+    aggregates_path = os.path.join(state_dir, AGGREGATES)
+    if manifest and os.path.exists(aggregates_path):
+        aggregates = pd.read_feather(aggregates_path)
+    else:
+        manifest = {}
+        aggregates = None
+    # Find new, modified and removed files
+    paths = [os.path.abspath(path) for folder in list_log_files(file_dir) for path in folder]
+    changed = [path for path in paths
+               if path not in manifest or manifest[path][0] != file_signature(path)]
+    removed = set(manifest) - set(paths)
+    stale = [tuple(key) for path in changed + list(removed) if path in manifest
+             for key in manifest[path][1]]
+    for path in removed:
+        del manifest[path]
+    # Aggregate the changed files, and the unchanged files sharing a pair with them
+    logs = []
+    affected = set(stale)
+    read = set()
+    to_read = changed
+    while to_read:
+        for path in to_read:
+            log = read_log(path)
+            keys = log[['session', 'student_id']].drop_duplicates().values.tolist()
+            manifest[path] = [file_signature(path), keys]
+            affected |= {tuple(key) for key in keys}
+            read.add(path)
+            logs.append(log)
+        to_read = [path for path in manifest if path not in read
+                   and any(tuple(key) in affected for key in manifest[path][1])]
+    if aggregates is not None and affected:
+        keys = pd.MultiIndex.from_frame(aggregates[['session', 'ID']])
+        aggregates = aggregates[~keys.isin(list(affected))].reset_index(drop=True)
+    if logs:
+        partial = sum_activities(pd.concat(logs)).reset_index()
+        aggregates = pd.concat(([aggregates] if aggregates is not None else []) + [partial],
+                               ignore_index=True)
+        aggregates = aggregates.sort_values(['session', 'ID', 'ACT'], ignore_index=True)
+    if aggregates is None:
+        # no log file and no stored state
+        drop_session_frames(state_dir, [])
+        save_manifest(manifest, state_dir)
+        return []
+    if affected or not os.path.exists(aggregates_path):
+        aggregates.to_feather(aggregates_path)
+    # Merge the recomputed rows back into each session's stored wide frame
+    sessions = {}
+    for session_num, summed in aggregates.groupby('session'):
+        session_path = os.path.join(state_dir, 'session_' + str(session_num) + '.arrow')
+        if os.path.exists(session_path):
+            wide = pd.read_feather(session_path).set_index('ID')
+            ids = [student for session, student in affected if session == session_num]
+        else:
+            wide = pd.DataFrame(index=pd.Index([], name='ID'))
+            ids = summed['ID'].unique().tolist()
+        if ids:
+            rows = summed[summed['ID'].isin(ids)].drop(columns='session')
+            if len(rows):
+                rows = widen_features(rows.set_index(['ID', 'ACT']))
+            else:
+                rows = pd.DataFrame(index=pd.Index([], name='ID'))
+            wide = merge_rows(wide, rows, ids, summed['ACT'].unique())
+            wide.reset_index().to_feather(session_path)
+        sessions[session_num] = wide
+    drop_session_frames(state_dir, sessions)
+    save_manifest(manifest, state_dir)
+    return sessions_to_list(sessions) if sessions else []
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module caches the parsed log files in a columnar (Arrow IPC) format
+so that repeated runs do not re-parse the Processes text files
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from .log_prep import list_log_files, read_log, order_sessions
+from .time_features import parse_timestamps
+
+
+MANIFEST = 'manifest.json'
+
+
+def file_signature(path):
+    """
+    Describe the state of a file by its size and modification time
+
+    Parameters
+    ----------
+    path: Local path of a file
+
+    Return
+    ----------
+    A list of the file size in bytes and the mtime in nanoseconds
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def parse_log(path):
+    """
+    Read a single student's log file and parse its timestamps
+
+    Parameters
+    ----------
+    path: Local path of one EPM Processes file
+
+    Return
+    ----------
+    A pandas dataframe of the raw log rows with datetime start and end times
+    """
+    log = read_log(path)
+    for col in ['start_time', 'end_time']:
+        log[col] = parse_timestamps(log[col])
+    return log
+
+
+def load_manifest(cache_dir):
+    """
+    Load the manifest describing the cached sessions
+
+    Parameters
+    ----------
+    cache_dir: Local path of the cache
+
+    Return
+    ----------
+    A dictionary keyed by session folder, empty when there is no cache yet
+    """
+    path = os.path.join(cache_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as manifest:
+        return json.load(manifest)
+
+
+def save_manifest(manifest, cache_dir):
+    """
+    Write the manifest atomically next to the cached sessions
+
+    Parameters
+    ----------
+    manifest: A dictionary keyed by session folder
+    cache_dir: Local path of the cache
+    """
+    path = os.path.join(cache_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as tmp:
+        json.dump(manifest, tmp)
+    os.replace(path + '.tmp', path)
+
+
+def read_session_cached(paths, cache_dir, manifest):
+    """
+    Load one session folder from the cache, re-parsing only the files whose
+    size or mtime changed since they were cached
+
+    Parameters
+    ----------
+    paths: A list of log file paths in one session folder
+    cache_dir: Local path of the cache
+    manifest: The manifest dictionary, updated in place
+
+    Return
+    ----------
+    A pandas dataframe of the session's raw data
+    """
+    folder = os.path.abspath(os.path.dirname(paths[0]))
+    entry = manifest.get(folder, {'files': []})
+    cached_files = {path: (signature, offset, rows)
+                    for path, signature, offset, rows in entry['files']}
+    cache_file = cache_path(cache_dir, folder)
+    signatures = [file_signature(path) for path in paths]
+    unchanged = [path in cached_files and cached_files[path][0] == signature
+                 for path, signature in zip(paths, signatures)]
+    cached = None
+    if any(unchanged) and os.path.exists(cache_file):
+        cached = pd.read_feather(cache_file)
+    else:
+        unchanged = [False] * len(paths)
+    if all(unchanged) and [path for path, *_ in entry['files']] == paths:
+        session = cached
+    else:
+        # Reuse the cached rows of unchanged files and parse the rest
+        pieces = []
+        for path, keep in zip(paths, unchanged):
+            if keep:
+                _, offset, rows = cached_files[path]
+                pieces.append(cached.iloc[offset:offset + rows])
+            else:
+                pieces.append(parse_log(path))
+        session = pd.concat(pieces, ignore_index=True)
+        session.to_feather(cache_file)
+        offsets = np.cumsum([0] + [len(piece) for piece in pieces])
+        manifest[folder] = {'files': [[path, signature, int(offset), len(piece)]
+                                      for path, signature, offset, piece
+                                      in zip(paths, signatures, offsets, pieces)]}
+    # Restore the per-file row index that pd.concat gives in read_file
+    rows = [rows for _, _, _, rows in manifest[folder]['files']]
+    session.index = np.concatenate([np.arange(n) for n in rows])
+    return session
+
+
+def cache_path(cache_dir, folder):
+    """
+    Local path of the cached rows of a session folder
+    """
+    return os.path.join(cache_dir, hashlib.sha1(folder.encode()).hexdigest()[:16] + '.arrow')
+
+
+def prune_manifest(manifest, cache_dir, file_dir, folders):
+    """
+    Drop the cached sessions of folders under 'file_dir' that no longer exist
+
+    Parameters
+    ----------
+    manifest: The manifest dictionary, updated in place
+    cache_dir: Local path of the cache
+    file_dir: Local path of EPM Processes files
+    folders: The session folders read this time
+    """
+    root = os.path.join(os.path.abspath(file_dir), '')
+    for folder in [folder for folder in manifest
+                   if folder.startswith(root) and folder not in folders]:
+        del manifest[folder]
+        if os.path.exists(cache_path(cache_dir, folder)):
+            os.remove(cache_path(cache_dir, folder))
+
+
+def read_file_cached(file_dir='../../data/Processes', cache_dir='../../data/.log_cache'):
+    """
+    Read log files from given directory through the columnar cache
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+    cache_dir: Local path of the cache, created when it does not exist
+
+    Return
+    ----------
+    A list containing pandas dataframes of all sessions' raw data,
+    the same as read_file(file_dir) except that 'start_time' and
+    'end_time' are parsed to datetimes
+    """
+    # Error meassages
+    if not isinstance(file_dir, str) is True:
+        raise ValueError("'file_dir' should be should be a string (directory).")
+    if not isinstance(cache_dir, str) is True:
+        raise ValueError("'cache_dir' should be should be a string (directory).")
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = load_manifest(cache_dir)
+    folders = list_log_files(file_dir)
+    sessions = [read_session_cached(paths, cache_dir, manifest) for paths in folders]
+    prune_manifest(manifest, cache_dir, file_dir,
+                   {os.path.abspath(os.path.dirname(paths[0])) for paths in folders})
+    save_manifest(manifest, cache_dir)
+    return order_sessions(sessions)
@@ -8,17 +8,127 @@ This module preprocess the log activity data
 
 # load libraries
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
+try:
+    from .taxonomy import categorize_activity
+    from .time_features import time_on_task
+    from .online_scaler import partial_standardize
+    from .columnar import FORMATS, check_format, read_frame, write_frames
+except ImportError:
+    # imported as a top-level module, e.g. from the modeling notebook
+    from taxonomy import categorize_activity
+    from time_features import time_on_task
+    from online_scaler import partial_standardize
+    from columnar import FORMATS, check_format, read_frame, write_frames
 
 
-def read_file(file_dir='../../data/Processes'):
+LOG_COLUMNS = ["session", "student_id", "exercise",
+               "activity", 'start_time', 'end_time',
+               'idle_time', 'mouse_wheel', 'mouse_wheel_click',
+               'mouse_click_left', 'mouse_click_right', 'mouse_movement',
+               'keystroke']
+FEATURE_COLUMNS = ["ID", "ACT",
+                   'DUR', 'MW', 'MWC', 'MCL',
+                   'MCR', 'MM', 'KS']
+METRICS = ['DUR', 'MW', 'MWC', 'MCR', 'MCL', 'MM', 'KS']
+# The raw log column every metric is summed from
+METRIC_SOURCES = dict(zip(FEATURE_COLUMNS[2:], LOG_COLUMNS[6:]))
+# Compact dtypes of the raw log columns, applied by read_file(compact=True).
+# Durations lose precision above 2**24 ms (about 4.6 hours) in float32.
+LOG_SCHEMA = {'session': 'uint8', 'student_id': 'uint16',
+              'exercise': 'category', 'activity': 'category',
+              'idle_time': 'float32', 'mouse_wheel': 'uint16',
+              'mouse_wheel_click': 'uint16', 'mouse_click_left': 'uint16',
+              'mouse_click_right': 'uint16', 'mouse_movement': 'uint32',
+              'keystroke': 'uint16'}
+FEATURE_DTYPE = 'float32'
+
+
+def list_log_files(file_dir='../../data/Processes'):
+    """
+    List the log files under the given directory, grouped by folder
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+
+    Return
+    ----------
+    A list containing one list of file paths for every session folder
+    """
+    # Error meassage
+    if not isinstance(file_dir, str) is True:
+        raise ValueError("'file_dir' should be should be a string (directory).")
+    folders = []
+    for root, dirs, files in os.walk(file_dir, topdown=False):
+        paths = [os.path.join(root, file) for file in files if file != '.DS_Store']
+        if paths:
+            folders.append(paths)
+    return folders
+
+
+def read_log(path):
+    """
+    Read a single student's log file
+
+    Parameters
+    ----------
+    path: Local path of one EPM Processes file
+
+    Return
+    ----------
+    A pandas dataframe of the raw log rows in the file
+    """
+    return pd.read_csv(path, sep=",", header=None, names=LOG_COLUMNS)
+
+
+def compact_log(log):
+    """
+    Convert raw log columns to the compact LOG_SCHEMA dtypes
+
+    Parameters
+    ----------
+    log: A pandas dataframe of raw log rows with LOG_COLUMNS
+
+    Return
+    ----------
+    A pandas dataframe with categorical labels, small unsigned counters
+    and float32 durations
+    """
+    # Error meassage: astype would silently wrap values that do not fit
+    for col, dtype in LOG_SCHEMA.items():
+        if dtype != 'category' and np.issubdtype(np.dtype(dtype), np.integer):
+            limits = np.iinfo(dtype)
+            if len(log) and (log[col].min() < limits.min or log[col].max() > limits.max):
+                raise ValueError(f"'{col}' has values that do not fit in {dtype}.")
+    return log.astype(LOG_SCHEMA)
+
+
+def is_compact(log):
+    """
+    Check whether a raw log dataframe uses the compact LOG_SCHEMA dtypes
+    """
+    return all(str(log[col].dtype) == dtype for col, dtype in LOG_SCHEMA.items())
+
+
+def read_file(file_dir='../../data/Processes', n_jobs=1, compact=False, store_dir=None):
     """
     Read log files from given directory
 
     Parameters
     ----------
     file_dir: Local path of EPM Processes files
+    n_jobs: Number of worker processes used to parse the files.
+            1 reads the files one by one, -1 uses every available core
+    compact: Whether to parse the columns to the compact LOG_SCHEMA dtypes
+    store_dir: Local path of an event store written by
+               event_store.build_event_store; when given, the events are read
+               from the memory-mapped store instead of the files in file_dir
+               (students in ID order, times parsed to datetimes)
 
     Return
     ----------
@@ -27,103 +137,297 @@ def read_file(file_dir='../../data/Processes'):
     # Error meassage
     if not isinstance(file_dir, str) is True:
         raise ValueError("'file_dir' should be should be a string (directory).")
+    if not isinstance(n_jobs, int) is True or n_jobs == 0 or n_jobs < -1:
+        raise ValueError("'n_jobs' should be a positive integer or -1.")
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if store_dir is not None:
+        # event_store imports this module, so it is imported on use
+        from .event_store import open_event_store, store_to_data_list
+        data_list = store_to_data_list(open_event_store(store_dir)) or sessions_to_list({})
+        if compact:
+            data_list = [compact_log(session) if isinstance(session, pd.DataFrame) else session
+                         for session in data_list]
+        return data_list
     # Read files
+    folders = list_log_files(file_dir)
+    paths = [path for folder in folders for path in folder]
+    if n_jobs == 1 or len(paths) < 2:
+        logs = [read_log(path) for path in paths]
+    else:
+        # Hand the files out in batches so each worker parses several per task
+        chunksize = max(1, len(paths) // (n_jobs * 4))
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            logs = list(executor.map(read_log, paths, chunksize=chunksize))
+    # Concatenate each session's files once
     sessions = []
-    for root, dirs, files in os.walk(file_dir, topdown=False):
-        if files:
-            session = []
-            for file in files:
-                if file != '.DS_Store':
-                    path = os.path.join(root, file)
-                    log = pd.read_csv(path, sep=",", header=None)
-                    session.append(log)
-            if session:
-                session_pd = pd.concat(session)
-                session_pd.columns = ["session", "student_id", "exercise",
-                                      "activity", 'start_time', 'end_time',
-                                      'idle_time', 'mouse_wheel', 'mouse_wheel_click',
-                                      'mouse_click_left', 'mouse_click_right', 'mouse_movement',
-                                      'keystroke']
-                sessions.append(session_pd)
+    start = 0
+    for folder in folders:
+        session_pd = pd.concat(logs[start:start + len(folder)])
+        sessions.append(compact_log(session_pd) if compact else session_pd)
+        start += len(folder)
+    return order_sessions(sessions)
+
+
+def order_sessions(sessions):
+    """
+    Insert the session dataframes to a list ordered by session number
+
+    Parameters
+    ----------
+    sessions: A list containing pandas dataframes of sessions' raw data in any order
+
+    Return
+    ----------
+    A list whose i-th element holds the raw data of Session i
+    """
     # Insert the ordered session data to the data_list array.
-    data_list = [0]*7
-    session_num = 0
-    while sessions:
-        session_num = int(sessions[0]['session'].unique())
-        data_list[session_num] = sessions.pop(0)
-        session_num +=1
+    data_list = sessions_to_list({int(session['session'].iloc[0]): session
+                                  for session in sessions})
     # confirm
     for i, session in enumerate(data_list):
-        if i == 0: continue
+        if i == 0 or not isinstance(session, pd.DataFrame): continue
         session_num = session['session'].unique()[0]
         print(f"{i}th element in the sessions list represents Session{session_num}")  
     return data_list
 
 
-def feature_manipulation(data_list):
+def sessions_to_list(sessions):
+    """
+    Lay out sessions keyed by session number as a data_list, of any length
+
+    Parameters
+    ----------
+    sessions: A dictionary of pandas dataframes keyed by session number,
+              or a data_list which is returned unchanged
+
+    Return
+    ----------
+    A list whose i-th element holds Session i, with 0 for the sessions
+    that are missing (including the 0th element)
+    """
+    if isinstance(sessions, list):
+        return sessions
+    # Error meassage
+    if not isinstance(sessions, dict) is True:
+        raise ValueError("'sessions' should be a dictionary keyed by session number.")
+    data_list = [0]*(max(sessions, default=0) + 1)
+    for session_num, session in sessions.items():
+        data_list[session_num] = session
+    return data_list
+
+
+def normalize_activity(activity, rules=None):
+    """
+    Collapse the detailed activity labels into activity groups
+
+    Parameters
+    ----------
+    activity: A pandas series of raw activity labels
+    rules: A list of (regex pattern, group) pairs, taxonomy.ACTIVITY_RULES by default
+
+    Return
+    ----------
+    A categorical pandas series of activity groups such as 'Deeds' or 'FSM'
+    """
+    return categorize_activity(activity, rules)
+
+
+def widen_features(summed):
+    """
+    Transform summed figures from two dimensions (ID, ACT) to one
+
+    Parameters
+    ----------
+    summed: A pandas dataframe indexed by ID and ACT with one column per metric
+
+    Return
+    ----------
+    A pandas dataframe indexed by ID with one column per metric and activity
+    """
+    wide = summed.pivot_table(index=['ID'],
+                              columns='ACT',
+                              values=METRICS,
+                              observed=True)
+    wide.columns = ['_'.join(col) for col in wide.columns.values]
+    return wide.fillna(0)
+
+
+def build_feature_matrix(session, rules=None):
+    """
+    Build one session's wide feature matrix from raw log rows in a single pass.
+    Every raw row is scatter-added into its (student, metric, activity) cell,
+    without the intermediate groupby and pivot frames.
+
+    Parameters
+    ----------
+    session: A pandas dataframe of one session's raw log rows with LOG_COLUMNS
+    rules: A list of (regex pattern, group) pairs, taxonomy.ACTIVITY_RULES by default
+
+    Return
+    ----------
+    A C-contiguous float64 array with one row per student, the sorted
+    student IDs, and the column names in pivot_table order (metric, activity)
+    """
+    # Error meassage
+    if not isinstance(session, pd.DataFrame) is True:
+        raise ValueError("'session' should be a panda dataframe.")
+    activity = normalize_activity(session['activity'], rules).cat
+    act_codes = activity.codes.to_numpy()
+    id_codes, ids = pd.factorize(session['student_id'], sort=True)
+    # Rows without a student or an activity group are left out, as groupby does
+    keep = (act_codes >= 0) & (id_codes >= 0)
+    n_ids, n_acts = len(ids), len(activity.categories)
+    cells = id_codes[keep] * n_acts + act_codes[keep]
+    # Columns in pivot_table order: metrics sorted by name, then activities
+    metrics = sorted(METRIC_SOURCES.items())
+    matrix = np.empty((n_ids, len(metrics), n_acts))
+    for j, (_, col) in enumerate(metrics):
+        values = np.nan_to_num(session[col].to_numpy(dtype='float64')[keep])
+        matrix[:, j, :] = np.bincount(cells, weights=values,
+                                      minlength=n_ids * n_acts).reshape(n_ids, n_acts)
+    columns = [metric + '_' + act for metric, _ in metrics for act in activity.categories]
+    return matrix.reshape(n_ids, -1), np.asarray(ids, dtype='int64'), columns
+
+
+def feature_manipulation(data_list, rules=None, time_features=False):
     """
     Transform raw log data to cleaned and formatted data
 
     Parameters
     ----------
-    data_list: A list containing pandas dataframes of all sessions' raw data
+    data_list: A list containing pandas dataframes of all sessions' raw data,
+               or a dictionary of them keyed by session number
+    rules: A list of (regex pattern, group) pairs used to group the activities,
+           taxonomy.ACTIVITY_RULES by default
+    time_features: Whether to add the time-on-task columns of
+                   time_features.time_on_task (SPAN, ACTIVE, GAP, ...)
 
     Return
     ----------
     A list containing pandas dataframes of all sessions' cleaned and formatted data
     """
+    data_list = sessions_to_list(data_list)
     # Error meassage
-    if not isinstance(data_list[1], pd.DataFrame) is True:
+    if not any(isinstance(session, pd.DataFrame) for session in data_list[1:]) is True:
         raise ValueError("'data_list' should be a list including panda dataframes.")
-    # Drop irrelevant columns and give simpler column names
+    # Sum figures for each features of each student, one column per metric and activity
     for i, session in enumerate(data_list):
-        if i == 0:
+        # Sessions missing from the course keep their 0 placeholder
+        if i == 0 or not isinstance(session, pd.DataFrame):
             continue
-        data_list[i] = session.drop(columns=['session', 'exercise', 'start_time', 'end_time'])
-        data_list[i].columns = ["ID", "ACT",
-                                'DUR', 'MW', 'MWC', 'MCL',
-                                'MCR', 'MM', 'KS']
-    # Rename the values
-    for i, session in enumerate(data_list):
-        if i == 0:
-            continue
-        session['ACT'] = session['ACT'].replace(regex=['TextEditor\w+', 'Deeds\w+',
-                                                       'Study\w+', '(?i)FSM_\w+'],
-                                                value=['TextEditor', 'Deeds', 'Study', 'FSM'])
-        session['ACT'] = session['ACT'].str.strip()
-    # Sum figures for each features of each student
-    for i, session in enumerate(data_list):
-        if i == 0:
-            continue
-        data_list[i] = session.groupby(['ID', 'ACT']).sum()
-    # Transform variables from two dimensions to one
-    for i, session in enumerate(data_list):
-        if i == 0:
-            continue
-        data_list[i] = session.pivot_table(index=['ID'],
-                                           columns='ACT',
-                                           values=['DUR', 'MW', 'MWC',
-                                                   'MCR', 'MCL', 'MM', 'KS'])
-        data_list[i].columns = ['_'.join(col) for col in data_list[i].columns.values]
-    # Replace nan to 0
-    for i, session in enumerate(data_list):
-        if i == 0:
-            continue
-        data_list[i] = session.fillna(0)
+        matrix, ids, columns = build_feature_matrix(session, rules)
+        features = pd.DataFrame(matrix, index=pd.Index(ids, name='ID'), columns=columns)
+        if time_features:
+            features = features.join(time_on_task(session, rules))
+        # Keep the compact dtypes for sessions read with read_file(compact=True)
+        if is_compact(session):
+            features = features.astype(FEATURE_DTYPE)
+        data_list[i] = features
     return data_list
 
 
-def feature_standardization(data_list):
+def sum_activities(logs, rules=None):
+    """
+    Sum the raw figures of each student for each activity group
+
+    Parameters
+    ----------
+    logs: A pandas dataframe of raw log rows with LOG_COLUMNS
+    rules: A list of (regex pattern, group) pairs, taxonomy.ACTIVITY_RULES by default
+
+    Return
+    ----------
+    A pandas dataframe indexed by session, ID and ACT with one column per metric
+    """
+    logs = logs.drop(columns=['exercise', 'start_time', 'end_time'])
+    logs.columns = ['session'] + FEATURE_COLUMNS
+    logs['ACT'] = normalize_activity(logs['ACT'], rules)
+    return logs.groupby(['session', 'ID', 'ACT'], observed=True).sum()
+
+
+def iter_log_chunks(file_dir='../../data/Processes', chunksize=50000):
+    """
+    Read log files from given directory chunk by chunk
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+    chunksize: The number of raw rows gathered, across files, before a chunk is yielded
+
+    Return
+    ----------
+    A generator of pandas dataframes holding about 'chunksize' raw rows each
+    """
+    # Error meassage
+    if not isinstance(chunksize, int) is True or chunksize < 1:
+        raise ValueError("'chunksize' should be a positive integer.")
+    buffer = []
+    buffered = 0
+    for folder in list_log_files(file_dir):
+        for path in folder:
+            for part in pd.read_csv(path, sep=",", header=None, names=LOG_COLUMNS,
+                                    chunksize=chunksize):
+                buffer.append(part)
+                buffered += len(part)
+                if buffered >= chunksize:
+                    yield pd.concat(buffer, ignore_index=True)
+                    buffer = []
+                    buffered = 0
+    if buffer:
+        yield pd.concat(buffer, ignore_index=True)
+
+
+def stream_features(file_dir='../../data/Processes', chunksize=50000, rules=None):
+    """
+    Build the formatted log data without holding every raw row in memory.
+    Each chunk is folded into running sums per session, ID and ACT, so
+    memory is bounded by the number of students and activities.
+
+    Parameters
+    ----------
+    file_dir: Local path of EPM Processes files
+    chunksize: The maximum number of raw rows read at once
+    rules: A list of (regex pattern, group) pairs, taxonomy.ACTIVITY_RULES by default
+
+    Return
+    ----------
+    A list containing pandas dataframes of all sessions' cleaned and formatted data,
+    the same as feature_manipulation(read_file(file_dir)); empty when there
+    is no log file
+    """
+    # Error meassage
+    if not isinstance(file_dir, str) is True:
+        raise ValueError("'file_dir' should be should be a string (directory).")
+    # Fold every chunk into the running sums
+    totals = None
+    for chunk in iter_log_chunks(file_dir, chunksize):
+        partial = sum_activities(chunk, rules)
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+    if totals is None:
+        return []
+    # Emit the wide frame of every session
+    return sessions_to_list({session_num: widen_features(summed.droplevel('session'))
+                             for session_num, summed in totals.groupby(level='session')})
+
+
+def feature_standardization(data_list, scaler_dir=None):
     """
     Standardize features in log data
 
     Parameters
     ----------
     data_list: A list containing pandas dataframes of all sessions' data
+    scaler_dir: A path to keep one pickled scaler per session in. By default
+                every session is standardized on its own rows; with a
+                scaler_dir, the rows update the running mean and variance of
+                the earlier calls (online_scaler.partial_standardize), so only
+                new students' rows need to be passed
 
     Return
     ----------
-    A list containing pandas dataframes of all sessions' cleaned and formatted data
+    A list containing pandas dataframes of all sessions' cleaned and formatted data,
+    whose i-th element holds Session i+1 (0 for missing sessions)
     """
     # Error meassage
     if not isinstance(data_list, list) is True:
@@ -133,13 +437,109 @@ def feature_standardization(data_list):
     for i, session in enumerate(data_list):
         if i == 0:
             continue
-        numerical = session.select_dtypes(include='float64').columns
-        # This will transform the selected columns and merge to the original data frame
-        session.loc[:, numerical] = StandardScaler().fit_transform(session.loc[:, numerical])
+        if not isinstance(session, pd.DataFrame):
+            # a missing session keeps its place
+            standardized_features.append(session)
+            continue
+        numerical = session.select_dtypes(include='floating').columns
+        if scaler_dir is not None:
+            ids = session['ID'] if 'ID' in session.columns else session.index
+            path = os.path.join(scaler_dir, 'session_' + str(i) + '.pkl')
+            session = partial_standardize(session, list(numerical), path, ids=ids)
+        else:
+            # This will transform the selected columns and merge to the original data frame
+            session.loc[:, numerical] = StandardScaler().fit_transform(session.loc[:, numerical])
         standardized_features.append(session)
     return standardized_features
 
 
+def memory_footprint(data_list):
+    """
+    Measure the memory used by every session's dataframe
+
+    Parameters
+    ----------
+    data_list: A list containing pandas dataframes of all sessions' data
+
+    Return
+    ----------
+    A pandas series of bytes used by each session, with the sum as 'total'
+    """
+    # Error meassage
+    if not isinstance(data_list, list) is True:
+        raise ValueError("'data_list' should be a list including panda dataframes.")
+    usage = {i: int(session.memory_usage(deep=True).sum())
+             for i, session in enumerate(data_list)
+             if i != 0 and isinstance(session, pd.DataFrame)}
+    usage['total'] = sum(usage.values())
+    return pd.Series(usage, name='bytes')
+
+
+def index_grades(grades):
+    """
+    Index the grades table by student ID, sorted, as integers
+
+    Parameters
+    ----------
+    grades: A panda dataframe with all grades, with an 'ID' column or index
+
+    Return
+    ----------
+    A panda dataframe indexed by a sorted int64 'ID' (grades itself when it already is)
+    """
+    # Error meassage
+    if not isinstance(grades, pd.DataFrame) is True:
+        raise ValueError("'grades' should be a panda dataframe.")
+    indexed = grades if grades.index.name == 'ID' else grades.set_index('ID')
+    if indexed.index.dtype != 'int64':
+        indexed = indexed.set_axis(indexed.index.astype('int64'), axis=0)
+    if not indexed.index.is_monotonic_increasing:
+        indexed = indexed.sort_index()
+    return indexed
+
+
+def join_grades(data_list, grades):
+    """
+    Join every session's features with its mid score and outcome by an aligned
+    ID lookup. The grades are indexed once; each session's IDs are located with
+    one get_indexer call and the joined frames share the feature data (a view)
+    when every student has grades.
+
+    Parameters
+    ----------
+    data_list: A list containing pandas dataframes of all sessions' data,
+               the i-th element joined with 'MID<i+1>' and 'RES<i+1>'
+    grades: A panda dataframe with all grades, with an 'ID' column or index
+
+    return
+    ----------
+    A list containing pandas dataframes indexed by ID, with the 'MID<i+1>'
+    and 'Y' columns appended, for the students with grades
+    """
+    # Error meassages
+    if not isinstance(data_list, list) is True:
+        raise ValueError("'data_list' should be a list including panda dataframes.")
+    graded = index_grades(grades)
+    if not graded.index.is_unique:
+        raise ValueError("'grades' should have one row per ID.")
+    for i, features in enumerate(data_list):
+        if i == 0 or not isinstance(features, pd.DataFrame):
+            continue
+        if 'ID' in features.columns:
+            features = features.set_index('ID')
+        mid_col, res_col = 'MID' + str(i+1), 'RES' + str(i+1)
+        position = graded.index.get_indexer(features.index)
+        found = position >= 0
+        if not found.all():
+            features, position = features[found], position[found]
+        # A shallow copy shares the feature blocks; the new columns get their own
+        joined = features.copy(deep=False)
+        joined[mid_col] = graded[mid_col].to_numpy()[position]
+        joined['Y'] = graded[res_col].to_numpy()[position]
+        data_list[i] = joined
+    return data_list
+
+
 def merge_all_data(data_list, grades):
     """
     Merge log data from all sessions and grades
@@ -158,41 +558,86 @@ def merge_all_data(data_list, grades):
         raise ValueError("'data_list' should be a list including panda dataframes.")
     if not isinstance(grades, pd.DataFrame) is True:
         raise ValueError("'grades' should be a panda dataframe.")
-    # Merge all datasets
-    for i, features in enumerate(data_list):
-        if i == 0:
+    # Merge all datasets, keeping 'ID' as the first column
+    for i, joined in enumerate(join_grades(data_list, grades)):
+        if i == 0 or not isinstance(joined, pd.DataFrame):
             continue
-        data_list[i] = features.merge(grades[['ID', 'MID' + str(i+1), 'RES' + str(i+1)]],
-                                      how='inner', on='ID')
-        data_list[i] = data_list[i].rename(columns={'RES' + str(i+1): 'Y'})
+        # Unlike reset_index, inserting the column does not copy the features;
+        # joined is join_grades' own shallow copy, so its index can be replaced
+        ids = joined.index.to_numpy()
+        joined.index = pd.RangeIndex(len(joined))
+        joined.insert(0, 'ID', ids)
+        data_list[i] = joined
     return data_list
 
 
-def save_data(data_list, save_dir='../../data/'):
+def session_file(save_dir, i, file_format='csv'):
+    """
+    Path of the file holding Session i's processed data
     """
-    Save processed data to csv files
+    return os.path.join(save_dir, "variables_session_" + str(i) + "_not_filtered"
+                        + FORMATS[file_format])
+
+
+def save_data(data_list, save_dir='../../data/', file_format='csv', n_jobs=1):
+    """
+    Save processed data to csv, Parquet or Feather files
 
     Parameters
     ----------
     datalist: A list containing pandas dataframes of all sessions' raw data
     save_dir: A path to save files in
+    file_format: 'csv', or 'parquet' / 'feather' for compressed files that keep
+                 the dtypes, the index and exact float values
+    n_jobs: Number of threads writing the sessions, -1 uses every available core
 
     return
     ----------
     Show the result of saving grades, "Saved"
     """
-    # Error meassage
+    # Error meassages
     if not isinstance(data_list, list) is True:
         raise ValueError("'data_list' should be a list including panda dataframes.")
+    check_format(file_format)
+    if not isinstance(n_jobs, int) is True or n_jobs == 0 or n_jobs < -1:
+        raise ValueError("'n_jobs' should be a positive integer or -1.")
     # Save datasets
-    for i, session in enumerate(data_list):
-        if i == 0:
-            continue
-        file_name = "variables_session_" + str(i) + "_not_filtered.csv"
-        session.to_csv(save_dir + file_name)
+    sessions = [i for i, session in enumerate(data_list)
+                if i > 0 and isinstance(session, pd.DataFrame)]
+    write_frames([data_list[i] for i in sessions],
+                 [session_file(save_dir, i, file_format) for i in sessions], n_jobs=n_jobs)
     return print("Saved")
 
 
+def load_data(save_dir='../../data/', file_format='csv', columns=None):
+    """
+    Load the processed data saved by save_data
+
+    Parameters
+    ----------
+    save_dir: The path the files were saved in
+    file_format: The format they were saved in, csv by default as with save_data
+    columns: The columns to read (Parquet and Feather only), all by default
+
+    return
+    ----------
+    A list whose i-th element holds Session i's dataframe, with a 0 placeholder
+    for index 0 and for the sessions without a file
+    """
+    # Error meassages
+    if not isinstance(save_dir, str) is True:
+        raise ValueError("'save_dir' should be a string (directory).")
+    check_format(file_format)
+    sessions = {}
+    pattern = re.compile(r'variables_session_(\d+)_not_filtered' + re.escape(FORMATS[file_format])
+                         + '$')
+    for name in os.listdir(save_dir):
+        match = pattern.match(name)
+        if match:
+            sessions[int(match.group(1))] = read_frame(os.path.join(save_dir, name), columns)
+    return sessions_to_list(sessions)
+
+
 def main():
     A = read_file()
     A = feature_manipulation(A)
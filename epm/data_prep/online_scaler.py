@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module standardizes features incrementally: a StandardScaler keeps
+the running mean and variance of every feature, is updated with
+partial_fit as new students' rows arrive and is pickled between runs
+"""
+
+import os
+import pickle
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+
+def load_scaler(path):
+    """
+    Load a pickled scaler state
+
+    Parameters
+    ----------
+    path: Local path of the pickle
+
+    Return
+    ----------
+    A dictionary with the fitted 'scaler', its 'columns' in order and the
+    'ids' of the rows it has seen, or a fresh state when there is no pickle yet
+    """
+    if not os.path.exists(path):
+        return {'scaler': StandardScaler(), 'columns': [], 'ids': set()}
+    with open(path, 'rb') as state:
+        return pickle.load(state)
+
+
+def save_scaler(state, path):
+    """
+    Pickle a scaler state atomically
+
+    Parameters
+    ----------
+    state: A dictionary returned by load_scaler
+    path: Local path of the pickle
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'wb') as tmp:
+        pickle.dump(state, tmp)
+    os.replace(path + '.tmp', path)
+
+
+def add_columns(state, columns):
+    """
+    Extend a fitted scaler with columns it has not seen. The rows seen so far
+    count as 0 in those columns, as in the formatted data where a student
+    without an activity has 0 for its features.
+
+    Parameters
+    ----------
+    state: A dictionary returned by load_scaler, updated in place
+    columns: The columns of the incoming rows
+    """
+    new = [col for col in columns if col not in state['columns']]
+    if not new:
+        return
+    scaler = state['scaler']
+    if hasattr(scaler, 'n_samples_seen_'):
+        zeros = np.zeros(len(new))
+        scaler.mean_ = np.append(scaler.mean_, zeros)
+        scaler.var_ = np.append(scaler.var_, zeros)
+        # A constant feature keeps a scale of 1, as StandardScaler does
+        scaler.scale_ = np.append(scaler.scale_, zeros + 1)
+        if np.ndim(scaler.n_samples_seen_):
+            scaler.n_samples_seen_ = np.append(scaler.n_samples_seen_,
+                                               np.full(len(new), scaler.n_samples_seen_.max()))
+        scaler.n_features_in_ += len(new)
+    state['columns'] = state['columns'] + new
+
+
+def partial_standardize(frame, columns, path, ids=None):
+    """
+    Update the scaler pickled at 'path' with the rows of 'frame' and
+    standardize them with the updated mean and variance. The cost is
+    proportional to the rows passed, not to the rows seen so far.
+
+    Parameters
+    ----------
+    frame: A pandas dataframe of new (or updated) students' rows
+    columns: The columns to standardize
+    path: Local path of the pickled scaler state, created on the first call
+    ids: The student IDs of the rows; rows of IDs already seen are
+         standardized without being counted again
+
+    Return
+    ----------
+    A copy of 'frame' with the columns standardized
+    """
+    state = load_scaler(path)
+    add_columns(state, columns)
+    # Columns the scaler knows but the batch lacks are 0 for these students
+    values = frame.reindex(columns=state['columns'], fill_value=0).to_numpy(dtype=float)
+    fresh = np.ones(len(frame), dtype=bool)
+    if ids is not None:
+        fresh = np.array([student not in state['ids'] for student in ids], dtype=bool)
+        state['ids'].update(np.asarray(ids)[fresh].tolist())
+    if fresh.any():
+        state['scaler'].partial_fit(values[fresh])
+    save_scaler(state, path)
+    standardized = frame.copy()
+    position = [state['columns'].index(col) for col in columns]
+    standardized.loc[:, columns] = state['scaler'].transform(values)[:, position]
+    return standardized
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module generates synthetic EPM data (Processes log files and grade
+workbooks) at a configurable scale, for load and scale testing.
+The output is deterministic under a seed.
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from .log_prep import LOG_COLUMNS
+from .taxonomy import categorize_activity
+
+
+# Points of the final exam questions per session, as in final_grades.xlsx;
+# sessions after the sixth get EXTRA_QUESTIONS
+EXAM_POINTS = {1: [2, 3], 2: [2, 3], 3: [1, 2, 2, 2, 3], 4: [15, 10],
+               5: [2, 10, 3], 6: [25, 15]}
+EXTRA_QUESTIONS = [5, 5]
+# Maximum intermediate grade per session, as in intermediate_grades.xlsx
+MID_MAX = {2: 6, 3: 4, 4: 5, 5: 4, 6: 4}
+EXAM_SHEETS = ['Exam (First time)', 'Exam (Second time)']
+# Activities not tied to an exercise, and the exercise-specific prefixes,
+# with their relative frequency in the real logs
+GENERAL_ACTIVITIES = {'Other': 33565, 'Blank': 24264, 'Diagram': 20777,
+                      'Properties': 19669, 'Aulaweb': 8247, 'TextEditor': 4804,
+                      'FSM_Related': 3295}
+EXERCISE_ACTIVITIES = {'Deeds': 45000, 'TextEditor': 38000, 'FSM': 17200, 'Study': 12500}
+# Mean count of each counter for one event
+COUNTER_RATES = {'mouse_wheel': 2.7, 'mouse_wheel_click': 0.005, 'mouse_click_left': 7.1,
+                 'mouse_click_right': 0.34, 'keystroke': 6.3}
+
+
+def exam_columns(n_sessions=6):
+    """
+    Name the final exam columns the way final_grades.xlsx does
+
+    Parameters
+    ----------
+    n_sessions: Number of sessions
+
+    Return
+    ----------
+    A list of (column name, session, points) tuples
+    """
+    columns = []
+    for session in range(1, n_sessions + 1):
+        for question, points in enumerate(EXAM_POINTS.get(session, EXTRA_QUESTIONS), 1):
+            # The first session's headers have a space before the line break
+            space = ' ' if session == 1 else ''
+            columns.append(('ES {}.{}{}\n({} points)'.format(session, question, space, points),
+                            session, points))
+    return columns
+
+
+def format_times(seconds, origin):
+    """
+    Format epoch offsets as unpadded 'd.m.yyyy h:m:s' strings, as in the log files
+    """
+    codes, uniques = pd.factorize(seconds)
+    labels = np.array(['{0.day}.{0.month}.{0.year} {0.hour}:{0.minute}:{0.second}'.format(
+        origin + timedelta(seconds=int(value))) for value in uniques], dtype=object)
+    return labels[codes]
+
+
+def session_events(rng, session, students, events_per_file, origin):
+    """
+    Generate the raw log rows of one session
+
+    Parameters
+    ----------
+    rng: A numpy random Generator
+    session: Session number
+    students: Array of the attending student IDs
+    events_per_file: Mean number of events per student
+    origin: Datetime at which the session starts
+
+    Return
+    ----------
+    A pandas dataframe with LOG_COLUMNS (times as formatted strings)
+    """
+    counts = np.maximum(rng.lognormal(np.log(events_per_file), 0.35, len(students)), 1)
+    counts = counts.astype(np.int64)
+    n_rows = int(counts.sum())
+    student_id = np.repeat(students, counts)
+    # Exercises of the session, and each event's activity
+    exercises = ['Es_{}_{}'.format(session, k) for k in range(1, rng.integers(3, 7))]
+    exercise = rng.integers(0, len(exercises), n_rows)
+    general = list(GENERAL_ACTIVITIES)
+    weights = np.array(list(GENERAL_ACTIVITIES.values()) + list(EXERCISE_ACTIVITIES.values()),
+                       dtype=float)
+    kind = rng.choice(len(weights), n_rows, p=weights / weights.sum())
+    prefixes = np.array(general + list(EXERCISE_ACTIVITIES), dtype=object)
+    specific = kind >= len(general)
+    activity = prefixes[kind]
+    exercise_names = np.array(exercises, dtype=object)[exercise]
+    activity[specific] = activity[specific] + '_' + exercise_names[specific]
+    # General activities are mostly logged outside an exercise ('Es')
+    exercise_names[~specific & (rng.random(n_rows) < 0.7)] = 'Es'
+    # Consecutive events of every student from a staggered arrival time
+    duration = rng.geometric(0.08, n_rows) - 1
+    pause = rng.geometric(0.5, n_rows)
+    first = np.cumsum(counts) - counts
+    steps = duration + pause
+    offsets = np.cumsum(steps) - steps
+    offsets -= np.repeat(offsets[first], counts)
+    start = offsets + np.repeat(rng.integers(0, 600, len(students)), counts)
+    end = start + duration
+    rows = {'session': np.full(n_rows, session),
+            'student_id': student_id,
+            'exercise': exercise_names,
+            'activity': activity,
+            'start_time': format_times(start, origin),
+            'end_time': format_times(end, origin),
+            'idle_time': (rng.random(n_rows) * (duration + 1) * 1000).astype(np.int64)}
+    for col in LOG_COLUMNS[7:]:
+        if col == 'mouse_movement':
+            rows[col] = rng.lognormal(5, 1.3, n_rows).astype(np.int64)
+        else:
+            rows[col] = rng.poisson(COUNTER_RATES[col], n_rows)
+    return pd.DataFrame(rows, columns=LOG_COLUMNS)
+
+
+def write_session(log, file_dir):
+    """
+    Write one session's rows as one Processes file per student
+    """
+    os.makedirs(file_dir, exist_ok=True)
+    # Fields are separated by ', ', so read_file keeps a leading space in them
+    lines = log.to_csv(header=False, index=False).replace(',', ', ').split('\n')
+    # Rows are grouped by student, in order of appearance
+    students, first, counts = np.unique(log['student_id'].to_numpy(), return_index=True,
+                                        return_counts=True)
+    for student, begin, count in zip(students, first, counts):
+        with open(os.path.join(file_dir, str(student)), 'w') as log_file:
+            log_file.write('\n'.join(lines[begin:begin + count]) + '\n')
+
+
+def generate_grades(rng, ability, attendance, n_sessions):
+    """
+    Generate the intermediate grades and the two final exam sittings
+
+    Return
+    ----------
+    The intermediate grades dataframe and a list of the two exam dataframes
+    """
+    n_students = len(ability)
+    ids = np.arange(1, n_students + 1)
+    mid = {'Student Id': ids}
+    for session in range(2, n_sessions + 1):
+        top = MID_MAX.get(session, 5)
+        score = top * np.clip(ability + rng.normal(0, 0.15, n_students), 0, 1)
+        # Students absent from a session mostly get no intermediate grade
+        score = np.where(attendance[:, session - 1] | (rng.random(n_students) < 0.2), score, 0)
+        mid['Session ' + str(session)] = np.round(score * 4) / 4
+    mid_grades = pd.DataFrame(mid)
+    first = rng.random(n_students) < 0.45
+    second = np.where(first, rng.random(n_students) < 0.4, rng.random(n_students) < 0.75)
+    exams = []
+    for sitting in [first, second]:
+        exam = {'Student ID': ids[sitting]}
+        total = np.zeros(sitting.sum())
+        for column, session, points in exam_columns(n_sessions):
+            skill = np.clip(ability[sitting] + rng.normal(0, 0.2, sitting.sum()), 0, 1)
+            exam[column] = np.round(points * skill * 2) / 2
+            total += exam[column]
+        exam['TOTAL\n(100 points)'] = total
+        exams.append(pd.DataFrame(exam))
+    return mid_grades, exams
+
+
+def generate_epm_data(out_dir, n_students=115, n_sessions=6, events_per_file=440,
+                      attendance_rate=0.75, seed=0, start=datetime(2014, 10, 2, 11)):
+    """
+    Write a synthetic EPM dataset laid out like the 'data' folder:
+    'Processes/Session <n>/<student>' log files, 'all_log.csv', 'logs.txt',
+    'intermediate_grades.xlsx' and 'final_grades.xlsx'
+
+    Parameters
+    ----------
+    out_dir: Local path to write the dataset in, created when it does not exist
+    n_students: Number of students, with IDs 1 to n_students
+    n_sessions: Number of weekly sessions
+    events_per_file: Mean number of log events per student and session
+    attendance_rate: Probability that a student attends a session
+    seed: Seed of the random generator, the same seed gives the same files
+    start: Datetime of the first session
+
+    Return
+    ----------
+    The number of log events written
+    """
+    # Error meassages
+    if not isinstance(out_dir, str) is True:
+        raise ValueError("'out_dir' should be a string (directory).")
+    for name, value in [('n_students', n_students), ('n_sessions', n_sessions),
+                        ('events_per_file', events_per_file)]:
+        if not isinstance(value, (int, np.integer)) or value < 1:
+            raise ValueError("'{}' should be a positive integer.".format(name))
+    if not 0 < attendance_rate <= 1:
+        raise ValueError("'attendance_rate' should be in (0, 1].")
+    rng = np.random.default_rng(seed)
+    ability = rng.beta(4, 2, n_students)
+    # Every session has at least one student
+    attendance = rng.random((n_students, n_sessions)) < attendance_rate
+    attendance[rng.integers(0, n_students, n_sessions), np.arange(n_sessions)] = True
+    ids = np.arange(1, n_students + 1)
+    logs = []
+    for session in range(1, n_sessions + 1):
+        log = session_events(rng, session, ids[attendance[:, session - 1]], events_per_file,
+                             start + timedelta(days=7 * (session - 1)))
+        write_session(log, os.path.join(out_dir, 'Processes', 'Session ' + str(session)))
+        logs.append(log)
+    all_log = pd.concat(logs, ignore_index=True)
+    all_log['activity'] = categorize_activity(all_log['activity']).astype(str)
+    all_log.to_csv(os.path.join(out_dir, 'all_log.csv'), index=False)
+    presence = pd.DataFrame(attendance.astype(int),
+                            columns=['Session ' + str(i) for i in range(1, n_sessions + 1)])
+    presence.insert(0, 'Student Id', ids)
+    presence.to_csv(os.path.join(out_dir, 'logs.txt'), sep='\t', index=False)
+    mid_grades, exams = generate_grades(rng, ability, attendance, n_sessions)
+    mid_grades.to_excel(os.path.join(out_dir, 'intermediate_grades.xlsx'), index=False)
+    with pd.ExcelWriter(os.path.join(out_dir, 'final_grades.xlsx')) as writer:
+        for sheet, exam in zip(EXAM_SHEETS, exams):
+            exam.to_excel(writer, sheet_name=sheet, index=False)
+    return len(all_log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic EPM dataset.')
+    parser.add_argument('out_dir')
+    parser.add_argument('--students', type=int, default=115)
+    parser.add_argument('--sessions', type=int, default=6)
+    parser.add_argument('--events', type=int, default=440)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    n_events = generate_epm_data(args.out_dir, args.students, args.sessions,
+                                 args.events, seed=args.seed)
+    print('Wrote {} events to {}'.format(n_events, args.out_dir))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module maps raw activity labels to activity groups.
+The rules are applied once per distinct label instead of once per log row.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+
+# (pattern, group) pairs applied in order, as re.sub, to every distinct label
+ACTIVITY_RULES = [(r'TextEditor\w+', 'TextEditor'),
+                  (r'Deeds\w+', 'Deeds'),
+                  (r'Study\w+', 'Study'),
+                  (r'(?i)FSM_\w+', 'FSM')]
+
+
+def normalize_labels(labels, rules=None):
+    """
+    Apply the activity rules to a sequence of distinct labels
+
+    Parameters
+    ----------
+    labels: An iterable of raw activity labels
+    rules: A list of (regex pattern, group) pairs, ACTIVITY_RULES by default
+
+    Return
+    ----------
+    A list of stripped activity groups, None for labels that are not strings
+    """
+    rules = ACTIVITY_RULES if rules is None else rules
+    # Error meassage
+    if not all(isinstance(rule, (tuple, list)) and len(rule) == 2 for rule in rules):
+        raise ValueError("'rules' should be a list of (pattern, group) pairs.")
+    compiled = [(re.compile(pattern), group) for pattern, group in rules]
+    groups = []
+    for label in labels:
+        if not isinstance(label, str):
+            groups.append(None)
+            continue
+        for pattern, group in compiled:
+            label = pattern.sub(group, label)
+        groups.append(label.strip())
+    return groups
+
+
+def categorize_activity(activity, rules=None):
+    """
+    Map raw activity labels to activity groups as a categorical series.
+    The labels are factorized once, the rules run on the distinct labels only
+    and the resulting codes are broadcast back to every row.
+
+    Parameters
+    ----------
+    activity: A pandas series of raw activity labels
+    rules: A list of (regex pattern, group) pairs, ACTIVITY_RULES by default
+
+    Return
+    ----------
+    A categorical pandas series of activity groups with sorted categories
+    """
+    # Error meassage
+    if not isinstance(activity, pd.Series) is True:
+        raise ValueError("'activity' should be a pandas series.")
+    codes, labels = pd.factorize(activity)
+    groups = normalize_labels(labels, rules)
+    categories = sorted({group for group in groups if group is not None})
+    position = {group: i for i, group in enumerate(categories)}
+    lookup = np.array([position.get(group, -1) for group in groups] + [-1], dtype=np.int32)
+    # Missing labels have code -1, which picks the trailing -1 of the lookup
+    categorical = pd.Categorical.from_codes(lookup[codes], categories=categories)
+    return pd.Series(categorical, index=activity.index, name=activity.name)
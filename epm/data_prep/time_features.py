@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module parses the start and end times of the log data and derives
+time-on-task features for each student and activity
+"""
+
+import numpy as np
+import pandas as pd
+try:
+    from .taxonomy import categorize_activity
+except ImportError:
+    # imported as a top-level module, e.g. from the modeling notebook
+    from taxonomy import categorize_activity
+
+
+TIME_METRICS = ['ACTIVE', 'GAP', 'INTERVALS', 'MAXGAP', 'SPAN']
+# Days of every month of a common year, with a 0 for invalid month numbers
+MONTH_DAYS = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def days_from_civil(year, month, day):
+    """
+    Count the days since 1970-01-01 of proleptic Gregorian dates (arrays)
+    """
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_timestamps(values):
+    """
+    Parse 'd.m.yyyy hh:mm:ss' timestamps, as written in the Processes files.
+    The distinct strings are scanned byte by byte with NumPy, so the cost
+    depends on the number of distinct timestamps and not on the row count.
+
+    Parameters
+    ----------
+    values: A pandas series of timestamp strings, with or without padding
+
+    Return
+    ----------
+    A datetime64[ns] pandas series, NaT where a value is missing or malformed
+    """
+    # Error meassage
+    if not isinstance(values, pd.Series) is True:
+        raise ValueError("'values' should be a pandas series.")
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return pd.Series(pd.NaT, index=values.index, name=values.name, dtype='datetime64[ns]')
+    chars = np.array([str(value) for value in uniques], dtype='S')
+    chars = chars.view(np.uint8).reshape(len(uniques), -1)
+    # Accumulate the digits of the six numeric fields column by column
+    rows = np.arange(len(uniques))
+    fields = np.zeros((7, len(uniques)), dtype=np.int64)
+    field = np.full(len(uniques), -1)
+    previous = np.zeros(len(uniques), dtype=bool)
+    for column in chars.T:
+        digit = (column >= 48) & (column <= 57)
+        field += digit & ~previous
+        selected = digit & (field < 7)
+        index = field[selected], rows[selected]
+        fields[index] = fields[index] * 10 + (column[selected] - 48)
+        previous = digit
+    day, month, year, hour, minute, second = fields[:6]
+    seconds = (days_from_civil(year, month, day) * 86400
+               + hour * 3600 + minute * 60 + second)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = MONTH_DAYS[np.clip(month, 0, 12)] + ((month == 2) & leap)
+    valid = ((field == 5) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+             & (hour < 24) & (minute < 60) & (second < 60))
+    parsed = np.where(valid, seconds, np.iinfo(np.int64).min).astype('datetime64[s]')
+    parsed = np.append(parsed, np.datetime64('NaT', 's'))
+    # Missing values have code -1, which picks the trailing NaT
+    return pd.Series(parsed[codes].astype('datetime64[ns]'),
+                     index=values.index, name=values.name)
+
+
+def to_seconds(times):
+    """
+    Convert a series of timestamps (strings or datetimes) to epoch seconds
+    """
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = parse_timestamps(times)
+    return times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+
+def time_on_task(session, rules=None):
+    """
+    Derive time-on-task features for every student and activity group.
+    Events are sorted once by (student, activity, start); overlapping or
+    touching events are merged into intervals with a group-wise running
+    maximum of the end times, all over NumPy arrays.
+
+    Parameters
+    ----------
+    session: A pandas dataframe of one session's raw log rows with LOG_COLUMNS
+    rules: A list of (regex pattern, group) pairs, taxonomy.ACTIVITY_RULES by default
+
+    Return
+    ----------
+    A pandas dataframe indexed by ID with the columns '<metric>_<activity>'
+    in pivot_table order, where the metrics are, in seconds:
+    'SPAN' (first start to last end), 'ACTIVE' (length of the merged intervals),
+    'GAP' (SPAN - ACTIVE), 'MAXGAP' (longest gap between intervals),
+    and 'INTERVALS' counts the merged intervals
+    """
+    # Error meassage
+    if not isinstance(session, pd.DataFrame) is True:
+        raise ValueError("'session' should be a panda dataframe.")
+    activity = categorize_activity(session['activity'], rules).cat
+    act_codes = activity.codes.to_numpy()
+    id_codes, ids = pd.factorize(session['student_id'], sort=True)
+    start = to_seconds(session['start_time'])
+    end = to_seconds(session['end_time'])
+    keep = (act_codes >= 0) & (id_codes >= 0) & (start != np.iinfo(np.int64).min)
+    # An event without a valid end lasts no time
+    end = np.where(end == np.iinfo(np.int64).min, start, end)
+    n_ids, n_acts = len(ids), len(activity.categories)
+    group = (id_codes * n_acts + act_codes)[keep]
+    origin = start[keep].min() if keep.any() else 0
+    start = start[keep] - origin
+    end = np.maximum(end[keep] - origin, start)
+    order = np.lexsort((start, group))
+    group, start, end = group[order], start[order], end[order]
+    # Running maximum of the end times restarted for every group: offsetting
+    # each group above the previous one keeps the maximum from leaking across
+    offset = group * (int(end.max()) + 1 if len(end) else 1)
+    reach = np.maximum.accumulate(end + offset) - offset
+    first = np.ones(len(group), dtype=bool)
+    first[1:] = group[1:] != group[:-1]
+    opens = first.copy()
+    opens[1:] |= start[1:] > reach[:-1]
+    # Each merged interval runs from its opening start to the reach before the next opening
+    closes = np.append(np.flatnonzero(opens)[1:] - 1, len(group) - 1).astype(np.intp)
+    interval_group = group[opens]
+    interval_start, interval_end = start[opens], reach[closes]
+    size = n_ids * n_acts
+    values = {'ACTIVE': np.bincount(interval_group, weights=interval_end - interval_start,
+                                    minlength=size),
+              'INTERVALS': np.bincount(interval_group, minlength=size).astype(np.float64)}
+    span = np.zeros(size)
+    last = np.append(np.flatnonzero(first)[1:] - 1, len(group) - 1).astype(np.intp)
+    span[group[first]] = reach[last] - start[first]
+    values['SPAN'] = span
+    values['GAP'] = span - values['ACTIVE']
+    max_gap = np.zeros(size)
+    following = interval_group[1:] == interval_group[:-1]
+    np.maximum.at(max_gap, interval_group[1:][following],
+                  (interval_start[1:] - interval_end[:-1])[following])
+    values['MAXGAP'] = max_gap
+    matrix = np.stack([values[metric].reshape(n_ids, n_acts) for metric in TIME_METRICS], axis=1)
+    columns = [metric + '_' + act for metric in TIME_METRICS for act in activity.categories]
+    return pd.DataFrame(matrix.reshape(n_ids, -1),
+                        index=pd.Index(np.asarray(ids, dtype='int64'), name='ID'),
+                        columns=columns)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This module parses every grade workbook once: the sheets are cached as
+typed Feather files keyed by the hash of the workbook, and kept in memory
+for the rest of the process
+"""
+
+import collections
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+import pyarrow as pa
+try:
+    from .columnar import read_frame, write_frame
+except ImportError:
+    # imported as a top-level module, e.g. from the modeling notebook
+    from columnar import read_frame, write_frame
+
+
+CACHE_FOLDER = '.workbook_cache'
+# How many workbooks (and workbook hashes) are kept in memory, the oldest is dropped first
+MAX_WORKBOOKS = 16
+# Sheets already loaded in this process, keyed by workbook hash
+_SHEETS = collections.OrderedDict()
+# Workbook hashes, keyed by (path, size, mtime) so unchanged files are not re-hashed
+_HASHES = collections.OrderedDict()
+_LOCK = threading.Lock()
+
+
+def remember(entries, key, value):
+    """
+    Keep a value in one of the in-memory caches, dropping the oldest entries
+    past MAX_WORKBOOKS; the caller holds _LOCK
+    """
+    entries.pop(key, None)
+    entries[key] = value
+    while len(entries) > MAX_WORKBOOKS:
+        entries.popitem(last=False)
+
+
+def file_hash(path):
+    """
+    Hash the content of a file
+
+    Parameters
+    ----------
+    path: Local path of a file
+
+    Return
+    ----------
+    The sha1 hex digest of the file
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _LOCK:
+        if key in _HASHES:
+            return _HASHES[key]
+    digest = hashlib.sha1()
+    with open(path, 'rb') as workbook:
+        for block in iter(lambda: workbook.read(1 << 20), b''):
+            digest.update(block)
+    with _LOCK:
+        remember(_HASHES, key, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def load_sheets(path, cache_dir):
+    """
+    Load every sheet of a workbook from the on-disk cache, or parse the
+    workbook and cache its sheets
+
+    Parameters
+    ----------
+    path: Local path of the workbook
+    cache_dir: Local path of the cache, next to the workbook by default; when it
+               cannot be written the sheets are only kept in memory
+
+    Return
+    ----------
+    A dictionary of pandas dataframes keyed by sheet name, in sheet order
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_FOLDER)
+    key = file_hash(path)
+    manifest = os.path.join(cache_dir, key + '.json')
+    if os.path.exists(manifest):
+        with open(manifest) as names:
+            sheet_names = json.load(names)
+        return {name: read_frame(os.path.join(cache_dir, '{}_{}.feather'.format(key, i)))
+                for i, name in enumerate(sheet_names)}
+    sheets = pd.read_excel(path, sheet_name=None, engine='openpyxl')
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for i, sheet in enumerate(sheets.values()):
+            write_frame(sheet, os.path.join(cache_dir, '{}_{}.feather'.format(key, i)))
+        # The manifest is written last, so a partly written entry is never read
+        with open(manifest + '.tmp', 'w') as names:
+            json.dump(list(sheets), names)
+        os.replace(manifest + '.tmp', manifest)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OSError):
+        # A column mixing types has no Arrow type, and a read-only folder
+        # (e.g. a mounted volume) takes no cache; the sheets stay in memory only
+        pass
+    return sheets
+
+
+def read_workbook(path, sheet_name=0, cache_dir=None):
+    """
+    Read a workbook like pd.read_excel, parsing it only the first time it is
+    read with this content
+
+    Parameters
+    ----------
+    path: Local path of the workbook
+    sheet_name: Position or name of the sheet, or None for every sheet
+    cache_dir: Local path of the cache, a '.workbook_cache' folder next to
+               the workbook by default
+
+    Return
+    ----------
+    A pandas dataframe of the sheet, or a dictionary of them keyed by sheet
+    name when sheet_name is None; callers get copies they may modify
+    """
+    # Error meassage
+    if not isinstance(path, str) is True:
+        raise ValueError("'path' should be a string (directory).")
+    key = file_hash(path)
+    with _LOCK:
+        sheets = _SHEETS.get(key)
+        if sheets is not None:
+            _SHEETS.move_to_end(key)
+    if sheets is None:
+        # Parsed outside the lock, so other workbooks are not held up
+        sheets = load_sheets(path, cache_dir)
+        with _LOCK:
+            remember(_SHEETS, key, sheets)
+    if sheet_name is None:
+        return {name: sheet.copy() for name, sheet in sheets.items()}
+    if isinstance(sheet_name, int):
+        return list(sheets.values())[sheet_name].copy()
+    return sheets[sheet_name].copy()
+
+
+def clear_cache():
+    """
+    Forget the workbooks loaded in this process (the on-disk cache is kept)
+    """
+    with _LOCK:
+        _SHEETS.clear()
+        _HASHES.clear()
@@ -0,0 +1,249 @@
+"""
+This module keeps the graph_data aggregates in memory across Streamlit
+reruns and user sessions of one process. An entry is dropped when a file
+it was computed from changes (size or mtime, then content hash).
+Serialized chart specs are kept the same way, in least recently used
+caches bounded by their size in bytes.
+"""
+import collections
+import copy
+import functools
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+
+# Cached results keyed by (module-qualified function name, arguments)
+_ENTRIES = {}
+# Hits and misses of every cached function
+_STATS = {}
+# Serialized chart specs of every cached_spec function, by function name
+_SPECS = {}
+_LOCK = threading.Lock()
+# Default byte budget of the specs of one function
+SPEC_BYTES = 16 << 20
+
+
+def file_hash(path):
+    """
+    Hash the content of a file with sha1
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_state(path):
+    """
+    Describe a file by its size and modification time, None when it is missing
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def argument_key(value):
+    """
+    Make a hashable key of a function argument; dataframes are keyed by content
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hashed = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        columns = tuple(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        return ('frame', columns, hashlib.sha1(hashed.tobytes()).hexdigest())
+    return value
+
+
+def copy_result(value):
+    """
+    Copy the dataframes, containers and writable arrays of a cached result,
+    so callers may modify them; read-only arrays are shared
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(copy_result(item) for item in value)
+    if isinstance(value, np.ndarray) and value.flags.writeable:
+        return value.copy()
+    if isinstance(value, np.random.Generator):
+        return copy.deepcopy(value)
+    return value
+
+
+def is_fresh(sources):
+    """
+    Check that the files of an entry did not change since it was computed
+
+    Parameters
+    ----------
+    sources: A dictionary keyed by path of [state, hash] lists, updated in place
+             when a file was touched without changing its content
+
+    Return
+    ----------
+    True when every file has the content it had
+    """
+    for path, source in sources.items():
+        state = file_state(path)
+        if state is None:
+            return False
+        if state == source[0]:
+            continue
+        if file_hash(path) != source[1]:
+            return False
+        source[0] = state
+    return True
+
+
+def cached(*paths, maxsize=32):
+    """
+    Cache a function's results in memory until one of 'paths' changes
+
+    Parameters
+    ----------
+    paths: The files the function reads, relative to the working directory
+    maxsize: How many results of the function are kept, the oldest is dropped first
+
+    Return
+    ----------
+    A decorator; the decorated function returns copies of the cached results
+    """
+    def decorator(function):
+        # qualified by module, so same-named functions of two modules are kept apart
+        name = function.__module__ + '.' + function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            full_paths = [os.path.abspath(path) for path in paths]
+            key = (name, tuple(full_paths), tuple(argument_key(arg) for arg in args),
+                   tuple(sorted((kw, argument_key(arg)) for kw, arg in kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                # Arguments that cannot be keyed (e.g. a list) are not cached
+                return function(*args, **kwargs)
+            with _LOCK:
+                stats = _STATS.setdefault(name, {'hits': 0, 'misses': 0})
+                entry = _ENTRIES.get(key)
+                if entry is not None and is_fresh(entry['sources']):
+                    stats['hits'] += 1
+                    return copy_result(entry['value'])
+                stats['misses'] += 1
+            # Sources are described before the call, so a change during it is seen next time
+            sources = {path: [file_state(path), file_hash(path)]
+                       for path in full_paths if file_state(path) is not None}
+            value = function(*args, **kwargs)
+            with _LOCK:
+                _ENTRIES.pop(key, None)
+                _ENTRIES[key] = {'sources': sources, 'value': value}
+                own = [other for other in _ENTRIES if other[0] == name]
+                for other in own[:max(0, len(own) - maxsize)]:
+                    del _ENTRIES[other]
+            return copy_result(value)
+        return wrapper
+    return decorator
+
+
+def spec_key(value):
+    """
+    Make a hashable key of a chart parameter; lists (e.g. of activities) become tuples
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(spec_key(item) for item in value)
+    return value
+
+
+def cached_spec(*paths, max_bytes=SPEC_BYTES):
+    """
+    Cache the chart a function builds as its serialized Vega-Lite spec,
+    keyed by the function's parameters, until one of 'paths' changes
+
+    Parameters
+    ----------
+    paths: The files the chart is computed from, relative to the working directory
+    max_bytes: Size of the function's specs past which the least recently
+               used are dropped
+
+    Return
+    ----------
+    A decorator; the decorated function returns the chart's spec as a new
+    dictionary, which st.vega_lite_chart draws. It also takes validate=False
+    to skip the Vega-Lite schema check of a new spec, e.g. in batch jobs
+    """
+    def decorator(function):
+        # qualified by module, so same-named functions of two modules are kept apart
+        name = function.__module__ + '.' + function.__qualname__
+        specs = _SPECS.setdefault(name, {'entries': collections.OrderedDict(), 'bytes': 0})
+
+        @functools.wraps(function)
+        def wrapper(*args, validate=True, **kwargs):
+            full_paths = [os.path.abspath(path) for path in paths]
+            # an unchecked spec is kept apart, so validating callers never get one
+            key = (tuple(full_paths), spec_key(args),
+                   tuple(sorted((kw, spec_key(arg)) for kw, arg in kwargs.items())), validate)
+            with _LOCK:
+                stats = _STATS.setdefault(name, {'hits': 0, 'misses': 0})
+                entry = specs['entries'].get(key)
+                if entry is not None and is_fresh(entry['sources']):
+                    stats['hits'] += 1
+                    specs['entries'].move_to_end(key)
+                    return json.loads(entry['spec'])
+                stats['misses'] += 1
+            sources = {path: [file_state(path), file_hash(path)]
+                       for path in full_paths if file_state(path) is not None}
+            spec = function(*args, **kwargs).to_json(indent=None, validate=validate)
+            with _LOCK:
+                old = specs['entries'].pop(key, None)
+                if old is not None:
+                    specs['bytes'] -= len(old['spec'])
+                if len(spec) <= max_bytes:
+                    specs['entries'][key] = {'sources': sources, 'spec': spec}
+                    specs['bytes'] += len(spec)
+                while specs['bytes'] > max_bytes:
+                    _, dropped = specs['entries'].popitem(last=False)
+                    specs['bytes'] -= len(dropped['spec'])
+            return json.loads(spec)
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """
+    Report the hits and misses of every cached function
+
+    Return
+    -------
+    A dataframe indexed by function with 'hits', 'misses', 'hit_rate',
+    the number of cached 'entries' and the 'bytes' of cached chart specs
+    """
+    with _LOCK:
+        rows = {}
+        for name, stats in _STATS.items():
+            specs = _SPECS.get(name, {'entries': {}, 'bytes': 0})
+            entries = sum(key[0] == name for key in _ENTRIES) + len(specs['entries'])
+            rows[name] = dict(stats, entries=entries, bytes=specs['bytes'])
+    stats = pd.DataFrame.from_dict(rows, orient='index',
+                                   columns=['hits', 'misses', 'entries', 'bytes'])
+    calls = stats['hits'] + stats['misses']
+    stats['hit_rate'] = (stats['hits'] / calls.where(calls > 0)).fillna(0)
+    return stats
+
+
+def clear_cache():
+    """
+    Drop every cached result and reset the statistics
+    """
+    with _LOCK:
+        _ENTRIES.clear()
+        _STATS.clear()
+        for specs in _SPECS.values():
+            specs['entries'].clear()
+            specs['bytes'] = 0
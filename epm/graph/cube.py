@@ -0,0 +1,232 @@
+"""
+This module materializes the session_agg result as a dense
+(session, student, activity, metric) cube with a count mask, so that a
+student's log or the class average is a slice rather than a scan of the
+whole log table. The cube is rebuilt offline (python -m epm.graph.cube)
+and memory-mapped at startup.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+from .cache import cached, file_state
+from .graph_data import session_agg
+
+
+METRICS = ['idle_time', 'mouse_wheel', 'mouse_wheel_click', 'mouse_click_left',
+           'mouse_click_right', 'mouse_movement', 'keystroke']
+AXES = ['session', 'student', 'activity', 'metric']
+CUBE_DIR = 'data/.cube'
+SOURCE = 'data/all_log.csv'
+ARRAYS = ['values', 'count', 'class_sum', 'class_count']
+
+
+def build_cube(log_session):
+    """
+    This function lays out the session_agg result as a dense cube.
+
+    Parameter
+    ---------
+    log_session: DataFrame
+        Dataframe generated by session_agg function
+
+    Return
+    ------
+    A dictionary with the 'values' array of shape (sessions, students,
+    activities, metrics), the 'count' mask (1 where the student logged the
+    activity in the session), the class roll-ups 'class_sum' and
+    'class_count', and the labels of every axis ('sessions', 'students',
+    'activities', 'metrics') with the metrics' 'dtypes'
+
+    """
+    if not isinstance(log_session, pd.DataFrame):
+        raise ValueError("input is not a dataframe")
+    else:
+        pass
+    metrics = [col for col in METRICS if col in log_session.columns]
+    codes = []
+    labels = []
+    for col in ['session', 'student_id', 'activity']:
+        code, uniques = pd.factorize(log_session[col], sort=True)
+        codes.append(code)
+        labels.append(uniques)
+    shape = tuple(len(uniques) for uniques in labels)
+    values = np.zeros(shape + (len(metrics),))
+    values[tuple(codes)] = log_session[metrics].to_numpy(dtype=float)
+    count = np.zeros(shape, dtype=np.uint8)
+    count[tuple(codes)] = 1
+    return {'values': values, 'count': count,
+            'class_sum': values.sum(axis=1), 'class_count': count.sum(axis=1, dtype=np.int64),
+            'sessions': labels[0].tolist(), 'students': labels[1].tolist(),
+            'activities': labels[2].tolist(), 'metrics': metrics,
+            'dtypes': [str(log_session[col].dtype) for col in metrics]}
+
+
+def save_cube(cube, cube_dir=CUBE_DIR, source=SOURCE):
+    """
+    This function saves a cube as .npy arrays and a json file of labels,
+    with the state of the log file it was built from.
+    """
+    os.makedirs(cube_dir, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(cube_dir, name + '.npy'), cube[name])
+    meta = {key: value for key, value in cube.items() if key not in ARRAYS}
+    meta['source'] = file_state(source)
+    # The labels are written last, so a partly written cube is never loaded
+    with open(os.path.join(cube_dir, 'meta.json.tmp'), 'w') as meta_file:
+        json.dump(meta, meta_file)
+    os.replace(os.path.join(cube_dir, 'meta.json.tmp'), os.path.join(cube_dir, 'meta.json'))
+
+
+def rebuild_cube(cube_dir=CUBE_DIR):
+    """
+    This function rebuilds the cube from 'data/all_log.csv' and saves it.
+    """
+    cube = build_cube(session_agg())
+    save_cube(cube, cube_dir)
+    return cube
+
+
+def read_cube(cube_dir=CUBE_DIR):
+    """
+    This function memory-maps the saved cube, read-only.
+
+    Return
+    ------
+    A dictionary like build_cube returns, None when the cube is missing
+    or 'data/all_log.csv' changed since it was built
+
+    """
+    meta_path = os.path.join(cube_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as meta_file:
+        meta = json.load(meta_file)
+    source = meta.pop('source')
+    if source is None or tuple(source) != file_state(SOURCE):
+        return None
+    for name in ARRAYS:
+        meta[name] = np.load(os.path.join(cube_dir, name + '.npy'), mmap_mode='r')
+    return meta
+
+
+@cached(SOURCE)
+def load_cube(cube_dir=CUBE_DIR):
+    """
+    This function memory-maps the saved cube, rebuilding it first when it
+    is missing or 'data/all_log.csv' changed since it was built. It is
+    cached, so every rerun and user session of the app shares one cube.
+
+    Return
+    ------
+    A dictionary like build_cube returns, with read-only arrays
+
+    """
+    cube = read_cube(cube_dir)
+    if cube is None:
+        built = rebuild_cube(cube_dir)
+        # Map the saved arrays, so cache hits share them instead of copying them
+        cube = read_cube(cube_dir)
+        if cube is None:
+            # the log changed during the build; the built cube is served read-only
+            for name in ARRAYS:
+                built[name].flags.writeable = False
+            cube = built
+    return cube
+
+
+def rollup(cube, axes, how='mean'):
+    """
+    This function aggregates the cube along some of its axes.
+
+    Parameter
+    ---------
+    cube: a dictionary returned by build_cube or load_cube
+    axes: the axes to aggregate, among 'session', 'student' and 'activity'
+    how: 'sum', or 'mean' over the cells with a log
+
+    Return
+    ------
+    An array with the remaining axes (the metric axis is kept last);
+    means over no cell are NaN
+
+    """
+    if isinstance(axes, str):
+        axes = [axes]
+    if not set(axes) <= set(AXES[:3]):
+        raise ValueError("axes should be among 'session', 'student' and 'activity'")
+    else:
+        pass
+    if how not in ['sum', 'mean']:
+        raise ValueError("how should be either 'sum' or 'mean'")
+    else:
+        pass
+    # The class roll-up is precomputed
+    if list(axes) == ['student']:
+        total, count = cube['class_sum'], cube['class_count']
+    else:
+        position = tuple(AXES.index(axis) for axis in axes)
+        total = np.asarray(cube['values']).sum(axis=position)
+        count = np.asarray(cube['count']).sum(axis=position, dtype=np.int64)
+    if how == 'sum':
+        return total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / np.where(count > 0, count, np.nan)[..., None]
+
+
+def student_log(cube, student):
+    """
+    This function slices one student's aggregated log out of the cube.
+
+    Parameter
+    ---------
+    cube: a dictionary returned by build_cube or load_cube
+    student: the student id
+
+    Return
+    ------
+    A dataframe with the same structure as session_agg returns,
+    holding the rows of the student (none when the student has no log)
+
+    """
+    position = int(np.searchsorted(cube['students'], student))
+    if position < len(cube['students']) and cube['students'][position] == student:
+        session, activity = np.nonzero(cube['count'][:, position])
+    else:
+        # A student without any log gets no rows, as with a filter of session_agg
+        session = activity = np.array([], dtype=np.int64)
+        position = 0
+    data = {'session': np.asarray(cube['sessions'])[session],
+            'student_id': student,
+            'activity': np.asarray(cube['activities'], dtype=object)[activity]}
+    values = cube['values'][session, position, activity]
+    for j, (col, dtype) in enumerate(zip(cube['metrics'], cube['dtypes'])):
+        data[col] = values[:, j].astype(dtype)
+    return pd.DataFrame(data)
+
+
+def class_average(cube):
+    """
+    This function reads the class average out of the cube.
+
+    Parameter
+    ---------
+    cube: a dictionary returned by build_cube or load_cube
+
+    Return
+    ------
+    A dataframe with the same structure as session_avg returns
+
+    """
+    session, activity = np.nonzero(np.asarray(cube['class_count']))
+    data = {'session': np.asarray(cube['sessions'])[session],
+            'activity': np.asarray(cube['activities'], dtype=object)[activity]}
+    means = rollup(cube, 'student')[session, activity]
+    for j, col in enumerate(cube['metrics']):
+        data[col] = means[:, j]
+    return pd.DataFrame(data)
+
+
+if __name__ == '__main__':
+    rebuild_cube()
+    print('Saved the cube in ' + CUBE_DIR)
@@ -1,9 +1,15 @@
 """
 This module prepares epm datasets in 'data' folder for plotting.
+The results are kept in memory (cache.py) until the data files change.
 """
+import warnings
+import numpy as np
 import pandas as pd
+from ..data_prep.workbook_cache import read_workbook
+from .cache import cached
 
 
+@cached('data/all_log.csv')
 def session_agg():
     """
     This function automatically reads csv file contains
@@ -13,9 +19,9 @@ def session_agg():
 
     Return
     -------
-    A dataframe with 4169 rows and 10 columns
+    A dataframe with 10 columns (4169 rows for the original course)
     showing aggregated log activities for each activity type
-    for each student in six sessions
+    for each student in every session
 
     """
     log_raw = pd.read_csv('data/all_log.csv')
@@ -29,6 +35,7 @@ def session_agg():
     return log_session
 
 
+@cached()
 def session_avg(log_session):
     """
     This function read calculates the mean of
@@ -41,7 +48,8 @@ def session_avg(log_session):
 
     Return
     ------
-    A dataframe with 54 rows and 9 columns
+    A dataframe with 9 columns and one row per session and activity
+    (54 rows for the original course)
 
     """
     if not isinstance(log_session, pd.DataFrame):
@@ -58,6 +66,57 @@ def session_avg(log_session):
     return class_average
 
 
+# Statistics of every session in grade_tables, with the quantiles they are computed at
+GRADE_STATS = ['mean', 'q20', 'q25', 'median', 'q75', 'q80']
+GRADE_QUANTILES = [0.20, 0.25, 0.50, 0.75, 0.80]
+
+
+def column_stats(values):
+    """
+    This function computes the GRADE_STATS of every column
+    of a 2-D array in one pass, ignoring missing values.
+
+    Return
+    ---------
+    An array with one row per statistic and one column per column of values
+
+    """
+    with warnings.catch_warnings():
+        # A column without any value gets NaN statistics
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.vstack([np.nanmean(values, axis=0),
+                          np.nanquantile(values, GRADE_QUANTILES, axis=0)])
+
+
+@cached('data/intermediate_grades.xlsx')
+def grade_tables():
+    """
+    This function reads the intermediate grades in the "data" folder once
+    and precomputes what the grade charts need.
+
+    Return
+    ---------
+    A dictionary with the grade 'columns' ('Session 2', ...), the
+    student 'ids', the 'grades' array (one row per student, one column per
+    session), a 'lookup' array giving the row of a student id (-1 for
+    unknown ids), the 'summary' dataframe of GRADE_STATS by session column
+    and the 'id_stats' of the student ids (as describe reports them)
+
+    """
+    data = read_workbook('data/intermediate_grades.xlsx')
+    columns = list(data.columns.drop('Student Id'))
+    ids = data['Student Id'].to_numpy()
+    grades = data[columns].to_numpy(dtype=float)
+    lookup = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int64)
+    lookup[ids.astype(np.int64)] = np.arange(len(ids))
+    summary = pd.DataFrame(column_stats(grades).T, index=columns, columns=GRADE_STATS)
+    id_stats = pd.Series(column_stats(ids.astype(float)[:, None])[:, 0], index=GRADE_STATS)
+    for array in [ids, grades, lookup]:
+        array.flags.writeable = False
+    return {'columns': columns, 'ids': ids, 'grades': grades, 'lookup': lookup,
+            'summary': summary, 'id_stats': id_stats}
+
+
 def mid_avg():
     """
     This function automatically reads in the intermediate grades data in
@@ -74,50 +133,43 @@ def mid_avg():
     which is used to plot the shaded part.
 
     """
-    mid_grades = pd.read_excel('data/intermediate_grades.xlsx',
-                               engine='openpyxl')
-    # calculate the mean
-    mid_avg = pd.DataFrame(mid_grades.mean(axis=0))
-    mid_avg = mid_avg.drop(['Student Id'])
-    mid_avg.reset_index(inplace=True)
-    mid_avg.columns = ['Session', 'Avg_grades']
-    mid_avg.insert(0, "Student Id", 'Average')
-
-    # calculate the Q1
-    mid_avg_q1 = pd.DataFrame(mid_grades.quantile(q=0.20, axis=0))
-    mid_avg_q1 = mid_avg_q1.drop(['Student Id'])
-    mid_avg_q1.reset_index(inplace=True)
-    mid_avg_q1.columns = ['Session', 'Avg_grades']
-    mid_avg_q1.insert(0, "Student Id", 'Q1')
-
-    # calculate the Q3
-    mid_avg_q3 = pd.DataFrame(mid_grades.quantile(q=0.80, axis=0))
-    mid_avg_q3 = mid_avg_q3.drop(['Student Id'])
-    mid_avg_q3.reset_index(inplace=True)
-    mid_avg_q3.columns = ['Session', 'Avg_grades']
-    mid_avg_q3.insert(0, "Student Id", 'Q3')
-
-    # transform the data into another dataframe
-    mid_std = pd.melt(mid_grades, id_vars='Student Id',
-                      value_vars=['Session 2', 'Session 3', 'Session 4',
-                                  'Session 5', 'Session 6'])
-    mid_std.columns = ['Student Id', 'Session', 'Avg_grades']
-
-    # mid_all = pd.concat([mid_avg, mid_avg_q1,
-    # mid_avg_q3, mid_std])
+    tables = grade_tables()
+    columns, summary = tables['columns'], tables['summary']
+    n_students, n_sessions = tables['grades'].shape
+    # the average, then every student's grades session by session (as melt
+    # lays them out), with the long tail after the dot cut
+    mid_avg = pd.DataFrame({'Student Id': 'Average', 'Session': columns,
+                            'Avg_grades': summary['mean'].to_numpy().round(2)})
+    mid_std = pd.DataFrame({'Student Id': np.tile(tables['ids'], n_sessions),
+                            'Session': np.repeat(columns, n_students),
+                            'Avg_grades': tables['grades'].T.ravel().round(2)})
+    mid_std['Student Id'] = mid_std['Student Id'].astype(str)
     mid_all = pd.concat([mid_avg, mid_std])
-    mid_all['Student Id'] = mid_all['Student Id'].astype(str)
-    # cut the long tail after the dot
-    mid_all['Avg_grades'] = mid_all.apply(lambda x: round(x["Avg_grades"],
-                                                          2), axis=1)
 
-    mid_area = pd.concat([mid_avg_q1, mid_avg_q3])
-    mid_area['Avg_grades'] = mid_area.apply(lambda x: round(x["Avg_grades"],
-                                                            2), axis=1)
+    # the 20% (Q1) and 80% (Q3) quantiles
+    mid_area = pd.concat([pd.DataFrame({'Student Id': label, 'Session': columns,
+                                        'Avg_grades': summary[stat].to_numpy().round(2)})
+                          for label, stat in [('Q1', 'q20'), ('Q3', 'q80')]])
 
     return mid_all, mid_area
 
 
+@cached('data/intermediate_grades.xlsx')
+def mid_sessions():
+    """
+    This function lists the sessions that have intermediate
+    grades in the "data" folder.
+
+    Return
+    ---------
+    a list of session numbers, e.g. [2, 3, 4, 5, 6]
+
+    """
+    data = read_workbook('data/intermediate_grades.xlsx')
+    return [int(col.split()[-1]) for col in data.columns if col.startswith('Session ')]
+
+
+@cached('data/intermediate_grades.xlsx')
 def mid_hist(session):
     """
     This function grab and construct a dataframe only
@@ -139,11 +191,11 @@ def mid_hist(session):
         raise ValueError("The input data is not of type int")
     else:
         pass
-    if session not in list((2, 3, 4, 5, 6)):
+    data = read_workbook('data/intermediate_grades.xlsx')
+    if 'Session '+str(session) not in data.columns:
         raise ValueError("The input number cannot refer to a session")
     else:
         pass
-    data = pd.read_excel('data/intermediate_grades.xlsx', engine='openpyxl')
 
     data_for_hist = data[['Student Id', 'Session '+str(session)]]
     data_for_hist.columns = ['Student_Id', 'Session_']
@@ -151,7 +203,7 @@ def mid_hist(session):
     return data_for_hist
 
 
-def mid_summary(student, data_for_hist):
+def mid_summary(student, data_for_hist, session=None):
     """
     This function calculates out several statistics
     (including mean and quartiles) and return them in
@@ -163,6 +215,9 @@ def mid_summary(student, data_for_hist):
     student: the only one selected student from the whole class.
     data_for_hist: the output of the former function mid_hist, a dataframe
                    of the grades in the selected session.
+    session: the selected session; when given, the statistics and the
+             student's grade are sliced out of grade_tables instead of
+             being computed from data_for_hist.
 
     Return
     ---------
@@ -187,39 +242,128 @@ def mid_summary(student, data_for_hist):
         raise ValueError("Column number is not right")
     else:
         pass
-    if student not in data_for_hist['Student_Id']:
-        raise ValueError("Cannot find the input student id")
+    stats = ['mean', 'q25', 'median', 'q75']
+    if session is not None:
+        tables = grade_tables()
+        column = 'Session ' + str(session)
+        row = tables['lookup'][student] if 0 <= student < len(tables['lookup']) else -1
+        if row < 0:
+            raise ValueError("Cannot find the input student id")
+        else:
+            pass
+        grade_stats = tables['summary'].loc[column, stats].to_numpy()
+        id_stats = tables['id_stats'][stats].to_numpy()
+        grade = tables['grades'][row, tables['columns'].index(column)]
     else:
-        pass
-    data_summary = (
-        data_for_hist
-        .describe()
-        .reset_index()
-        .query("index == 'mean' | index == '25%' | \
-        index == '50%' | index == '75%'")
-        .assign(Session=lambda x: x.Session_.round(1))
-    )
-
-    data_summary = data_summary.append({'index': 1,
-                                        'Student_Id': student,
-                                        'Session_':
-                                        data_for_hist.loc[student-1,
-                                                          "Session_"],
-                                        'Session':
-                                        data_for_hist.loc[student-1,
-                                                          "Session_"]},
-                                       ignore_index=True)
-
-    data_summary['Session'] = data_summary['Session'].astype("str")
+        ids = data_for_hist['Student_Id'].to_numpy()
+        found = np.flatnonzero(ids == student)
+        if len(found) == 0:
+            raise ValueError("Cannot find the input student id")
+        else:
+            pass
+        values = np.column_stack([ids, data_for_hist['Session_'].to_numpy()]).astype(float)
+        summary = pd.DataFrame(column_stats(values).T, columns=GRADE_STATS)
+        id_stats, grade_stats = summary[stats].to_numpy()
+        grade = values[found[0], 1]
 
     c_cp = ["#335C67", "#fff3b0", "#e09f3e", "#9e2a2b", "#540b0e",
             "#82e2e9", "a9b7ee", "#cce6f8", "ead4f3", "d5baa7"]
 
-    data_summary = (
-        data_summary
-        .assign(label=["Mean", "Q1", "Median", "Q3", "student "+str(student)])
-        .assign(color=[c_cp[2], c_cp[3], c_cp[4], c_cp[2], c_cp[3]])
-        .assign(labelValue=lambda x: x.label + " " + x.Session)
-        .assign(labelValueLineBreak=lambda x: x.label + "\n" + x.Session))
+    labels = ["Mean", "Q1", "Median", "Q3", "student "+str(student)]
+    values = [str(value) for value in np.append(grade_stats.round(1), grade)]
+    data_summary = pd.DataFrame({
+        'index': ['mean', '25%', '50%', '75%', 1],
+        'Student_Id': np.append(id_stats, student),
+        'Session_': np.append(grade_stats, grade),
+        'Session': values,
+        'label': labels,
+        'color': [c_cp[2], c_cp[3], c_cp[4], c_cp[2], c_cp[3]],
+        'labelValue': [label + " " + value for label, value in zip(labels, values)],
+        'labelValueLineBreak': [label + "\n" + value for label, value in zip(labels, values)]})
 
     return data_summary
+
+
+def hist_bins(values, step=0.5):
+    """
+    This function counts grades into bins of width 'step' the way
+    Vega-Lite's bin transform does, so a histogram only needs the bins.
+
+    Parameter
+    ---------
+    values: an array-like of grades, missing values are left out
+    step: the width of the bins
+
+    Return
+    ---------
+    a dataframe with one row per non-empty bin: its
+    'bin_start', 'bin_end' and the 'count' of grades in it
+
+    """
+    if not step > 0:
+        raise ValueError("step should be positive")
+    else:
+        pass
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return pd.DataFrame({'bin_start': [], 'bin_end': [], 'count': []})
+    # the extent is widened to whole steps; the maximum falls in the last bin
+    start = np.floor(values.min() / step) * step
+    stop = max(np.ceil(values.max() / step) * step, start + step)
+    n_bins = int(round((stop - start) / step))
+    position = np.floor((np.minimum(values, stop - step) - start) / step + 1e-14)
+    count = np.bincount(position.astype(np.int64), minlength=n_bins)
+    edges = start + step * np.arange(n_bins + 1)
+    # as in the browser, only the bins with grades get a row
+    keep = count > 0
+    return pd.DataFrame({'bin_start': edges[:-1][keep], 'bin_end': edges[1:][keep],
+                         'count': count[keep]})
+
+
+def log_stack(data, activity, y_option, student=None):
+    """
+    This function sums a log metric by session and activity,
+    the segments of the stacked bars plot_log draws.
+
+    Parameter
+    ---------
+    data: a dataframe with the same structure as session_agg
+          or session_avg returns
+    activity: the activities to keep
+    y_option: the log metric to sum
+    student: the student to keep, all the rows by default
+
+    Return
+    ---------
+    a dataframe with the columns 'session', 'activity' and y_option
+
+    """
+    if y_option not in data.columns:
+        raise ValueError("y_option is not a column of the input data")
+    else:
+        pass
+    selected = data['activity'].isin(activity).to_numpy()
+    if student is not None:
+        selected &= (data['student_id'] == student).to_numpy()
+    rows = data.loc[selected, ['session', 'activity', y_option]]
+    return rows.groupby(['session', 'activity'], as_index=False, sort=True)[y_option].sum()
+
+
+def area_band(area_data):
+    """
+    This function reduces the quantile rows of mid_avg to one row
+    per session with the bottom and top of the shaded band.
+
+    Parameter
+    ---------
+    area_data: the second dataframe mid_avg returns
+
+    Return
+    ---------
+    a dataframe with the columns 'Session', 'low' and 'high'
+
+    """
+    band = area_data.groupby('Session', sort=False)['Avg_grades'].agg(['min', 'max'])
+    return pd.DataFrame({'Session': band.index, 'low': band['min'].to_numpy(),
+                         'high': band['max'].to_numpy()})
@@ -4,9 +4,10 @@ the preprocessing results of graph_data
 """
 
 import altair as alt
+from .graph_data import hist_bins, log_stack, area_band
 
 
-def plot_log(data, student, activity, y_option, type='average'):
+def plot_log(data, student, activity, y_option, type='average', aggregate=False):
     """
     plot the histgram of selected activity based on data
 
@@ -15,6 +16,8 @@ def plot_log(data, student, activity, y_option, type='average'):
     data: a dataframe with the same structure as graph_data.session_avg returns
     y_option: a list with data type string and items
               are among the column names of parameter 'data'
+    aggregate: when True, the bar segments are summed here and only
+               one row per session and activity goes into the chart
 
     Return
     ---------
@@ -24,16 +27,22 @@ def plot_log(data, student, activity, y_option, type='average'):
     log activity spent on different kinds of activities.
     """
     if type == 'student':
-        if data.shape == (4169, 10):
-            df_selected = data[(data['activity'].isin(activity))
-                               & (data['student_id'] == student)]
+        if data.shape[1] == 10 and 'student_id' in data.columns:
+            if aggregate:
+                df_selected = log_stack(data, activity, y_option, student)
+            else:
+                df_selected = data[(data['activity'].isin(activity))
+                                   & (data['student_id'] == student)]
             base = alt.Chart(df_selected, width=350, height=400)
         else:
             raise ValueError("The input data is not used for \
                              plotting student log graph")
     elif type == 'average':
-        if data.shape == (54, 9):
-            df_avg_selected = data[(data['activity'].isin(activity))]
+        if data.shape[1] == 9 and 'student_id' not in data.columns:
+            if aggregate:
+                df_avg_selected = log_stack(data, activity, y_option)
+            else:
+                df_avg_selected = data[(data['activity'].isin(activity))]
             base = alt.Chart(df_avg_selected, width=350, height=400)
         else:
             raise ValueError("The input data is not used for \
@@ -51,7 +60,7 @@ def plot_log(data, student, activity, y_option, type='average'):
     return log_p
 
 
-def plot_mid(avg_data, area_data):
+def plot_mid(avg_data, area_data, aggregate=False):
     """
     plot the line chart reflecting changes within different
     sessions of the class average, Q1, Q3 and selected students.
@@ -59,6 +68,8 @@ def plot_mid(avg_data, area_data):
     Parameter
     ---------
     data: a dataframe with the same structure as graph_data.mid_avg returns
+    aggregate: when True, the bottom and top of the shaded band are
+               computed here and only one row per session goes into the chart
 
     Return
     ---------
@@ -68,14 +79,24 @@ def plot_mid(avg_data, area_data):
     """
     if area_data.shape != (10, 3):
         raise ValueError("The second dataset has wrong dimension!")
-    area = alt.Chart(
-        area_data, width=700, height=500
-        ).mark_area(opacity=0.3).encode(
-            alt.X('Session'),
-            alt.Y('max(Avg_grades):Q'),
-            alt.Y2('min(Avg_grades):Q'),
-            color=alt.value('#e6bcf5')
-            )
+    if aggregate:
+        area = alt.Chart(
+            area_band(area_data), width=700, height=500
+            ).mark_area(opacity=0.3).encode(
+                alt.X('Session'),
+                alt.Y('high:Q', title='max(Avg_grades)'),
+                alt.Y2('low:Q', title='min(Avg_grades)'),
+                color=alt.value('#e6bcf5')
+                )
+    else:
+        area = alt.Chart(
+            area_data, width=700, height=500
+            ).mark_area(opacity=0.3).encode(
+                alt.X('Session'),
+                alt.Y('max(Avg_grades):Q'),
+                alt.Y2('min(Avg_grades):Q'),
+                color=alt.value('#e6bcf5')
+                )
 
     mid_plot = alt.Chart(
         avg_data, width=700, height=500
@@ -113,7 +134,7 @@ def plot_mid(avg_data, area_data):
     return m_conf
 
 
-def plot_mid_hist(session, student, data_for_hist, data_summary):
+def plot_mid_hist(session, student, data_for_hist, data_summary, aggregate=False):
     """
     This function plots a histgram based on the
     intermediate grades of selected session and students.
@@ -121,8 +142,8 @@ def plot_mid_hist(session, student, data_for_hist, data_summary):
 
     Parameter
     ---------
-    session: selected session from session 1 to session 6
-    student: only one selected student from student1 to student 115
+    session: selected session, one of the intermediate grades sessions
+    student: only one selected student of the class
     data_for_hist: a dataframe containing the grades only for
                    the selected session, with two columns
                    recording student ID and their grades.
@@ -130,6 +151,8 @@ def plot_mid_hist(session, student, data_for_hist, data_summary):
                   for the selected session's grades including
                   mean, quartiles. It has several columns used
                   for plotting different layers.
+    aggregate: when True, the grades are binned here and only
+               the bins go into the chart instead of every grade
 
     Return
     ---------
@@ -157,10 +180,18 @@ def plot_mid_hist(session, student, data_for_hist, data_summary):
     c_chart_width = 700
     c_chart_height = 400
 
-    layer_chart = (
-        alt.Chart(data_for_hist)
-        .mark_bar(color=c_cp[session-2])
-        .encode(
+    if aggregate:
+        bars = alt.Chart(hist_bins(data_for_hist["Session_"], step=0.5)).encode(
+            alt.X(
+                "bin_start:Q",
+                title="intermediate grades of Session "+str(session),
+                bin="binned"
+            ),
+            alt.X2("bin_end:Q"),
+            alt.Y("count:Q", title="Count of Records")
+        )
+    else:
+        bars = alt.Chart(data_for_hist).encode(
             alt.X(
                 "Session_:Q",
                 title="intermediate grades of Session "+str(session),
@@ -168,6 +199,9 @@ def plot_mid_hist(session, student, data_for_hist, data_summary):
             ),
             y="count()"
         )
+    layer_chart = (
+        bars
+        .mark_bar(color=c_cp[session-2])
         .properties(
             title={
                 "text": "Distribution of intermediate grades of Session " +
@@ -0,0 +1,199 @@
+"""
+This module renders a standalone HTML progress report for every student:
+the session grades against the class, the histogram of every session
+with the student's grade, and the student's log against the class average
+for every log metric. Vega, Vega-Lite and vega-embed are inlined from a
+local folder, so the reports open without network access.
+
+    python -m epm.graph.report reports --n_jobs -1
+"""
+import argparse
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .cube import METRICS, load_cube
+from .graph_data import grade_tables, mid_avg, mid_sessions
+from .specs import log_spec, mid_hist_spec, mid_spec
+
+
+# vega-embed needs vega and vega-lite to be loaded first
+SCRIPTS = ['vega.min.js', 'vega-lite.min.js', 'vega-embed.min.js']
+VEGA_DIR = 'data/vega'
+# What a worker loads once and shares between its students
+_WORKER = {}
+
+
+def read_scripts(vega_dir=VEGA_DIR):
+    """
+    Read the Vega scripts to inline from 'vega_dir'
+
+    Return
+    ---------
+    The script tags, in loading order
+    """
+    missing = [name for name in SCRIPTS if not os.path.exists(os.path.join(vega_dir, name))]
+    if missing:
+        raise ValueError("'vega_dir' should hold " + ', '.join(missing) +
+                         " (from the vega, vega-lite and vega-embed npm packages)")
+    else:
+        pass
+    tags = []
+    for name in SCRIPTS:
+        with open(os.path.join(vega_dir, name), encoding='utf-8') as script:
+            # a script must not close its own tag
+            tags.append('<script>' + script.read().replace('</script', '<\\/script') + '</script>')
+    return '\n'.join(tags)
+
+
+def init_worker(vega_dir):
+    """
+    Load the scripts and the shared aggregates once per worker process
+    """
+    _WORKER['scripts'] = read_scripts(vega_dir)
+    cube = load_cube()
+    _WORKER['activities'] = list(cube['activities'])
+    _WORKER['metrics'] = [metric for metric in METRICS if metric in cube['metrics']]
+    _WORKER['sessions'] = mid_sessions()
+    _WORKER['graded'] = set(grade_tables()['ids'].tolist())
+    _WORKER['logged'] = set(int(student) for student in cube['students'])
+    mid_avg()
+
+
+def report_students():
+    """
+    List the students with a log or intermediate grades
+    """
+    students = set(load_cube()['students']) | set(grade_tables()['ids'].tolist())
+    return sorted(int(student) for student in students)
+
+
+def render_report(student):
+    """
+    Render the HTML report of a student, once init_worker ran
+
+    Return
+    ---------
+    The HTML document as a string
+    """
+    sections = []
+    # The charts come from the app's plotting functions, which the tests build with
+    # validation; checking every spec against the Vega-Lite schema again was about
+    # 40% of a report's render time
+    if student in _WORKER['graded']:
+        sections.append(('Session grades', [mid_spec(['Average', str(student)],
+                                                     validate=False)]))
+        sections.append(('Grades by session',
+                         [mid_hist_spec(session, student, validate=False)
+                          for session in _WORKER['sessions']]))
+    else:
+        sections.append(('Grades', 'No intermediate grades.'))
+    if student in _WORKER['logged']:
+        sections.append(('Behavior', [log_spec(student, _WORKER['activities'], metric,
+                                               validate=False)
+                                      for metric in _WORKER['metrics']]))
+    else:
+        sections.append(('Behavior', 'No log.'))
+    body = []
+    embeds = []
+    for title, specs in sections:
+        body.append('<h2>' + html.escape(title) + '</h2>')
+        if isinstance(specs, str):
+            body.append('<p>' + specs + '</p>')
+            continue
+        for spec in specs:
+            chart = 'chart' + str(len(embeds))
+            body.append('<div id="' + chart + '"></div>')
+            embeds.append('vegaEmbed("#' + chart + '", ' +
+                          json.dumps(spec).replace('</', '<\\/') + ', {"actions": false});')
+    title = 'Student ' + str(student) + ' progress report'
+    return '\n'.join(['<!DOCTYPE html>', '<html>', '<head>', '<meta charset="utf-8">',
+                      '<title>' + title + '</title>', _WORKER['scripts'], '</head>',
+                      '<body>', '<h1>' + title + '</h1>'] + body +
+                     ['<script>'] + embeds + ['</script>', '</body>', '</html>', ''])
+
+
+def write_report(student, out_dir):
+    """
+    Render the report of a student to 'out_dir'/student_<id>.html
+
+    Return
+    ---------
+    The path of the report
+    """
+    path = os.path.join(out_dir, 'student_' + str(student) + '.html')
+    with open(path, 'w', encoding='utf-8') as report:
+        report.write(render_report(student))
+    return path
+
+
+def write_reports(out_dir, students=None, vega_dir=VEGA_DIR, n_jobs=1, verbose=True):
+    """
+    Render the reports of many students, fanned out across processes
+
+    Parameter
+    ---------
+    out_dir: the folder to write the reports to
+    students: the student ids, every student with a log or grades by default
+    vega_dir: the folder holding the Vega scripts to inline
+    n_jobs: the number of processes, -1 for one per CPU
+    verbose: print the progress and the throughput
+
+    Return
+    ---------
+    The paths of the reports, in the order of the students
+    """
+    if not isinstance(n_jobs, int) or n_jobs == 0 or n_jobs < -1:
+        raise ValueError("'n_jobs' should be a positive integer or -1.")
+    else:
+        pass
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    # fail before starting any worker when the scripts are missing
+    read_scripts(vega_dir)
+    students = report_students() if students is None else [int(student) for student in students]
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    step = max(1, len(students) // 10)
+    paths = []
+
+    def progress(done):
+        if verbose and (done % step == 0 or done == len(students)):
+            elapsed = time.perf_counter() - start
+            print('Rendered {}/{} reports in {:.1f}s'.format(done, len(students), elapsed))
+
+    if n_jobs == 1 or len(students) < 2:
+        init_worker(vega_dir)
+        for student in students:
+            paths.append(write_report(student, out_dir))
+            progress(len(paths))
+    else:
+        # Hand the students out in batches so each task renders several reports
+        chunksize = max(1, len(students) // (n_jobs * 4))
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_worker,
+                                 initargs=(vega_dir,)) as executor:
+            for path in executor.map(write_report, students,
+                                     [out_dir] * len(students), chunksize=chunksize):
+                paths.append(path)
+                progress(len(paths))
+    elapsed = time.perf_counter() - start
+    if verbose:
+        print('Rendered {} reports in {:.1f}s ({:.2f} students/s) with {} process(es)'.format(
+            len(paths), elapsed, len(paths) / max(elapsed, np.finfo(float).eps), n_jobs))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render an HTML progress report per student.')
+    parser.add_argument('out_dir')
+    parser.add_argument('--vega_dir', default=VEGA_DIR)
+    parser.add_argument('--n_jobs', type=int, default=1)
+    parser.add_argument('--students', type=int, nargs='*')
+    args = parser.parse_args()
+    write_reports(args.out_dir, args.students, args.vega_dir, args.n_jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+This module keeps mergeable quantile sketches (KLL style) of grades and
+log metrics, so quantiles of many cohorts or sections can be updated as
+data arrives and merged without keeping or sorting every value.
+
+A sketch holds its values in levels; an item of level h stands for 2**h
+values. When a level outgrows its capacity it is sorted and every other
+item (from a random offset) is promoted to the next level. A sketch is
+exact until it has seen k values. Past that, the rank error of a quantile
+stays under about 3.3/k of the number of values with high probability (1.65%
+for the default k=200, 0.33% for k=1000; the typical error is about half of
+that), and merging sketches keeps that bound.
+"""
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from ..data_prep.workbook_cache import read_workbook
+from .cache import cached
+from .graph_data import session_agg
+
+
+# Capacity ratio between a level and the one above it
+DECAY = 2 / 3
+METRICS = ['idle_time', 'mouse_wheel', 'mouse_wheel_click', 'mouse_click_left',
+           'mouse_click_right', 'mouse_movement', 'keystroke']
+
+
+def new_sketch(k=200, seed=0):
+    """
+    Create an empty sketch
+
+    Parameter
+    ---------
+    k: capacity of the top level, the accuracy parameter
+    seed: seed of the random compaction offsets
+
+    Return
+    ---------
+    A dictionary with the 'levels' (arrays of values), the number of values
+    'n' seen, their 'min' and 'max', 'k' and the random generator
+    """
+    if not isinstance(k, int) or k < 8:
+        raise ValueError("k should be an integer of at least 8")
+    else:
+        pass
+    return {'k': k, 'levels': [np.empty(0)], 'n': 0, 'min': np.inf, 'max': -np.inf,
+            'rng': np.random.default_rng(seed)}
+
+
+def capacity(sketch, level):
+    """
+    Number of items a level holds before it is compacted
+    """
+    height = len(sketch['levels'])
+    return max(2, int(np.ceil(sketch['k'] * DECAY ** (height - 1 - level))))
+
+
+def compress(sketch):
+    """
+    Compact the levels of a sketch, bottom up, until every one fits
+    """
+    level = 0
+    while level < len(sketch['levels']):
+        items = sketch['levels'][level]
+        if len(items) <= capacity(sketch, level):
+            level += 1
+            continue
+        items = np.sort(items)
+        # An odd item out stays at its level
+        keep = items[len(items) - len(items) % 2:]
+        promoted = items[sketch['rng'].integers(2):len(items) - len(items) % 2:2]
+        if level + 1 == len(sketch['levels']):
+            sketch['levels'].append(np.empty(0))
+        sketch['levels'][level] = keep
+        sketch['levels'][level + 1] = np.concatenate([sketch['levels'][level + 1], promoted])
+        # The capacities shrink when a level is added, so start over
+        level = 0
+    return sketch
+
+
+def update_sketch(sketch, values):
+    """
+    Add values to a sketch, in place; missing values are ignored
+
+    Parameter
+    ---------
+    sketch: a dictionary returned by new_sketch
+    values: an array-like of numbers
+
+    Return
+    ---------
+    The sketch
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return sketch
+    sketch['levels'][0] = np.concatenate([sketch['levels'][0], values])
+    sketch['n'] += len(values)
+    sketch['min'] = min(sketch['min'], values.min())
+    sketch['max'] = max(sketch['max'], values.max())
+    return compress(sketch)
+
+
+def merge_sketches(*sketches):
+    """
+    Merge sketches, e.g. of several sections, into a new sketch
+
+    Return
+    ---------
+    A sketch of all their values, with the smallest k of the sketches
+    """
+    if not sketches:
+        raise ValueError("At least one sketch should be given")
+    else:
+        pass
+    merged = new_sketch(min(sketch['k'] for sketch in sketches))
+    height = max(len(sketch['levels']) for sketch in sketches)
+    merged['levels'] = [np.concatenate([sketch['levels'][level] for sketch in sketches
+                                        if level < len(sketch['levels'])])
+                        for level in range(height)]
+    merged['n'] = sum(sketch['n'] for sketch in sketches)
+    merged['min'] = min(sketch['min'] for sketch in sketches)
+    merged['max'] = max(sketch['max'] for sketch in sketches)
+    return compress(merged)
+
+
+def weighted_items(sketch):
+    """
+    Sorted items of a sketch and the number of values each stands for
+    """
+    items = np.concatenate(sketch['levels'])
+    weights = np.concatenate([np.full(len(values), 2.0 ** level)
+                              for level, values in enumerate(sketch['levels'])])
+    order = np.argsort(items, kind='stable')
+    return items[order], weights[order]
+
+
+def sketch_quantile(sketch, q):
+    """
+    Estimate quantiles of the values of a sketch
+
+    Parameter
+    ---------
+    sketch: a dictionary returned by new_sketch
+    q: a quantile or an array of quantiles in [0, 1]
+
+    Return
+    ---------
+    The quantiles; they are exact (as numpy's linear quantiles) while the
+    sketch has seen at most k values, and NaN for an empty sketch
+    """
+    q = np.asarray(q, dtype=float)
+    if np.any((q < 0) | (q > 1)):
+        raise ValueError("Quantiles should be in [0, 1]")
+    else:
+        pass
+    if sketch['n'] == 0:
+        return np.full(q.shape, np.nan)
+    if len(sketch['levels']) == 1:
+        return np.quantile(sketch['levels'][0], q)
+    items, weights = weighted_items(sketch)
+    position = np.searchsorted(np.cumsum(weights), q * sketch['n'], side='left')
+    estimate = items[np.minimum(position, len(items) - 1)]
+    # The extremes are kept exactly
+    return np.where(q == 0, sketch['min'], np.where(q == 1, sketch['max'], estimate))
+
+
+def sketch_rank(sketch, value):
+    """
+    Estimate the share of the values of a sketch that are at most 'value'
+    """
+    if sketch['n'] == 0:
+        return np.nan
+    items, weights = weighted_items(sketch)
+    return weights[:np.searchsorted(items, value, side='right')].sum() / sketch['n']
+
+
+def build_sketches(data, columns, by=None, k=200, sketches=None):
+    """
+    Sketch some columns of a dataframe, per group
+
+    Parameter
+    ---------
+    data: a dataframe, e.g. the intermediate grades or session_agg's output
+    columns: the columns to sketch, e.g. the sessions' grades or log metrics
+    by: a column to group the rows by (e.g. 'session'), none by default
+    k: accuracy parameter of new sketches
+    sketches: sketches to update with the rows, in place, e.g. loaded with
+              load_sketches; new ones are created by default
+
+    Return
+    ---------
+    A dictionary of sketches keyed by column, or by (group, column)
+    """
+    if not isinstance(data, pd.DataFrame):
+        raise ValueError("The input data is not of type dataframe")
+    else:
+        pass
+    sketches = {} if sketches is None else sketches
+    groups = [(None, data)] if by is None else data.groupby(by, sort=True)
+    for group, rows in groups:
+        for col in columns:
+            key = col if by is None else (group, col)
+            if key not in sketches:
+                sketches[key] = new_sketch(k)
+            update_sketch(sketches[key], rows[col].to_numpy())
+    return sketches
+
+
+def merge_sketch_tables(*tables):
+    """
+    Merge dictionaries of sketches (e.g. one per section) key by key
+    """
+    keys = []
+    for table in tables:
+        keys += [key for key in table if key not in keys]
+    return {key: merge_sketches(*[table[key] for table in tables if key in table])
+            for key in keys}
+
+
+def quantile_table(sketches, q=(0.20, 0.25, 0.50, 0.75, 0.80)):
+    """
+    Tabulate quantiles of a dictionary of sketches
+
+    Return
+    ---------
+    A dataframe with one row per key, the number of values 'n' and one column per quantile
+    """
+    rows = {key: np.append(sketch['n'], sketch_quantile(sketch, q))
+            for key, sketch in sketches.items()}
+    table = pd.DataFrame.from_dict(rows, orient='index', columns=['n'] + list(q))
+    table['n'] = table['n'].astype(np.int64)
+    return table
+
+
+def quartile_band(*tables, q=(0.20, 0.80)):
+    """
+    Merge the grade sketches of sections into the class-wide quantile band
+
+    Parameter
+    ---------
+    tables: dictionaries of sketches keyed by session column, one per section
+    q: the lower and upper quantiles of the band
+
+    Return
+    ---------
+    A dataframe with the same structure as the second output of mid_avg,
+    the 'Q1' rows holding the lower and the 'Q3' rows the upper quantile
+    """
+    merged = merge_sketch_tables(*tables)
+    columns = list(merged)
+    bounds = np.array([sketch_quantile(merged[col], q) for col in columns]).reshape(len(columns), 2)
+    return pd.concat([pd.DataFrame({'Student Id': label, 'Session': columns,
+                                    'Avg_grades': bounds[:, j].round(2)})
+                      for j, label in enumerate(['Q1', 'Q3'])])
+
+
+@cached('data/intermediate_grades.xlsx')
+def grade_sketches(k=200):
+    """
+    This function sketches the intermediate grades in the "data" folder,
+    one sketch per session column.
+    """
+    data = read_workbook('data/intermediate_grades.xlsx')
+    return build_sketches(data, list(data.columns.drop('Student Id')), k=k)
+
+
+@cached('data/all_log.csv')
+def log_sketches(k=200):
+    """
+    This function sketches every log metric of the session_agg result,
+    keyed by (session, metric).
+    """
+    log_session = session_agg()
+    return build_sketches(log_session, [col for col in METRICS if col in log_session.columns],
+                          by='session', k=k)
+
+
+def save_sketches(sketches, path):
+    """
+    Pickle a dictionary of sketches atomically
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'wb') as tmp:
+        pickle.dump(sketches, tmp)
+    os.replace(path + '.tmp', path)
+
+
+def load_sketches(path):
+    """
+    Load pickled sketches, or an empty dictionary when there is no pickle yet
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as state:
+        return pickle.load(state)
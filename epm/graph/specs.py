@@ -0,0 +1,76 @@
+"""
+This module builds the charts of the app from their parameters (student,
+session, activities, metric) and caches their serialized specs, so that a
+repeated view skips the data filtering, the chart building and the JSON
+serialization. Draw the specs with st.vega_lite_chart.
+"""
+import altair as alt
+from .cache import cached_spec
+from .cube import SOURCE, load_cube, student_log, class_average
+from .graph_data import mid_avg, mid_hist, mid_summary
+from .graph_fun import plot_log, plot_mid, plot_mid_hist
+
+
+GRADES = 'data/intermediate_grades.xlsx'
+
+
+@cached_spec(SOURCE)
+def log_spec(student, activity, y_option):
+    """
+    This function builds the class average and the student's log
+    of the selected activities side by side.
+
+    Parameter
+    ---------
+    student: the student id
+    activity: the activities to include
+    y_option: the log metric to plot
+
+    Return
+    ---------
+    the Vega-Lite spec of the two bar charts, with a shared y scale
+
+    """
+    cube = load_cube()
+    class_plot = plot_log(class_average(cube), student, activity, y_option,
+                          type='average', aggregate=True).properties(title='Class Average')
+    student_plot = plot_log(student_log(cube, student), student, activity, y_option,
+                            type='student', aggregate=True).properties(
+        title='Student' + ' ' + str(student) + ' ' + y_option)
+    return alt.hconcat(class_plot, student_plot).resolve_scale(y='shared')
+
+
+@cached_spec(GRADES)
+def mid_hist_spec(session, student):
+    """
+    This function builds the histogram of a session's intermediate
+    grades with the statistics and the grade of the student.
+
+    Return
+    ---------
+    the Vega-Lite spec of plot_mid_hist
+
+    """
+    data_for_hist = mid_hist(session)
+    data_summary = mid_summary(student, data_for_hist, session)
+    return plot_mid_hist(session, student, data_for_hist, data_summary, aggregate=True)
+
+
+@cached_spec(GRADES)
+def mid_spec(students):
+    """
+    This function builds the line chart of the session grades
+    of the selected students against the class.
+
+    Parameter
+    ---------
+    students: the 'Student Id' labels to plot, e.g. ['Average', '1']
+
+    Return
+    ---------
+    the Vega-Lite spec of plot_mid
+
+    """
+    all_grades, area = mid_avg()
+    all_grades = all_grades[all_grades['Student Id'].isin(students)]
+    return plot_mid(all_grades, area, aggregate=True)
@@ -19,6 +19,25 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.cluster import KMeans
 
 
+def session_list(data_list):
+    """
+    Lay out sessions keyed by session number as the list the functions below
+    take, whose i-th element holds Session i+1 (0 for missing sessions)
+
+    Parameters
+    ----------
+    data_list: A dictionary of pandas dataframes keyed by session number,
+               or a list which is returned unchanged
+
+    Return
+    ----------
+    A list containing the sessions' pandas dataframes
+    """
+    if isinstance(data_list, dict):
+        return [data_list.get(session, 0) for session in range(1, max(data_list, default=0) + 1)]
+    return data_list
+
+
 def subset_important_features(data_list, num_of_features, option):
     """
     Subset the certain number of statistically significant features
@@ -26,7 +45,8 @@ def subset_important_features(data_list, num_of_features, option):
     Parameters
     ----------
     data_list: A list containing pandas dataframes
-               including sessions' and grades' data
+               including sessions' and grades' data, or a dictionary
+               of them keyed by session number
     num_of_features: The number of features that a user wants to subset
     option: Different ways to subset the data_list
             'common': Subset common significant features across all sessions
@@ -36,6 +56,7 @@ def subset_important_features(data_list, num_of_features, option):
     ----------
     A list containing subsetted pandas dataframes
     """
+    data_list = session_list(data_list)
     if not isinstance(num_of_features, int) is True:
         raise ValueError("'num_of_features' should be an integer.")
     if not isinstance(option, str) is True:
@@ -47,10 +68,10 @@ def subset_important_features(data_list, num_of_features, option):
     else:
         # Subset common significant features across all sessions
         if option == 'different':
-            important_features = []
+            important_features = {}
             results_list = [0]*len(data_list)
             for i, session in enumerate(data_list):
-                if i == 0:
+                if i == 0 or not isinstance(session, pd.DataFrame):
                     continue
                 ivs = session.drop(columns=['ID', 'Y'])
                 outcome = session['Y']
@@ -58,13 +79,13 @@ def subset_important_features(data_list, num_of_features, option):
                 clf = clf.fit(ivs, outcome)
                 feat_importances = pd.Series(clf.feature_importances_, index=ivs.columns)
                 features = feat_importances.nlargest(num_of_features).index[0:num_of_features]
-                important_features.append(pd.DataFrame(features, columns=['session' + str(i+1)]))
-                important_features[i-1].loc[num_of_features] = ['Y']
-                important_features[i-1].loc[num_of_features+1] = ['ID']
+                important_features[i] = pd.DataFrame(features, columns=['session' + str(i+1)])
+                important_features[i].loc[num_of_features] = ['Y']
+                important_features[i].loc[num_of_features+1] = ['ID']
             for i, session in enumerate(data_list):
-                if i == 0:
+                if i not in important_features:
                     continue
-                results_list[i] = session[important_features[i-1]['session'+str(i+1)]]
+                results_list[i] = session[important_features[i]['session'+str(i+1)]]
             return results_list
 
         # Subset significant features from each session
@@ -75,7 +96,7 @@ def subset_important_features(data_list, num_of_features, option):
             while num < num_of_features-1:
                 important_features = []
                 for i, session in enumerate(data_list):
-                    if i == 0:
+                    if i == 0 or not isinstance(session, pd.DataFrame):
                         continue
                     ivs = session.drop(columns=['ID', 'Y'])
                     outcome = session['Y']
@@ -90,7 +111,7 @@ def subset_important_features(data_list, num_of_features, option):
             if len(common_features) > num_of_features-1:
                 common_features = common_features[0:num_of_features-1]
                 for i, session in enumerate(data_list):
-                    if i == 0:
+                    if i == 0 or not isinstance(session, pd.DataFrame):
                         continue
                     common_features.append('ID')
                     common_features.append('MID'+str(i+1))
@@ -98,7 +119,7 @@ def subset_important_features(data_list, num_of_features, option):
                     del common_features[-2:]
             if len(common_features) == num_of_features-1:
                 for i, session in enumerate(data_list):
-                    if i == 0:
+                    if i == 0 or not isinstance(session, pd.DataFrame):
                         continue
                     common_features.append('ID')
                     common_features.append('MID'+str(i+1))
@@ -114,7 +135,8 @@ def machine_learning_model(data_list, ml_model):
     Parameters
     ----------
     data_list: A list containing pandas dataframes
-               including sessions' and grades' data
+               including sessions' and grades' data, or a dictionary
+               of them keyed by session number
     ml_model: A machine learning model that a user wants to fit
                 'KNN': K-nearest neighbors
                 'DT': Decision tree
@@ -128,6 +150,7 @@ def machine_learning_model(data_list, ml_model):
     A list containing pandas dataframes including features
     and a fitted result from a machine learning model
     """
+    data_list = session_list(data_list)
     if not isinstance(data_list, list) is True:
         raise ValueError("'data_list' should be a list including panda dataframes.")
     if not isinstance(ml_model, str) is True:
@@ -135,7 +158,7 @@ def machine_learning_model(data_list, ml_model):
                          one of machine learning models ('KNN', 'DT', 'RF', 'NB', 'LR', 'SVC').")
     else:
         for i, session in enumerate(data_list):
-            if i == 0:
+            if i == 0 or not isinstance(session, pd.DataFrame):
                 continue
             ivs = session.drop(columns=['Y'])
             outcome = session['Y']
@@ -182,7 +205,8 @@ def kmean_clustering(data_list, num_of_sessions, num_of_clusters):
     Parameters
     ----------
     data_list: A list containing pandas dataframes
-               including sessions' and grades' data
+               including sessions' and grades' data, or a dictionary
+               of them keyed by session number
     num_of_sessions: The timing when a user wants to form a group
     num_of_clusters: The number of clusters that a user wants to form
 
@@ -191,6 +215,7 @@ def kmean_clustering(data_list, num_of_sessions, num_of_clusters):
     A list containing pandas dataframes including features
     and results from the k-mean clustering
     """
+    data_list = session_list(data_list)
     if not isinstance(data_list, list) is True:
         raise ValueError("'data_list' should be a list including panda dataframes.")
     if not isinstance(num_of_sessions, int) is True:
@@ -199,21 +224,27 @@ def kmean_clustering(data_list, num_of_sessions, num_of_clusters):
         raise ValueError("'num_of_clusters' should be an integer.")
     if not num_of_sessions >= 2:
         raise ValueError("'num_of_sessions' should be greater than 2.")
+    if not num_of_sessions <= len(data_list):
+        raise ValueError("'num_of_sessions' should not exceed the number of sessions.")
     else:
-        new_data_list = [0]*5
+        new_data_list = [0]*(num_of_sessions-1)
         for i in range(0, num_of_sessions):
             if i == 0:
                 continue
-            # k-mean clustering for the session 2
-            if i == 1:
+            if not isinstance(data_list[i], pd.DataFrame):
+                # a missing session keeps the groups formed so far
+                new_data_list[i-1] = new_data_list[i-2] if i >= 2 else 0
+                continue
+            # k-mean clustering for the session 2 (or the first session after a gap)
+            if i == 1 or not isinstance(new_data_list[i-2], pd.DataFrame):
                 new_data_list[i-1] = data_list[i]
                 kmeans = KMeans(n_clusters=num_of_clusters, init='k-means++',
                                 max_iter=300, n_init=10)
                 kmeans.fit(new_data_list[i-1].loc[:, new_data_list[i-1].columns != 'ID'])
                 y_pred = kmeans.fit_predict(new_data_list[i-1].loc[:, new_data_list[i-1].columns != 'ID'])
                 new_data_list[i-1] = new_data_list[i-1].assign(group=y_pred)
-            # k-mean clustering for the session 3-6
-            if 2 <= i <= 5:
+            # k-mean clustering for the later sessions
+            else:
                 logs = data_list[i].columns[0:len(data_list[i].columns)-2]
                 new_data_list[i-1] = new_data_list[i-2].merge(data_list[i], how="outer", on=['ID'])
                 # Calculate current intermediate (mid) scores with previous scores
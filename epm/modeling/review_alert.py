@@ -3,11 +3,33 @@ This module creates a dataframe that represents which sessions a student
 is recommended to review first before the final exam. 
 """
 import os
+import re
 import pandas as pd
 import pickle
 
 
-def review_alert(id, feat_num):
+PICKLE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'data_prep', 'pickles')
+
+
+def pickled_sessions(feat_num, pickle_dir=PICKLE_DIR):
+    """
+    find the sessions that have pickled features for a number of features
+
+    Parameter
+    ---------
+    feat_num: the number of features
+    pickle_dir: the folder holding 'features_and_outcome' and 'trained_models'
+
+    Return
+    ---------
+    a sorted list of session numbers
+    """
+    pattern = re.compile(r'session_(\d+)_featnum_' + str(feat_num) + '$')
+    found = [pattern.match(name) for name in os.listdir(os.path.join(pickle_dir, 'features_and_outcome'))]
+    return sorted(int(match.group(1)) for match in found if match)
+
+
+def review_alert(id, feat_num, sessions=None, pickle_dir=PICKLE_DIR):
     """
     retrieve data and trained models from pickle files, 
     predict which sessions are to be prioritized for review. 
@@ -17,6 +39,10 @@ def review_alert(id, feat_num):
     id: student ID
     feat_num: the number of features to consider 
     when predicting sessions to review
+    sessions: the session numbers to predict, by default every session
+    pickled for 'feat_num' in 'pickle_dir'
+    pickle_dir: the folder holding 'features_and_outcome' and 'trained_models',
+    by default the course pickled with the package
 
     Return
     ---------
@@ -30,23 +56,25 @@ def review_alert(id, feat_num):
     if feat_num not in [3, 4, 5, '3', '4', '5']:
         raise ValueError("'feat_num' should be either 3, 4, or 5.")
 
+    if sessions is None:
+        sessions = pickled_sessions(feat_num, pickle_dir)
     res = []
     models = ['KNN', 'DT', 'RF', 'NB', 'LR', 'SVC']
-    columns = ['Session 2', 'Session 3', 'Session 4', 'Session 5', 'Session 6']
+    columns = ['Session ' + str(session) for session in sessions]
     for model_name in models:
-        row = [0] * 5
-        for session in range(2, 7):           
+        row = [0] * len(sessions)
+        for j, session in enumerate(sessions):
             data = 'session_' + str(session) + '_featnum_' + str(feat_num)
-            data_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'data_prep', 'pickles', 'features_and_outcome', data)
+            data_path = os.path.join(pickle_dir, 'features_and_outcome', data)
             df = pickle.load(open(data_path, 'rb'))
             features = df.loc[df['ID'] == int(id)].drop(columns=['Y', 'ID'])
             if len(features) == 0:
                 continue
 
             model = str(model_name) + '_session_' + str(session) + '_featnum_' + str(feat_num)
-            model_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'data_prep', 'pickles', 'trained_models', model)
+            model_path = os.path.join(pickle_dir, 'trained_models', model)
             loaded_model = pickle.load(open(model_path, 'rb'))
-            row[session-2] = loaded_model.predict(features)[0]
+            row[j] = loaded_model.predict(features)[0]
         res.append(row)
 
     df = pd.DataFrame(res,
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests courses.py
+"""
+
+# Load libraries
+import os
+import tempfile
+import unittest
+import data_prep.courses as co
+import data_prep.synthetic as sy
+
+
+class TestCourses(unittest.TestCase):
+    """
+    class for testing courses.py.
+    """
+    def test_edge_build_courses(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'n_jobs' is 0.
+        """
+        with self.assertRaises(ValueError):
+            co.build_courses({}, n_jobs=0)
+
+    def test_build_courses(self):
+        """
+        Test that courses with different session counts are built in a worker pool.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, n_sessions in [('short', 4), ('long', 8)]:
+                sy.generate_epm_data(os.path.join(tmp, name), n_students=15,
+                                     n_sessions=n_sessions, events_per_file=20, seed=1)
+            courses = {name: os.path.join(tmp, name) for name in ['short', 'long']}
+            results = co.build_courses(courses, save_dir=os.path.join(tmp, 'out'), n_jobs=2)
+            serial = co.build_course(courses['long'])
+            saved = sorted(os.listdir(os.path.join(tmp, 'out', 'long')))
+        self.assertEqual(len(results['short']['features']), 5)
+        self.assertEqual(len(results['long']['features']), 9)
+        self.assertIn('MID8', results['long']['grades'].columns)
+        self.assertTrue(results['long']['grades'].equals(serial['grades']))
+        self.assertEqual(len(saved), 9)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests event_store.py
+"""
+
+# Load libraries
+import os
+import tempfile
+import unittest
+import pandas as pd
+import data_prep.event_store as es
+import data_prep.log_prep as lp
+from epm.tests.test_log_prep import write_logs
+
+
+class TestEventStore(unittest.TestCase):
+    """
+    class for testing event_store.py.
+    """
+    def test_edge_open_event_store(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'store_dir' does not contain a store.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(ValueError):
+                es.open_event_store(tmp)
+
+    def test_store_to_data_list(self):
+        """
+        Test that the store rebuilds read_file's data with parsed timestamps.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            store_dir = os.path.join(tmp, 'store')
+            n_events = es.build_event_store(file_dir, store_dir)
+            store = es.open_event_store(store_dir)
+            data_list = es.store_to_data_list(store)
+            expected = lp.read_file(file_dir)
+            del store
+        self.assertEqual(n_events, sum(len(expected[i]) for i in range(1, 7)))
+        for i in range(1, 7):
+            session = expected[i].sort_values('student_id', kind='stable')
+            session = session.reset_index(drop=True)
+            for col in ['start_time', 'end_time']:
+                session[col] = pd.to_datetime(session[col].str.strip(),
+                                              format='%d.%m.%Y %H:%M:%S')
+            pd.testing.assert_frame_equal(session, data_list[i], check_dtype=False)
+
+    def test_empty_store(self):
+        """
+        Test that a store without events gives an empty list.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            store_dir = os.path.join(tmp, 'store')
+            es.build_event_store(write_logs(os.path.join(tmp, 'Processes')), store_dir)
+            store = es.open_event_store(store_dir)
+            store['events'] = store['events'][:0]
+            self.assertEqual(es.store_to_data_list(store), [])
+            del store
+
+    def test_empty_folder(self):
+        """
+        Test that a Processes folder without log files gives an empty store.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = os.path.join(tmp, 'Processes')
+            os.makedirs(file_dir)
+            store_dir = os.path.join(tmp, 'store')
+            self.assertEqual(es.build_event_store(file_dir, store_dir), 0)
+            store = es.open_event_store(store_dir)
+            self.assertEqual(len(store['index']), 0)
+            self.assertEqual(es.store_to_data_list(store), [])
+            self.assertEqual(lp.read_file(file_dir, store_dir=store_dir), lp.read_file(file_dir))
+            del store
+
+    def test_read_file_from_store(self):
+        """
+        Test that log_prep features computed from the store match the files'.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            store_dir = os.path.join(tmp, 'store')
+            es.build_event_store(file_dir, store_dir)
+            for compact in [False, True]:
+                expected = lp.feature_manipulation(lp.read_file(file_dir, compact=compact))
+                stored = lp.feature_manipulation(lp.read_file(file_dir, compact=compact,
+                                                              store_dir=store_dir))
+                for i in range(1, 7):
+                    pd.testing.assert_frame_equal(expected[i], stored[i])
+
+    def test_student_events(self):
+        """
+        Test that a student's events are a view of the memory-mapped store.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            store_dir = os.path.join(tmp, 'store')
+            es.build_event_store(file_dir, store_dir)
+            store = es.open_event_store(store_dir)
+            events = es.student_events(store, 2, 3)
+            missing = es.student_events(store, 2, 99)
+            self.assertTrue(len(events) > 0)
+            self.assertTrue((events['session'] == 2).all())
+            self.assertTrue((events['student'] == 3).all())
+            self.assertFalse(events.flags['OWNDATA'])
+            self.assertEqual(len(missing), 0)
+            del store, events, missing
@@ -7,7 +7,10 @@ A module that tests log_prep.py
 """
 
 # Load libraries
+import os
+import tempfile
 import unittest
+import numpy as np
 import pandas as pd
 import data_prep.grades_prep as gp
 
@@ -45,6 +48,36 @@ class TestMLmodling(unittest.TestCase):
         with self.assertRaises(ValueError):
             gp.final_manipulation(final_1st, final_2nd)
 
+    def test_final_manipulation_sittings(self):
+        """
+        Test that each student's first sitting is kept, across three sittings.
+        """
+        columns = ['ES 1.1 \n(2 points)', 'ES 1.2 \n(3 points)', 'ES 2.1\n(5 points)']
+        sittings = [pd.DataFrame([[3, 1, 2, 5], [1, 2, 3, 0]], columns=['Student ID'] + columns),
+                    pd.DataFrame([[1, 0, 0, 0], [2, 2, 3, 4]], columns=['Student ID'] + columns),
+                    pd.DataFrame([[2, 0, 0, 0], [4, 1, 1, 1]], columns=['Student ID'] + columns)]
+        final_100 = gp.final_manipulation(sittings)
+        self.assertEqual(list(final_100['ID']), [1, 2, 3, 4])
+        self.assertEqual(list(final_100['FIN1']), [100, 100, 60, 40])
+        self.assertEqual(list(final_100['FIN2']), [0, 80, 100, 20])
+        # Doubling the weight of the second question
+        weights = gp.exam_weights(columns)
+        weights.loc['ES 1.2 \n(3 points)', 'FIN1'] = 2
+        final_100 = gp.final_manipulation(*sittings, weights=weights)
+        self.assertEqual(list(final_100['FIN1']), [100, 100, 62.5, 37.5])
+
+    def test_final_manipulation_no_session_1(self):
+        """
+        Test that without session 1 the first session's unanswered questions count as 0.
+        """
+        columns = ['ES 2.1\n(5 points)', 'ES 3.1\n(5 points)']
+        sitting = pd.DataFrame({'Student ID': [1, 2], columns[0]: [5, np.nan],
+                                columns[1]: [np.nan, 4]})
+        final_100 = gp.final_manipulation(sitting)
+        self.assertEqual(list(final_100.columns), ['ID', 'FIN2', 'FIN3', 'final_score'])
+        self.assertEqual(list(final_100['FIN2']), [100, 0])
+        self.assertTrue(np.isnan(final_100['FIN3'].iloc[0]))
+
     # Tests for rebase_mid
     @classmethod
     def test_smoke_rebase_mid(cls):
@@ -139,6 +172,33 @@ class TestMLmodling(unittest.TestCase):
         with self.assertRaises(ValueError):
             gp.get_result(grades)
 
+    def test_get_result_thresholds(self):
+        """
+        Test that a threshold table labels the sessions it lists, and that a
+        grid point labels the students like get_result does.
+        """
+        grades = pd.DataFrame({'ID': [1, 2, 3, 4], 'MID2': [1.0, -1.0, 0.5, 2.0],
+                               'FIN2': [1.5, -2.0, 0.5, 1.0], 'MID3': [1.0, 1.0, -1.0, 0.0],
+                               'FIN3': [2.5, 1.0, -3.0, 0.0]})
+        result = gp.get_result(grades.copy(), thresholds={2: 1.2, 3: 2})
+        self.assertEqual(list(result['RES2']), [0, 1, 1, 1])
+        self.assertEqual(list(result['RES3']), [0, 1, 1, 0])
+        grid = gp.threshold_grid(grades, {2: [1.0, 1.2], 3: [2, 3]})
+        self.assertEqual(grid['labels'].shape, (4, 4, 2))
+        self.assertEqual(list(grid['points'].iloc[1]), [1.0, 3.0])
+        self.assertEqual(list(grid['labels'][1, :, 0]), [0, 1, 0, 1])
+        self.assertEqual(list(grid['balance'].loc[2]), [0.75, 0.5])
+        self.assertEqual(list(gp.threshold_grid(grades, [1.2])['balance'].columns),
+                         ['RES2', 'RES3'])
+
+    def test_edge_threshold_grid(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'grades' is not a panda dataframe.
+        """
+        with self.assertRaises(ValueError):
+            gp.threshold_grid([1, 2, 3], [1.2, 1.5])
+
     # Tests for save_grades
     def test_edge_save_grades(self):
         """
@@ -148,3 +208,14 @@ class TestMLmodling(unittest.TestCase):
         grades = [1, 2, 3]
         with self.assertRaises(ValueError):
             gp.save_grades(grades, 'EPM_dataset/Data/')
+
+    def test_save_grades_parquet(self):
+        """
+        Test that grades saved as Parquet load back with exact values and dtypes.
+        """
+        grades = pd.DataFrame({'ID': [1, 2, 3], 'MID2': [0.1, 1/3, -2.5],
+                               'RES2': [0, 1, 1]})
+        with tempfile.TemporaryDirectory() as outdir:
+            path = os.path.join(outdir, 'complete_grades.parquet')
+            gp.save_grades(grades, path)
+            pd.testing.assert_frame_equal(gp.load_grades(path), grades)
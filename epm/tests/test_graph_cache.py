@@ -0,0 +1,188 @@
+"""
+Tests for the graph_data cache layer
+"""
+
+import os
+import tempfile
+import unittest
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from epm.graph.cache import cached, cached_spec, cache_stats, clear_cache
+
+
+class TestCached(unittest.TestCase):
+    """
+    Test for the cached decorator
+    """
+    def setUp(self):
+        clear_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'log.csv')
+        pd.DataFrame({'session': [1, 1, 2], 'count': [1, 2, 3]}).to_csv(self.path, index=False)
+        self.calls = 0
+
+        @cached(self.path)
+        def session_sum():
+            self.calls += 1
+            return pd.read_csv(self.path).groupby('session').sum()
+        self.session_sum = session_sum
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hits(self):
+        """
+        Test that repeated calls are served from memory as copies.
+        """
+        first = self.session_sum()
+        first.loc[1, 'count'] = 100
+        second = self.session_sum()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.loc[1, 'count'], 3)
+        stats = cache_stats().loc[__name__ + '.TestCached.setUp.<locals>.session_sum']
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_nested_copies(self):
+        """
+        Test that the frames and writable arrays of a cached dictionary are copies.
+        """
+        @cached(self.path)
+        def tables():
+            frozen = np.arange(3)
+            frozen.flags.writeable = False
+            return {'sums': self.session_sum(), 'levels': [np.zeros(2)], 'frozen': frozen}
+        first = tables()
+        first['sums'].loc[1, 'count'] = 100
+        first['levels'][0][0] = 5
+        first['levels'].append(np.ones(1))
+        second = tables()
+        self.assertEqual(second['sums'].loc[1, 'count'], 3)
+        self.assertEqual(len(second['levels']), 1)
+        self.assertEqual(second['levels'][0].tolist(), [0, 0])
+        self.assertIs(second['frozen'], first['frozen'])
+
+    def test_invalidation(self):
+        """
+        Test that a touched file is re-hashed, and a changed file recomputed.
+        """
+        self.session_sum()
+        os.utime(self.path, ns=(0, 0))
+        self.session_sum()
+        self.assertEqual(self.calls, 1)
+        pd.DataFrame({'session': [1], 'count': [7]}).to_csv(self.path, index=False)
+        self.assertEqual(list(self.session_sum()['count']), [7])
+        self.assertEqual(self.calls, 2)
+
+    def test_same_names(self):
+        """
+        Test that same-named functions of two modules do not share entries.
+        """
+        functions = []
+        for module, value in [('first', 1), ('second', 2)]:
+            def session_sum(value=value):
+                return value
+            session_sum.__module__ = module
+            functions.append(cached(self.path)(session_sum))
+        self.assertEqual([function() for function in functions], [1, 2])
+        self.assertEqual(len(cache_stats().filter(like='session_sum', axis=0)), 2)
+
+    def test_frame_arguments(self):
+        """
+        Test that dataframe arguments are keyed by their content.
+        """
+        @cached()
+        def total(frame):
+            self.calls += 1
+            return frame['count'].sum()
+        frame = pd.DataFrame({'count': [1, 2]})
+        self.assertEqual(total(frame), 3)
+        self.assertEqual(total(frame.copy()), 3)
+        self.assertEqual(total(frame + 1), 5)
+        self.assertEqual(self.calls, 2)
+
+
+class TestCachedSpec(unittest.TestCase):
+    """
+    Test for the cached_spec decorator
+    """
+    def setUp(self):
+        clear_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'log.csv')
+        pd.DataFrame({'session': [1, 2, 2], 'count': [1, 2, 3]}).to_csv(self.path, index=False)
+        self.calls = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def log_chart(self, max_bytes):
+        """
+        A chart of the sessions in 'sessions', cached with a byte budget
+        """
+        @cached_spec(self.path, max_bytes=max_bytes)
+        def log_chart(sessions):
+            self.calls += 1
+            data = pd.read_csv(self.path)
+            return alt.Chart(data[data['session'].isin(sessions)]).mark_bar().encode(
+                x='session:N', y='count')
+        return log_chart
+
+    def test_hits(self):
+        """
+        Test that repeated views get new copies of the same spec,
+        and that a changed file rebuilds it.
+        """
+        log_chart = self.log_chart(1 << 20)
+        first = log_chart([1, 2])
+        first['mark'] = 'line'
+        self.assertEqual(log_chart([1, 2])['mark'], 'bar')
+        self.assertEqual(self.calls, 1)
+        pd.DataFrame({'session': [1], 'count': [7]}).to_csv(self.path, index=False)
+        self.assertEqual(list(log_chart([1, 2])['datasets'].values())[0], [{'session': 1, 'count': 7}])
+        self.assertEqual(self.calls, 2)
+
+    def test_validate(self):
+        """
+        Test that specs are checked against the schema unless validate=False,
+        and that an unchecked spec is not served to validating callers.
+        """
+        @cached_spec(self.path)
+        def bad_chart():
+            chart = alt.Chart(pd.read_csv(self.path)).mark_bar().encode(x='session:N')
+            chart.mark = 'no_such_mark'
+            return chart
+        self.assertEqual(bad_chart(validate=False)['mark'], 'no_such_mark')
+        with self.assertRaises(alt.utils.schemapi.SchemaValidationError):
+            bad_chart()
+
+    def test_eviction(self):
+        """
+        Test that the least recently used specs are dropped past the byte budget.
+        """
+        sizes = {}
+        for sessions in [(1,), (2,), (1, 2)]:
+            clear_cache()
+            self.log_chart(1 << 20)(list(sessions))
+            sizes[sessions] = cache_stats()['bytes'].iloc[0]
+        # room for the specs of session 1 and of both sessions only
+        log_chart = self.log_chart(sizes[(1,)] + sizes[(1, 2)])
+        clear_cache()
+        self.calls = 0
+        log_chart([1])
+        log_chart([2])
+        log_chart([1])
+        log_chart([1, 2])
+        stats = cache_stats().loc[__name__ + '.TestCachedSpec.log_chart.<locals>.log_chart']
+        self.assertEqual(stats['bytes'], sizes[(1,)] + sizes[(1, 2)])
+        self.assertEqual(stats['entries'], 2)
+        log_chart([1])
+        self.assertEqual(self.calls, 3)
+        log_chart([2])
+        self.assertEqual(self.calls, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
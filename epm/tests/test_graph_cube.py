@@ -0,0 +1,90 @@
+"""
+Tests for the aggregate cube in cube.py
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from epm.graph.cache import clear_cache
+from epm.graph.cube import build_cube, load_cube, rollup, student_log, class_average
+from epm.graph.graph_data import session_avg
+
+# aggregated log data for the unittest, as session_agg returns it
+LOG_SESSION = pd.DataFrame({'session': [1, 1, 1, 2, 2],
+                            'student_id': [1, 1, 4, 1, 4],
+                            'activity': ['Blank', 'Deeds', 'Deeds', 'Blank', 'Study'],
+                            'idle_time': [10, 20, 30, 40, 50],
+                            'mouse_wheel': [1, 2, 3, 4, 5],
+                            'mouse_wheel_click': [0, 0, 1, 0, 0],
+                            'mouse_click_left': [5, 6, 7, 8, 9],
+                            'mouse_click_right': [0, 1, 0, 1, 0],
+                            'mouse_movement': [100, 200, 300, 400, 500],
+                            'keystroke': [3, 0, 6, 0, 9]})
+
+
+class TestCube(unittest.TestCase):
+    """
+    Test for the cube queries
+    """
+    def test_student_log(self):
+        """
+        Test that a student's slice matches a filter of the log.
+        """
+        cube = build_cube(LOG_SESSION)
+        self.assertEqual(cube['values'].shape, (2, 2, 3, 7))
+        expected = LOG_SESSION[LOG_SESSION['student_id'] == 4].reset_index(drop=True)
+        pd.testing.assert_frame_equal(student_log(cube, 4), expected)
+        self.assertEqual(len(student_log(cube, 3)), 0)
+
+    def test_class_average(self):
+        """
+        Test that the class roll-up matches session_avg and other roll-ups add up.
+        """
+        cube = build_cube(LOG_SESSION)
+        pd.testing.assert_frame_equal(class_average(cube),
+                                      session_avg.__wrapped__(LOG_SESSION))
+        sums = rollup(cube, ['session', 'student'], how='sum')
+        self.assertEqual(list(sums[:, 6]), [3, 6, 9])
+        self.assertTrue(np.isnan(rollup(cube, 'session')[0, 2, 0]))
+
+    def test_edge_rollup(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when an axis is not a cube axis.
+        """
+        with self.assertRaises(ValueError):
+            rollup(build_cube(LOG_SESSION), 'metric')
+
+    def test_load_cube(self):
+        """
+        Test that the cube is built on first load and memory-mapped every time.
+        """
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'data'))
+            log = LOG_SESSION.assign(exercise='Es', start_time='', end_time='')
+            log.to_csv(os.path.join(tmp, 'data', 'all_log.csv'), index=False)
+            os.chdir(tmp)
+            try:
+                clear_cache()
+                built = load_cube()
+                # a hit after the rebuild shares the mapped arrays
+                self.assertIs(load_cube()['values'], built['values'])
+                clear_cache()
+                loaded = load_cube()
+            finally:
+                clear_cache()
+                os.chdir(cwd)
+        self.assertIsInstance(built['values'], np.memmap)
+        self.assertFalse(built['values'].flags.writeable)
+        self.assertIsInstance(loaded['values'], np.memmap)
+        np.testing.assert_array_equal(loaded['values'], built['values'])
+        self.assertEqual(loaded['activities'], ['Blank', 'Deeds', 'Study'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,11 @@ Tests for functions in graph_data
 
 import unittest
 
+import pandas as pd
+
 from epm.graph.graph_data import session_agg, session_avg
-from epm.graph.graph_data import mid_avg, mid_hist, mid_summary
+from epm.graph.graph_data import mid_avg, mid_hist, mid_summary, grade_tables
+from epm.graph.graph_data import hist_bins, log_stack, area_band
 
 
 class TestSessionAgg(unittest.TestCase):
@@ -110,6 +113,17 @@ class TestMidSummary(unittest.TestCase):
             data_for_hist = mid_hist(2)
             mid_summary(student, data_for_hist)
 
+    def test_precomputed(self):
+        """
+        Test that the statistics sliced out of grade_tables
+        match the ones computed from the session's grades.
+        """
+        data_for_hist = mid_hist(3)
+        pd.testing.assert_frame_equal(mid_summary(2, data_for_hist, session=3),
+                                      mid_summary(2, data_for_hist))
+        summary = grade_tables()['summary'].loc['Session 3']
+        self.assertAlmostEqual(summary['median'], data_for_hist['Session_'].median())
+
     def test_parameter2_data_type(self):
         """
         Edge test to make sure the function throws a ValueError
@@ -139,3 +153,41 @@ class TestMidSummary(unittest.TestCase):
             student = 500
             data_for_hist = mid_hist(2)
             mid_summary(student, data_for_hist)
+
+
+class TestChartData(unittest.TestCase):
+    """
+    Test for the server-side chart aggregates
+    """
+    def test_hist_bins(self):
+        """
+        Test that grades are binned as Vega-Lite bins them.
+        """
+        bins = hist_bins([0.2, 0.5, 0.7, 2.0, 3.0, float('nan')])
+        self.assertEqual(list(bins['bin_start']), [0.0, 0.5, 2.0, 2.5])
+        self.assertEqual(list(bins['bin_end']), [0.5, 1.0, 2.5, 3.0])
+        self.assertEqual(list(bins['count']), [1, 2, 1, 1])
+        self.assertEqual(hist_bins([4.0, 4.0])['count'].tolist(), [2])
+        with self.assertRaises(ValueError):
+            hist_bins([1.0], step=0)
+
+    def test_log_stack(self):
+        """
+        Test that the bar segments are summed by session and activity.
+        """
+        data = pd.DataFrame({'session': [2, 2, 2, 3], 'student_id': [1, 2, 1, 1],
+                             'activity': ['Aulaweb', 'Aulaweb', 'Other', 'Aulaweb'],
+                             'keystroke': [1, 2, 4, 8]})
+        stack = log_stack(data, ['Aulaweb'], 'keystroke')
+        self.assertEqual(stack.values.tolist(), [[2, 'Aulaweb', 3], [3, 'Aulaweb', 8]])
+        stack = log_stack(data, ['Aulaweb', 'Other'], 'keystroke', student=1)
+        self.assertEqual(list(stack['keystroke']), [1, 4, 8])
+
+    def test_area_band(self):
+        """
+        Test that the band holds the quantiles of mid_avg by session.
+        """
+        area = mid_avg()[1]
+        band = area_band(area)
+        self.assertEqual(list(band['Session']), list(area['Session'].unique()))
+        self.assertTrue((band['low'] <= band['high']).all())
@@ -4,9 +4,13 @@ Tests for functions in graph_fun
 
 import unittest
 
+import numpy as np
+import pandas as pd
+
 from epm.graph.graph_data import session_agg, session_avg
 from epm.graph.graph_data import mid_avg, mid_hist, mid_summary
 from epm.graph.graph_fun import plot_log, plot_mid, plot_mid_hist
+from epm.graph.specs import log_spec, mid_hist_spec, mid_spec
 
 
 class TestPlotLog(unittest.TestCase):
@@ -136,3 +140,49 @@ class TestPlotMidHist(unittest.TestCase):
             data_for_hist = mid_hist(session)
             data_summary = mid_summary(student, data_for_hist)
             plot_mid_hist(session, student, data_summary, data_for_hist)
+
+
+class TestAggregate(unittest.TestCase):
+    """
+    Tests for the server-side aggregated charts
+    """
+    def test_large_cohort(self):
+        """
+        Test that a histogram of a cohort past Altair's row limit
+        only embeds its bins.
+        """
+        grades = np.random.default_rng(0).uniform(0, 6, 20000).round(2)
+        data_for_hist = pd.DataFrame({'Student_Id': np.arange(20000), 'Session_': grades})
+        data_summary = mid_summary(1, data_for_hist)
+        spec = plot_mid_hist(2, 1, data_for_hist, data_summary, aggregate=True).to_dict()
+        rows = [len(rows) for rows in spec['datasets'].values()]
+        self.assertEqual(sorted(rows), [5, 12])
+
+    def test_aggregate_figures(self):
+        """
+        Smoke test to make sure the aggregated charts have the right type
+        """
+        data = session_agg()
+        activity = sorted(data['activity'].unique())
+        log_plot = plot_log(data, 1, activity, 'keystroke', type='student', aggregate=True)
+        self.assertEqual(str(type(log_plot)),
+                         "<class 'altair.vegalite.v4.api.Chart'>")
+        all_grades, area = mid_avg()
+        mid_plot = plot_mid(all_grades[all_grades['Student Id'] == 'Average'], area,
+                            aggregate=True)
+        self.assertEqual(str(type(mid_plot)),
+                         "<class 'altair.vegalite.v4.api.LayerChart'>")
+
+
+class TestSpecs(unittest.TestCase):
+    """
+    Tests for the cached chart specs
+    """
+    def test_specs(self):
+        """
+        Smoke test to make sure the specs of the app's charts are built
+        """
+        activity = sorted(session_agg()['activity'].unique())
+        self.assertEqual(len(log_spec(1, activity, 'keystroke')['hconcat']), 2)
+        self.assertEqual(len(mid_hist_spec(2, 1)['layer']), 3)
+        self.assertEqual(mid_spec(['Average', '1']), mid_spec(('Average', '1')))
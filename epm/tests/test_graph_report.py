@@ -0,0 +1,59 @@
+"""
+Tests for the batch report renderer
+"""
+
+import os
+import tempfile
+import unittest
+
+from epm.graph.report import SCRIPTS, write_reports
+
+
+class TestWriteReports(unittest.TestCase):
+    """
+    Test for function write_reports
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.vega_dir = os.path.join(self.tmp.name, 'vega')
+        os.makedirs(self.vega_dir)
+        for name in SCRIPTS:
+            with open(os.path.join(self.vega_dir, name), 'w') as script:
+                script.write('/* ' + name + ' */')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reports(self):
+        """
+        Test that the reports are standalone and the same from a process pool.
+        """
+        out_dir = os.path.join(self.tmp.name, 'reports')
+        paths = write_reports(out_dir, [2, 1], self.vega_dir, verbose=False)
+        self.assertEqual([os.path.basename(path) for path in paths],
+                         ['student_2.html', 'student_1.html'])
+        with open(paths[1]) as report:
+            page = report.read()
+        self.assertIn('/* vega-embed.min.js */', page)
+        self.assertNotIn('http', page.split('<body>')[0])
+        self.assertGreater(page.count('vegaEmbed("#chart'), 1)
+        pool_paths = write_reports(os.path.join(self.tmp.name, 'pool'), [2, 1, 9999],
+                                   self.vega_dir, n_jobs=2, verbose=False)
+        with open(pool_paths[1]) as report:
+            self.assertEqual(report.read().count('vegaEmbed('), page.count('vegaEmbed('))
+        with open(pool_paths[2]) as report:
+            self.assertIn('No intermediate grades.', report.read())
+
+    def test_edge_write_reports(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when the scripts are missing or n_jobs is wrong.
+        """
+        with self.assertRaises(ValueError):
+            write_reports(self.tmp.name, [1], os.path.join(self.tmp.name, 'missing'))
+        with self.assertRaises(ValueError):
+            write_reports(self.tmp.name, [1], self.vega_dir, n_jobs=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
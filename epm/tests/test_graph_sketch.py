@@ -0,0 +1,120 @@
+"""
+Tests for the quantile sketches
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from epm.graph.sketch import (new_sketch, update_sketch, merge_sketches, sketch_quantile,
+                              sketch_rank, build_sketches, merge_sketch_tables,
+                              quantile_table, quartile_band, save_sketches, load_sketches)
+
+
+# Documented rank error bound of a sketch, times k
+BOUND = 3.3
+
+
+def rank_error(values, estimates, q):
+    """
+    Largest distance between the true ranks of the estimates and the asked quantiles
+    """
+    values = np.sort(values)
+    lower = np.searchsorted(values, estimates, side='left') / len(values)
+    upper = np.searchsorted(values, estimates, side='right') / len(values)
+    return np.max(np.maximum(lower - q, q - upper).clip(0))
+
+
+class TestSketch(unittest.TestCase):
+    """
+    Test for the quantile sketches
+    """
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.q = np.linspace(0, 1, 21)
+
+    def test_exact(self):
+        """
+        Test that a sketch of at most k values gives numpy's quantiles.
+        """
+        values = self.rng.normal(size=150)
+        sketch = update_sketch(new_sketch(), np.append(values, np.nan))
+        self.assertEqual(sketch['n'], 150)
+        np.testing.assert_allclose(sketch_quantile(sketch, self.q), np.quantile(values, self.q))
+        self.assertTrue(np.isnan(sketch_quantile(new_sketch(), 0.5)))
+
+    def test_error_bound(self):
+        """
+        Test that incremental updates stay within the documented rank error
+        for several seeds and accuracies.
+        """
+        for seed in range(5):
+            rng = np.random.default_rng(seed)
+            values = rng.exponential(size=1000000)
+            for k in [200, 1000]:
+                sketch = new_sketch(k=k, seed=seed)
+                for chunk in np.array_split(values, 50):
+                    update_sketch(sketch, chunk)
+                self.assertLess(sum(len(level) for level in sketch['levels']), 5 * k)
+                self.assertLess(rank_error(values, sketch_quantile(sketch, self.q), self.q),
+                                BOUND / k)
+                self.assertEqual(sketch_quantile(sketch, [0, 1]).tolist(),
+                                 [values.min(), values.max()])
+                self.assertAlmostEqual(sketch_rank(sketch, np.median(values)), 0.5,
+                                       delta=BOUND / k)
+
+    def test_merge(self):
+        """
+        Test that merged sections give the quantiles of all the values.
+        """
+        for seed in range(5):
+            rng = np.random.default_rng(seed)
+            sections = [rng.normal(loc, size=size)
+                        for loc, size in [(0, 700000), (3, 300000), (1, 80)]]
+            merged = merge_sketches(*[update_sketch(new_sketch(seed=seed + i), values)
+                                      for i, values in enumerate(sections)])
+            values = np.concatenate(sections)
+            self.assertEqual(merged['n'], len(values))
+            self.assertLess(rank_error(values, sketch_quantile(merged, self.q), self.q),
+                            BOUND / 200)
+
+    def test_tables(self):
+        """
+        Test the sketches of a dataframe, their band and their pickle.
+        """
+        grades = pd.DataFrame({'Student Id': range(10), 'Session 2': np.arange(10.0),
+                               'Session 3': np.arange(10.0) * 2})
+        sections = [build_sketches(grades.iloc[:6], ['Session 2', 'Session 3']),
+                    build_sketches(grades.iloc[6:], ['Session 2', 'Session 3'])]
+        band = quartile_band(*sections)
+        self.assertEqual(list(band['Student Id']), ['Q1'] * 2 + ['Q3'] * 2)
+        self.assertEqual(list(band['Avg_grades']), [1.8, 3.6, 7.2, 14.4])
+        by_session = build_sketches(pd.DataFrame({'session': [1, 1, 2], 'keystroke': [1, 3, 5]}),
+                                    ['keystroke'], by='session')
+        table = quantile_table(merge_sketch_tables(by_session, by_session), q=[0.5])
+        self.assertEqual(table.loc[[(1, 'keystroke')], 'n'].tolist(), [4])
+        self.assertEqual(table[0.5].tolist(), [2.0, 5.0])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'sketches.pkl')
+            self.assertEqual(load_sketches(path), {})
+            save_sketches(by_session, path)
+            self.assertEqual(quantile_table(load_sketches(path)).shape, (2, 6))
+
+    def test_edge_sketch(self):
+        """
+        Edge test to make sure the functions throw a ValueError
+        for a bad k, quantiles out of [0, 1] or no data.
+        """
+        with self.assertRaises(ValueError):
+            new_sketch(k=2)
+        with self.assertRaises(ValueError):
+            sketch_quantile(new_sketch(), 1.5)
+        with self.assertRaises(ValueError):
+            build_sketches([1, 2], ['Session 2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests incremental.py
+"""
+
+# Load libraries
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+import data_prep.incremental as inc
+import data_prep.log_prep as lp
+from epm.tests.test_log_prep import LOG_ROWS, write_logs
+
+
+class TestIncremental(unittest.TestCase):
+    """
+    class for testing incremental.py.
+    """
+    def assert_same_features(self, file_dir, data_list):
+        """
+        Compare with recomputing every session from scratch.
+        """
+        expected = lp.feature_manipulation(lp.read_file(file_dir))
+        for i in range(1, 7):
+            pd.testing.assert_frame_equal(expected[i], data_list[i])
+
+    def test_edge_update_features(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'state_dir' is not a string.
+        """
+        with self.assertRaises(ValueError):
+            inc.update_features('../data/Processes', state_dir=None)
+
+    def test_update_features(self):
+        """
+        Test that new, modified and removed files are merged back correctly.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            state_dir = os.path.join(tmp, 'state')
+            self.assert_same_features(file_dir, inc.update_features(file_dir, state_dir))
+            # a new activity for a known student and a brand new student
+            with open(os.path.join(file_dir, 'Session 2', '1'), 'a') as log:
+                log.write("2, 1, Es, Aulaweb, 2.10.2014 11:27:0, 2.10.2014 11:27:9, 9, 0, 0, 1, 0, 8, 0\n")
+            with open(os.path.join(file_dir, 'Session 2', '4'), 'w') as log:
+                log.write("2, 4, Es, Diagram, 2.10.2014 11:27:0, 2.10.2014 11:27:9, 9, 0, 0, 1, 0, 8, 0\n")
+            os.remove(os.path.join(file_dir, 'Session 5', '3'))
+            self.assert_same_features(file_dir, inc.update_features(file_dir, state_dir))
+
+    def test_no_log_files(self):
+        """
+        Test that an empty Processes folder without state gives an empty list.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'Processes'))
+            self.assertEqual(inc.update_features(os.path.join(tmp, 'Processes'),
+                                                 os.path.join(tmp, 'state')), [])
+
+    def test_session_removed_and_added_back(self):
+        """
+        Test that a session folder added back without a student drops the student's row.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            state_dir = os.path.join(tmp, 'state')
+            inc.update_features(file_dir, state_dir)
+            shutil.rmtree(os.path.join(file_dir, 'Session 3'))
+            inc.update_features(file_dir, state_dir)
+            self.assertFalse(os.path.exists(os.path.join(state_dir, 'session_3.arrow')))
+            write_logs(file_dir, {3: {student: lines for student, lines in LOG_ROWS[3].items()
+                                      if student != 2}})
+            data_list = inc.update_features(file_dir, state_dir)
+            self.assertNotIn(2, data_list[3].index)
+            self.assert_same_features(file_dir, data_list)
+
+    def test_student_in_several_files(self):
+        """
+        Test that a student's rows in an unchanged file survive a change of another file.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            with open(os.path.join(file_dir, 'Session 2', '1_b'), 'w') as log:
+                log.write("2, 1, Es, Deeds, 2.10.2014 11:28:0, 2.10.2014 11:28:5, 5, 0, 0, 2, 0, 3, 1\n")
+            state_dir = os.path.join(tmp, 'state')
+            inc.update_features(file_dir, state_dir)
+            with open(os.path.join(file_dir, 'Session 2', '1'), 'a') as log:
+                log.write("2, 1, Es, Aulaweb, 2.10.2014 11:27:0, 2.10.2014 11:27:9, 9, 0, 0, 1, 0, 8, 0\n")
+            self.assert_same_features(file_dir, inc.update_features(file_dir, state_dir))
+
+    def test_unchanged_files_are_not_read(self):
+        """
+        Test that a second run without changes does not read any log file.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            state_dir = os.path.join(tmp, 'state')
+            inc.update_features(file_dir, state_dir)
+            read_log = inc.read_log
+            inc.read_log = None
+            try:
+                self.assert_same_features(file_dir, inc.update_features(file_dir, state_dir))
+            finally:
+                inc.read_log = read_log
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests log_cache.py
+"""
+
+# Load libraries
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+import data_prep.log_cache as lc
+import data_prep.log_prep as lp
+from epm.tests.test_log_prep import write_logs
+
+# format of the timestamps in the log files
+TIME_FORMAT = '%d.%m.%Y %H:%M:%S'
+
+
+class TestLogCache(unittest.TestCase):
+    """
+    class for testing log_cache.py.
+    """
+    def test_edge_read_file_cached(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'cache_dir' is not a string.
+        """
+        with self.assertRaises(ValueError):
+            lc.read_file_cached('../data/Processes', cache_dir=[1, 2])
+
+    def test_read_file_cached(self):
+        """
+        Test that cold and warm reads match read_file with parsed timestamps.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            cache_dir = os.path.join(tmp, 'cache')
+            expected = lp.read_file(file_dir)
+            cold = lc.read_file_cached(file_dir, cache_dir)
+            warm = lc.read_file_cached(file_dir, cache_dir)
+        for i in range(1, 7):
+            for col in ['start_time', 'end_time']:
+                expected[i][col] = pd.to_datetime(expected[i][col].str.strip(),
+                                                  format=TIME_FORMAT)
+            pd.testing.assert_frame_equal(expected[i], cold[i])
+            pd.testing.assert_frame_equal(expected[i], warm[i])
+
+    def test_changed_file_is_reparsed(self):
+        """
+        Test that only the modified file is parsed again after a change.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            cache_dir = os.path.join(tmp, 'cache')
+            lc.read_file_cached(file_dir, cache_dir)
+            with open(os.path.join(file_dir, 'Session 2', '3'), 'a') as log:
+                log.write("2, 3, Es, Other, 2.10.2014 11:26:0, 2.10.2014 11:26:9, 9, 0, 0, 0, 0, 1, 0\n")
+            parsed = []
+            parse_log = lc.parse_log
+            lc.parse_log = lambda path: parsed.append(path) or parse_log(path)
+            try:
+                data_list = lc.read_file_cached(file_dir, cache_dir)
+            finally:
+                lc.parse_log = parse_log
+        self.assertEqual(parsed, [os.path.join(file_dir, 'Session 2', '3')])
+        self.assertEqual(len(data_list[2]), 7)
+
+    def test_removed_folder_is_pruned(self):
+        """
+        Test that the cache of a removed session folder is dropped.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            file_dir = write_logs(os.path.join(tmp, 'Processes'))
+            cache_dir = os.path.join(tmp, 'cache')
+            lc.read_file_cached(file_dir, cache_dir)
+            shutil.rmtree(os.path.join(file_dir, 'Session 6'))
+            lc.read_file_cached(file_dir, cache_dir)
+            manifest = lc.load_manifest(cache_dir)
+            self.assertEqual(len(manifest), 5)
+            self.assertNotIn(os.path.abspath(os.path.join(file_dir, 'Session 6')), manifest)
+            self.assertEqual(len([name for name in os.listdir(cache_dir)
+                                  if name.endswith('.arrow')]), 5)
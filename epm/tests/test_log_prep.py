@@ -7,10 +7,40 @@ A module that tests log_prep.py
 """
 
 # Load libraries
+import os
+import tempfile
 import unittest
 import pandas as pd
 import data_prep.log_prep as lp
 
+# test log files for the unittest, one template per student
+LOG_LINES = {
+    1: ["{0}, 1, Es, Other, 2.10.2014 11:25:33, 2.10.2014 11:25:34, 0, 0, 0, 0, 0, 84, 0",
+        "{0}, 1, Es_{0}_1, Deeds_Es_{0}_1, 2.10.2014 11:25:35, 2.10.2014 11:25:42, 218, 0, 0, 4, 0, 397, 0",
+        "{0}, 1, Es_{0}_1, FSM_Related, 2.10.2014 11:25:43, 2.10.2014 11:26:4, 500, 0, 0, 7, 1, 120, 0"],
+    2: ["{0}, 2, Es_{0}_1, TextEditor_Es_{0}_1, 2.10.2014 11:25:43, 2.10.2014 11:25:43, 10, 1, 0, 0, 0, 59, 3",
+        "{0}, 2, Es_{0}_2, Study_Es_{0}_2, 2.10.2014 11:26:5, 2.10.2014 11:27:0, 30, 2, 0, 1, 0, 40, 0"],
+    3: ["{0}, 3, Es, Blank, 2.10.2014 11:25:43, 2.10.2014 11:25:50, 7, 0, 0, 0, 0, 12, 5"]
+}
+LOG_ROWS = {session: {student: [line.format(session) for line in lines]
+                      for student, lines in LOG_LINES.items()}
+            for session in range(1, 7)}
+
+
+def write_logs(file_dir, rows=None):
+    """
+    Write Processes-style log files for the unittest
+    """
+    rows = LOG_ROWS if rows is None else rows
+    for session, students in rows.items():
+        session_dir = os.path.join(file_dir, 'Session ' + str(session))
+        os.makedirs(session_dir, exist_ok=True)
+        for student, lines in students.items():
+            with open(os.path.join(session_dir, str(student)), 'w') as log:
+                log.write('\n'.join(lines) + '\n')
+    return file_dir
+
+
 # test data_list for the unittest
 
 
@@ -34,6 +64,55 @@ class TestMLmodling(unittest.TestCase):
         with self.assertRaises(ValueError):
             lp.read_file(file_dir)
 
+    def test_edge_read_file_n_jobs(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'n_jobs' is not a positive integer or -1.
+        """
+        with self.assertRaises(ValueError):
+            lp.read_file('../data/Processes', n_jobs=0)
+
+    def test_read_file_parallel(self):
+        """
+        Test that the parallel walk returns the same sessions as the serial one.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir)
+            serial = lp.read_file(file_dir)
+            parallel = lp.read_file(file_dir, n_jobs=2)
+        for i in range(1, 7):
+            pd.testing.assert_frame_equal(serial[i], parallel[i])
+
+    def test_read_file_compact(self):
+        """
+        Test that the compact schema is applied and carried through feature_manipulation.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir)
+            default = lp.read_file(file_dir)
+            compact = lp.read_file(file_dir, compact=True)
+        for col, dtype in lp.LOG_SCHEMA.items():
+            self.assertEqual(str(compact[1][col].dtype), dtype)
+        self.assertLess(lp.memory_footprint(compact)['total'],
+                        lp.memory_footprint(default)['total'])
+        expected = lp.feature_manipulation(default)
+        features = lp.feature_manipulation(compact)
+        for i in range(1, 7):
+            self.assertTrue((features[i].dtypes == lp.FEATURE_DTYPE).all())
+            pd.testing.assert_frame_equal(expected[i], features[i].astype('float64'))
+
+    def test_edge_compact_log(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when a counter does not fit in its compact dtype.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir, {1: {1: ["1, 1, Es, Other, 2.10.2014 11:25:33, "
+                                          "2.10.2014 11:25:34, 0, 70000, 0, 0, 0, 84, 0"]}})
+            log = lp.read_log(os.path.join(file_dir, 'Session 1', '1'))
+        with self.assertRaises(ValueError):
+            lp.compact_log(log)
+
     # Test for feature_manipulation
     def test_edge_feature_manipulation(self):
         """
@@ -44,6 +123,106 @@ class TestMLmodling(unittest.TestCase):
         with self.assertRaises(ValueError):
             lp.feature_manipulation(data_list)
 
+    def test_any_session_count(self):
+        """
+        Test that courses with more than six sessions, or missing sessions, are read.
+        """
+        rows = {session: {student: [line.format(session) for line in lines]
+                          for student, lines in LOG_LINES.items()}
+                for session in [1, 2, 4, 9]}
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir, rows)
+            data_list = lp.read_file(file_dir)
+        self.assertEqual(len(data_list), 10)
+        self.assertEqual([i for i, session in enumerate(data_list)
+                          if isinstance(session, pd.DataFrame)], [1, 2, 4, 9])
+        features = lp.feature_manipulation({i: data_list[i] for i in [1, 2, 4, 9]})
+        self.assertEqual(features[3], 0)
+        self.assertEqual(list(features[9].index), [1, 2, 3])
+
+    def test_session_gap_pipeline(self):
+        """
+        Test that a missing session keeps its place through standardization and the grades merge.
+        """
+        rows = {session: {student: [line.format(session) for line in lines]
+                          for student, lines in LOG_LINES.items()}
+                for session in [1, 2, 4]}
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir, rows)
+            features = lp.feature_manipulation(lp.read_file(file_dir))
+        standardized = lp.feature_standardization(features)
+        self.assertEqual(standardized[2], 0)
+        self.assertEqual([isinstance(session, pd.DataFrame) for session in standardized],
+                         [True, True, False, True])
+        grades = pd.DataFrame({'ID': [1, 2, 3], 'MID2': [13, 9, 19], 'MID4': [8, 7, 15],
+                               'RES2': [0, 1, 1], 'RES4': [1, 0, 1]})
+        merged = lp.merge_all_data([session.reset_index() if isinstance(session, pd.DataFrame)
+                                    else session for session in standardized], grades)
+        self.assertEqual(merged[2], 0)
+        self.assertEqual(list(merged[3]['MID4']), [8, 7, 15])
+        self.assertEqual(list(merged[3]['Y']), [1, 0, 1])
+        self.assertEqual(list(merged[1]['MID2']), [13, 9, 19])
+
+    def test_edge_sessions_to_list(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'sessions' is neither a dictionary nor a list.
+        """
+        with self.assertRaises(ValueError):
+            lp.sessions_to_list('Session 1')
+
+    # Tests for stream_features
+    def test_stream_features(self):
+        """
+        Test that folding small chunks gives the same frames as the in-memory path.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir)
+            expected = lp.feature_manipulation(lp.read_file(file_dir))
+            streamed = lp.stream_features(file_dir, chunksize=2)
+        for i in range(1, 7):
+            pd.testing.assert_frame_equal(expected[i], streamed[i])
+
+    def test_stream_features_no_logs(self):
+        """
+        Test that a Processes folder without log files gives an empty list.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            self.assertEqual(lp.stream_features(file_dir), [])
+            os.makedirs(os.path.join(file_dir, 'Session 1'))
+            self.assertEqual(lp.stream_features(file_dir), [])
+
+    def test_edge_stream_features(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'chunksize' is not a positive integer.
+        """
+        with self.assertRaises(ValueError):
+            list(lp.iter_log_chunks('../data/Processes', chunksize=0))
+
+    def test_build_feature_matrix(self):
+        """
+        Test that the fused builder matches groupby-sum and pivot_table.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir)
+            raw = lp.read_file(file_dir)
+        for i in range(1, 7):
+            expected = lp.widen_features(lp.sum_activities(raw[i]).droplevel('session'))
+            matrix, ids, columns = lp.build_feature_matrix(raw[i])
+            self.assertTrue(matrix.flags['C_CONTIGUOUS'])
+            self.assertEqual(columns, list(expected.columns))
+            self.assertEqual(list(ids), list(expected.index))
+            self.assertTrue((matrix == expected.to_numpy()).all())
+
+    def test_edge_build_feature_matrix(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'session' is not a dataframe.
+        """
+        with self.assertRaises(ValueError):
+            lp.build_feature_matrix([1, 2, 3])
+
     # Test for feature_standardization
     def test_edge_feature_standardization(self):
         """
@@ -95,6 +274,31 @@ class TestMLmodling(unittest.TestCase):
         with self.assertRaises(ValueError):
             lp.merge_all_data(data_list, grades)
 
+    # Tests for join_grades
+    def test_join_grades(self):
+        """
+        Test that the aligned join matches the hash merge, missing IDs included.
+        """
+        session = pd.DataFrame({'AB': [10, 5, 20, 21], 'CD': [15, 15, 22, 7]},
+                               index=pd.Index([4, 1, 9, 2], name='ID'))
+        grades = pd.DataFrame({'ID': [2, 4, 1, 3], 'MID2': [13, 9, 19, 23],
+                               'RES2': [0, 1, 1, 1]})
+        expected = session.reset_index().merge(grades, how='inner', on='ID')
+        expected = expected.rename(columns={'RES2': 'Y'})
+        joined = lp.join_grades([0, session], grades)[1]
+        self.assertEqual(list(joined.index), [4, 1, 2])
+        pd.testing.assert_frame_equal(lp.merge_all_data([0, session], grades)[1], expected)
+
+    def test_edge_join_grades(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'grades' has several rows for one ID.
+        """
+        session = pd.DataFrame({'AB': [10, 5]}, index=pd.Index([1, 2], name='ID'))
+        grades = pd.DataFrame({'ID': [1, 1, 2], 'MID2': [13, 9, 19], 'RES2': [0, 1, 1]})
+        with self.assertRaises(ValueError):
+            lp.join_grades([0, session], grades)
+
     # Tests for save_grades
     def test_edge_save_data(self):
         """
@@ -104,3 +308,50 @@ class TestMLmodling(unittest.TestCase):
         data_list = {7, 8, 9}
         with self.assertRaises(ValueError):
             lp.save_data(data_list, save_dir='EPM_dataset/Data/')
+
+    def test_save_data_formats(self):
+        """
+        Test that Parquet and Feather files load back with exact values, dtypes and index.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir)
+            data_list = lp.feature_manipulation(lp.read_file(file_dir, compact=True))
+            for file_format in ['parquet', 'feather']:
+                save_dir = os.path.join(file_dir, file_format)
+                os.makedirs(save_dir)
+                lp.save_data(data_list, save_dir, file_format=file_format, n_jobs=2)
+                loaded = lp.load_data(save_dir, file_format=file_format)
+                self.assertEqual(len(loaded), len(data_list))
+                for i in range(1, 7):
+                    pd.testing.assert_frame_equal(loaded[i], data_list[i], check_exact=True)
+                columns = list(data_list[1].columns[:2])
+                subset = lp.load_data(save_dir, file_format=file_format, columns=columns)
+                pd.testing.assert_frame_equal(subset[1], data_list[1][columns])
+                if os.path.exists('/proc/self/maps'):
+                    # the files are read into memory, not left mapped
+                    with open('/proc/self/maps') as maps:
+                        self.assertNotIn(save_dir, maps.read())
+
+    def test_save_load_defaults(self):
+        """
+        Test that load_data reads what save_data writes with the default format.
+        """
+        with tempfile.TemporaryDirectory() as file_dir:
+            write_logs(file_dir)
+            data_list = lp.feature_manipulation(lp.read_file(file_dir))
+            save_dir = os.path.join(file_dir, 'saved')
+            os.makedirs(save_dir)
+            lp.save_data(data_list, save_dir)
+            loaded = lp.load_data(save_dir)
+        self.assertEqual(len(loaded), len(data_list))
+        for i in range(1, 7):
+            self.assertEqual(loaded[i].shape, data_list[i].shape)
+            self.assertEqual(list(loaded[i].index), list(data_list[i].index))
+
+    def test_edge_save_data_format(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'file_format' is not supported.
+        """
+        with self.assertRaises(ValueError):
+            lp.save_data([0], save_dir='EPM_dataset/Data/', file_format='xlsx')
@@ -169,3 +169,30 @@ class TestMLmodling(unittest.TestCase):
         num_of_clusters = '3'
         with self.assertRaises(ValueError):
             mm.kmean_clustering(data_list, num_of_sessions, num_of_clusters)
+
+    def test_kmean_clustering_sessions(self):
+        """
+        Test that a dictionary of more sessions than the original six is clustered.
+        """
+        sessions = {i: session2.rename(columns={'MID2': 'MID' + str(i)}).drop(columns='Y')
+                    for i in range(1, 9)}
+        result = mm.kmean_clustering(sessions, 8, 2)
+        self.assertEqual(len(result), 5)
+        self.assertIn('group', result.columns)
+
+    def test_session_gap(self):
+        """
+        Test that a missing session (a 0 placeholder) is skipped.
+        """
+        session4 = session3.rename(columns={'MID3': 'MID4'})
+        data_list = [session1, session2, 0, session4]
+        subset = mm.subset_important_features(list(data_list), 2, 'different')
+        self.assertEqual(subset[2], 0)
+        self.assertEqual(list(subset[3].columns[-2:]), ['Y', 'ID'])
+        fitted = mm.machine_learning_model(list(data_list), 'NB')
+        self.assertIn('Predicted_Y', fitted[3].columns)
+        sessions = {i: session.drop(columns='Y') for i, session in
+                    {1: session1, 2: session2, 4: session4}.items()}
+        result = mm.kmean_clustering(sessions, 4, 2)
+        self.assertIn('group', result.columns)
+        self.assertEqual(len(result), 5)
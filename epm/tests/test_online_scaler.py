@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests online_scaler.py
+"""
+
+# Load libraries
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+import data_prep.online_scaler as osc
+import data_prep.log_prep as lp
+import data_prep.grades_prep as gp
+
+# test features for the unittest
+FEATURES = pd.DataFrame({'DUR_Deeds': [1.0, 5.0, 2.0, 8.0, 3.0, 0.0],
+                         'KS_Deeds': [0.0, 3.0, 9.0, 1.0, 4.0, 2.0],
+                         'MM_Study': [10.0, 20.0, 10.0, 40.0, 0.0, 30.0]},
+                        index=pd.Index([1, 2, 3, 4, 5, 6], name='ID'))
+
+
+class TestOnlineScaler(unittest.TestCase):
+    """
+    class for testing online_scaler.py.
+    """
+    def test_batches_match_full_fit(self):
+        """
+        Test that standardizing in batches ends with the full fit's statistics.
+        """
+        expected = StandardScaler().fit_transform(FEATURES)
+        with tempfile.TemporaryDirectory() as tmp:
+            for batch in [FEATURES.iloc[:2], FEATURES.iloc[2:5], FEATURES.iloc[5:]]:
+                lp.feature_standardization([0, batch.copy()], scaler_dir=tmp)
+            result = lp.feature_standardization([0, FEATURES.copy()], scaler_dir=tmp)[0]
+        np.testing.assert_allclose(result.to_numpy(), expected)
+
+    def test_new_column(self):
+        """
+        Test that a column missing from earlier batches counts as 0 for their rows.
+        """
+        columns = list(FEATURES.columns)
+        expected = StandardScaler().fit_transform(FEATURES.assign(MM_Study=[0, 0, 0, 40, 0, 30]))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'scaler.pkl')
+            osc.partial_standardize(FEATURES.iloc[:3, :2], columns[:2], path)
+            last = osc.partial_standardize(FEATURES.iloc[3:], columns, path)
+        np.testing.assert_allclose(last.to_numpy(), expected[3:])
+
+    def test_seen_ids_are_not_counted_twice(self):
+        """
+        Test that sending a student's rows again does not change the statistics.
+        """
+        grades = pd.DataFrame({'ID': [1, 2, 3, 4], 'MID2': [10.0, 50.0, 70.0, 90.0],
+                               'FIN2': [20.0, 40.0, 60.0, 100.0]})
+        expected = gp.standardize_grades(grades)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'grades.pkl')
+            gp.standardize_grades(grades.iloc[:3], scaler_path=path)
+            gp.standardize_grades(grades.iloc[1:], scaler_path=path)
+            result = gp.standardize_grades(grades, scaler_path=path)
+            state = osc.load_scaler(path)
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertEqual(state['scaler'].n_samples_seen_, 4)
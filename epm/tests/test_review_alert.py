@@ -5,6 +5,7 @@ Test for review_alert.py
 # Load libraries
 import unittest
 import epm.modeling.review_alert as ra
+from epm.modeling.review_alert import pickled_sessions
 
 
 # test data_list for the unittest
@@ -34,4 +35,10 @@ class TestReviewAlert(unittest.TestCase):
         """
         id, feat_num = 32, ''
         with self.assertRaises(TypeError):
-            ra(id, feat_num)
\ No newline at end of file
+            ra(id, feat_num)
+
+    def test_pickled_sessions(self):
+        """
+        Test that the sessions are found from the pickled features.
+        """
+        self.assertEqual(pickled_sessions(3), [2, 3, 4, 5, 6])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests synthetic.py
+"""
+
+# Load libraries
+import filecmp
+import os
+import tempfile
+import unittest
+import data_prep.synthetic as sy
+import data_prep.log_prep as lp
+import data_prep.grades_prep as gp
+
+
+class TestSynthetic(unittest.TestCase):
+    """
+    class for testing synthetic.py.
+    """
+    def test_edge_generate_epm_data(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'n_students' is not a positive integer.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(ValueError):
+                sy.generate_epm_data(tmp, n_students=0)
+
+    def test_generate_epm_data(self):
+        """
+        Test that the generated data runs through log_prep and grades_prep.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            n_events = sy.generate_epm_data(tmp, n_students=20, n_sessions=6,
+                                            events_per_file=30, seed=3)
+            data_list = lp.read_file(os.path.join(tmp, 'Processes'))
+            self.assertEqual(n_events, sum(len(data_list[i]) for i in range(1, 7)))
+            features = lp.feature_manipulation(data_list)
+            self.assertEqual(features[1].shape[1], 63)
+            mid, final_1st, final_2nd = gp.read_grades(
+                os.path.join(tmp, 'intermediate_grades.xlsx'),
+                os.path.join(tmp, 'final_grades.xlsx'))
+            final = gp.final_manipulation(final_1st, final_2nd)
+            self.assertEqual(list(mid.columns)[1:],
+                             ['Session ' + str(i) for i in range(2, 7)])
+            self.assertTrue(final['final_score'].between(0, 100).all())
+
+    def test_seed_is_deterministic(self):
+        """
+        Test that the same seed writes the same files.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ['a', 'b']:
+                sy.generate_epm_data(os.path.join(tmp, name), n_students=10,
+                                     events_per_file=20, seed=7)
+            for name in ['all_log.csv', 'logs.txt', os.path.join('Processes', 'Session 3')]:
+                first, second = os.path.join(tmp, 'a', name), os.path.join(tmp, 'b', name)
+                if os.path.isdir(first):
+                    comparison = filecmp.dircmp(first, second)
+                    self.assertEqual(comparison.left_list, comparison.right_list)
+                    self.assertEqual(filecmp.cmpfiles(first, second, comparison.left_list,
+                                                      shallow=False)[0],
+                                     comparison.left_list)
+                else:
+                    self.assertTrue(filecmp.cmp(first, second, shallow=False))
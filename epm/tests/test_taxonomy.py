@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests taxonomy.py
+"""
+
+# Load libraries
+import unittest
+import numpy as np
+import pandas as pd
+import data_prep.taxonomy as tx
+
+
+class TestTaxonomy(unittest.TestCase):
+    """
+    class for testing taxonomy.py.
+    """
+    def test_categorize_activity(self):
+        """
+        Test that the groups match the row-wise regex replacement.
+        """
+        activity = pd.Series([' Deeds_Es_1_1', ' Other', ' TextEditor_Es_2_1', ' FSM_Related',
+                              ' fsm_es_6_1', ' Study_Es_3_2', ' Deeds', ' Other', np.nan])
+        expected = activity.replace(regex=[r'TextEditor\w+', r'Deeds\w+',
+                                           r'Study\w+', r'(?i)FSM_\w+'],
+                                    value=['TextEditor', 'Deeds', 'Study', 'FSM']).str.strip()
+        groups = tx.categorize_activity(activity)
+        self.assertEqual(str(groups.dtype), 'category')
+        self.assertEqual(list(groups.cat.categories),
+                         ['Deeds', 'FSM', 'Other', 'Study', 'TextEditor'])
+        pd.testing.assert_series_equal(groups.astype(object), expected.astype(object))
+
+    def test_custom_rules(self):
+        """
+        Test that a course can supply its own vocabulary.
+        """
+        activity = pd.Series([' Quiz_3', ' Forum_thread_9', ' Quiz_10'])
+        rules = [(r'Quiz_\d+', 'Quiz'), (r'Forum\w+', 'Forum')]
+        groups = tx.categorize_activity(activity, rules)
+        self.assertEqual(list(groups), ['Quiz', 'Forum', 'Quiz'])
+        self.assertEqual(list(groups.cat.codes), [1, 0, 1])
+
+    def test_edge_categorize_activity(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'activity' is not a series or the rules are malformed.
+        """
+        with self.assertRaises(ValueError):
+            tx.categorize_activity(['Deeds_Es_1_1'])
+        with self.assertRaises(ValueError):
+            tx.categorize_activity(pd.Series(['Deeds_Es_1_1']), rules=['Deeds'])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests time_features.py
+"""
+
+# Load libraries
+import unittest
+import numpy as np
+import pandas as pd
+import data_prep.log_prep as lp
+import data_prep.time_features as tf
+
+
+def event(student, activity, start, end):
+    """
+    Build one raw log row on 2.10.2014 with start and end given as 'mm:ss'
+    """
+    return [1, student, ' Es', ' ' + activity, ' 2.10.2014 11:' + start,
+            ' 2.10.2014 11:' + end, 0, 0, 0, 0, 0, 0, 0]
+
+
+class TestTimeFeatures(unittest.TestCase):
+    """
+    class for testing time_features.py.
+    """
+    def test_parse_timestamps(self):
+        """
+        Test that the parser matches pd.to_datetime with the explicit format.
+        """
+        values = pd.Series([' 2.10.2014 11:25:1', ' 29.2.2016 0:0:0', '31.12.1999 23:59:59',
+                            ' 2.10.2014 11:25:1', np.nan])
+        expected = pd.to_datetime(values.str.strip(), format='%d.%m.%Y %H:%M:%S')
+        pd.testing.assert_series_equal(tf.parse_timestamps(values), expected)
+
+    def test_malformed_timestamps(self):
+        """
+        Test that malformed timestamps become NaT.
+        """
+        parsed = tf.parse_timestamps(pd.Series(['2.10.2014', '2.13.2014 11:25:01',
+                                                '29.2.2015 11:25:01', '31.4.2014 11:25:01',
+                                                '29.2.1900 11:25:01']))
+        self.assertTrue(parsed.isna().all())
+        self.assertFalse(tf.parse_timestamps(pd.Series(['29.2.2000 0:0:0'])).isna().any())
+
+    def test_edge_parse_timestamps(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'values' is not a series.
+        """
+        with self.assertRaises(ValueError):
+            tf.parse_timestamps(['2.10.2014 11:25:01'])
+
+    def test_time_on_task(self):
+        """
+        Test the merged intervals of overlapping and separate events.
+        """
+        session = pd.DataFrame([event(1, 'Deeds_Es_1_1', '00:30', '00:40'),
+                                event(1, 'Deeds_Es_1_2', '00:00', '00:10'),
+                                event(1, 'Deeds', '00:05', '00:20'),
+                                event(1, 'Other', '00:00', '00:01'),
+                                event(2, 'Deeds', '00:10', '00:10')],
+                               columns=lp.LOG_COLUMNS)
+        features = tf.time_on_task(session)
+        self.assertEqual(list(features.index), [1, 2])
+        self.assertEqual(features.loc[1, 'ACTIVE_Deeds'], 30)
+        self.assertEqual(features.loc[1, 'SPAN_Deeds'], 40)
+        self.assertEqual(features.loc[1, 'GAP_Deeds'], 10)
+        self.assertEqual(features.loc[1, 'MAXGAP_Deeds'], 10)
+        self.assertEqual(features.loc[1, 'INTERVALS_Deeds'], 2)
+        self.assertEqual(features.loc[1, 'ACTIVE_Other'], 1)
+        self.assertEqual(features.loc[2, 'INTERVALS_Deeds'], 1)
+        self.assertEqual(features.loc[2, 'SPAN_Other'], 0)
+
+    def test_missing_end_time(self):
+        """
+        Test that events with a blank or malformed end_time last no time.
+        """
+        session = pd.DataFrame([event(1, 'Deeds', '00:00', '00:10'),
+                                event(1, 'Deeds', '00:30', '00:40'),
+                                event(2, 'Deeds', '00:05', '00:20')],
+                               columns=lp.LOG_COLUMNS)
+        session.loc[1, 'end_time'] = np.nan
+        session.loc[2, 'end_time'] = ' garbage'
+        features = tf.time_on_task(session)
+        self.assertEqual(features.loc[1, 'ACTIVE_Deeds'], 10)
+        self.assertEqual(features.loc[1, 'SPAN_Deeds'], 30)
+        self.assertEqual(features.loc[1, 'INTERVALS_Deeds'], 2)
+        self.assertEqual(features.loc[2, 'ACTIVE_Deeds'], 0)
+        self.assertEqual(features.loc[2, 'SPAN_Deeds'], 0)
+
+    def test_edge_time_on_task(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'session' is not a dataframe.
+        """
+        with self.assertRaises(ValueError):
+            tf.time_on_task('session')
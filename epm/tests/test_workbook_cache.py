@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""
+A module that tests workbook_cache.py
+"""
+
+# Load libraries
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import data_prep.workbook_cache as wc
+import data_prep.grades_prep as gp
+
+# test sheets for the unittest
+MID = pd.DataFrame({'Student Id': [1, 2, 3], 'Session 2': [4.5, 0.0, 6.0],
+                    'Session 3': [1.25, 2.0, 3.5]})
+FINAL = pd.DataFrame({'Student ID': [1, 3], 'ES 1.1 \n(2 points)': [2.0, 1.5],
+                      'TOTAL\n(100 points)': [40.0, 51.5]})
+
+
+def write_workbook(path, sheets):
+    """
+    Write a workbook of several sheets for the unittest
+    """
+    with pd.ExcelWriter(path) as writer:
+        for name, sheet in sheets.items():
+            sheet.to_excel(writer, sheet_name=name, index=False)
+    return path
+
+
+class TestWorkbookCache(unittest.TestCase):
+    """
+    class for testing workbook_cache.py.
+    """
+    def setUp(self):
+        wc.clear_cache()
+
+    def test_read_workbook(self):
+        """
+        Test that cached sheets match read_excel and are parsed only once.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_workbook(os.path.join(tmp, 'final_grades.xlsx'),
+                                  {'Exam (First time)': FINAL, 'Exam (Second time)': FINAL})
+            expected = pd.read_excel(path, sheet_name=None)
+            sheets = wc.read_workbook(path, sheet_name=None)
+            self.assertEqual(list(sheets), list(expected))
+            for name in expected:
+                pd.testing.assert_frame_equal(sheets[name], expected[name])
+            # Later reads come from memory, then from the Feather files
+            with mock.patch.object(pd, 'read_excel', side_effect=AssertionError):
+                pd.testing.assert_frame_equal(wc.read_workbook(path, 1),
+                                              expected['Exam (Second time)'])
+                wc.clear_cache()
+                pd.testing.assert_frame_equal(wc.read_workbook(path, 'Exam (First time)'),
+                                              expected['Exam (First time)'])
+            self.assertTrue(os.listdir(os.path.join(tmp, wc.CACHE_FOLDER)))
+
+    def test_changed_workbook(self):
+        """
+        Test that a rewritten workbook is parsed again and callers get copies.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_workbook(os.path.join(tmp, 'intermediate_grades.xlsx'), {'Sheet1': MID})
+            first = wc.read_workbook(path)
+            first.loc[0, 'Session 2'] = 99
+            pd.testing.assert_frame_equal(wc.read_workbook(path), MID)
+            write_workbook(path, {'Sheet1': MID.drop(columns='Session 3')})
+            self.assertEqual(list(wc.read_workbook(path).columns), ['Student Id', 'Session 2'])
+
+    def test_bounded_cache(self):
+        """
+        Test that only the latest MAX_WORKBOOKS workbooks stay in memory.
+        """
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(wc, 'MAX_WORKBOOKS', 2):
+            paths = [write_workbook(os.path.join(tmp, str(i) + '.xlsx'),
+                                    {'Sheet1': MID.assign(**{'Session 2': float(i)})})
+                     for i in range(3)]
+            for path in paths:
+                wc.read_workbook(path)
+            self.assertEqual(len(wc._SHEETS), 2)
+            self.assertEqual(len(wc._HASHES), 2)
+            self.assertEqual(list(wc._SHEETS), [wc.file_hash(path) for path in paths[1:]])
+            self.assertEqual(wc.read_workbook(paths[0])['Session 2'].tolist(), [0.0] * 3)
+
+    def test_read_only_folder(self):
+        """
+        Test that a workbook in a folder that takes no cache is still read.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_workbook(os.path.join(tmp, 'intermediate_grades.xlsx'), {'Sheet1': MID})
+            with mock.patch.object(wc.os, 'makedirs', side_effect=PermissionError):
+                pd.testing.assert_frame_equal(wc.read_workbook(path), MID)
+            self.assertFalse(os.path.exists(os.path.join(tmp, wc.CACHE_FOLDER)))
+            with mock.patch.object(pd, 'read_excel', side_effect=AssertionError):
+                pd.testing.assert_frame_equal(wc.read_workbook(path), MID)
+
+    def test_read_grades(self):
+        """
+        Test that read_grades returns the same sheets through the cache.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            mid_path = write_workbook(os.path.join(tmp, 'mid.xlsx'), {'Sheet1': MID})
+            final_path = write_workbook(os.path.join(tmp, 'final.xlsx'),
+                                        {'First': FINAL, 'Second': FINAL.iloc[1:]})
+            mid, final_1st, final_2nd = gp.read_grades(mid_path, final_path)
+        pd.testing.assert_frame_equal(mid, MID)
+        pd.testing.assert_frame_equal(final_1st, FINAL)
+        pd.testing.assert_frame_equal(final_2nd, FINAL.iloc[1:].reset_index(drop=True))
+
+    def test_edge_read_workbook(self):
+        """
+        Edge test to make sure the function throws a ValueError
+        when 'path' is not a string.
+        """
+        with self.assertRaises(ValueError):
+            wc.read_workbook(['intermediate_grades.xlsx'])